@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+बिना नेटवर्क के throughput बेंचमार्क: असली Application, नकली Bot API
+
+bot.py के सभी हैंडलर्स वाला वही Application बनता है जो main.py चलाता है,
+पर Bot API के अनुरोध FakeBotAPI को जाते हैं (हर कॉल दर्ज, तय latency के
+साथ) और स्टोरेज डिफ़ॉल्ट रूप से in-memory SQLite है। हर परिदृश्य के
+synthetic अपडेट webhook की तरह application.update_queue में डाले जाते हैं।
+
+    python bench.py                               # सभी परिदृश्य
+    python bench.py --scenario chatter --updates 20000 --api-latency 0.05
+    python bench.py --json results.json           # नतीजे सहेजें
+    python bench.py --baseline results.json       # धीमा हुआ तो exit code 1
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telegram.request import BaseRequest, RequestData
+
+BOT_ID = 999000
+OWNER_ID = 1
+FIRST_CHAT = -1001000000000
+FIRST_USER = 100000
+FILTER_TRIGGERS = tuple(f"trigger{index}" for index in range(50))
+FED_BANS = 1000  # बेंच के उपयोगकर्ताओं से अलग आईडी, ताकि join पर कोई बैन न हो
+WORDS = (
+    "नमस्ते", "कैसे", "हो", "आज", "मौसम", "अच्छा", "है", "hello", "ok", "lol",
+    "मैच", "देखा", "कल", "मिलते", "हैं", "thanks", "भाई", "क्या", "बात",
+)
+COMMANDS = ("/rules", "/id", "/filters", "/locks", "/warns", "/info", "/start")
+
+
+class FakeBotAPI(BaseRequest):
+    """Bot API का नकली जवाब देने वाला request; हर endpoint की कॉल गिनता है"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._message_ids = itertools.count(1)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None,
+                         pool_timeout=None) -> Tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        params = request_data.parameters if request_data else {}
+        result = self._result(endpoint, params)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    def _result(self, endpoint: str, params: Dict[str, Any]) -> Any:
+        if endpoint == "getMe":
+            return {"id": BOT_ID, "is_bot": True, "first_name": "Bench", "username": "bench_bot",
+                    "can_join_groups": True, "can_read_all_group_messages": True,
+                    "supports_inline_queries": False}
+        if endpoint.startswith(("send", "forward", "copy", "edit")):
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": _chat(int(params.get("chat_id", FIRST_CHAT))),
+                "from": _user(BOT_ID, is_bot=True),
+                "text": str(params.get("text", "")),
+            }
+        if endpoint == "getChatAdministrators":
+            return [
+                {"status": "creator", "user": _user(OWNER_ID), "is_anonymous": False},
+                {"status": "administrator", "user": _user(BOT_ID, is_bot=True), **_ADMIN_RIGHTS},
+            ]
+        if endpoint == "getChatMember":
+            return {"status": "member", "user": _user(int(params.get("user_id", FIRST_USER)))}
+        if endpoint == "getChat":
+            return _chat(int(params.get("chat_id", FIRST_CHAT)))
+        return True
+
+
+_ADMIN_RIGHTS = {
+    key: True for key in (
+        "can_be_edited", "is_anonymous", "can_manage_chat", "can_delete_messages",
+        "can_manage_video_chats", "can_restrict_members", "can_promote_members",
+        "can_change_info", "can_invite_users",
+    )
+}
+
+
+def _user(user_id: int, is_bot: bool = False) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": is_bot, "first_name": f"U{user_id}"}
+
+
+def _chat(chat_id: int) -> Dict[str, Any]:
+    return {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private", "title": f"Bench {chat_id}"}
+
+
+class UpdateFactory:
+    """Telegram JSON जैसे synthetic अपडेट"""
+
+    def __init__(self, rng: random.Random, chats: int, users: int):
+        self.rng = rng
+        self.chats = [FIRST_CHAT - index for index in range(chats)]
+        self.users = [FIRST_USER + index for index in range(users)]
+        self._update_ids = itertools.count(1)
+
+    def message(self, chat_id: Optional[int] = None, user_id: Optional[int] = None, **content) -> Dict[str, Any]:
+        update_id = next(self._update_ids)
+        chat_id = chat_id if chat_id is not None else self.rng.choice(self.chats)
+        user_id = user_id if user_id is not None else self.rng.choice(self.users)
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": _chat(chat_id),
+                "from": _user(user_id),
+                **content,
+            },
+        }
+
+    def text(self) -> Dict[str, Any]:
+        words = self.rng.choices(WORDS, k=self.rng.randint(2, 12))
+        roll = self.rng.random()
+        if roll < 0.1:
+            words.insert(self.rng.randrange(len(words) + 1), self.rng.choice(FILTER_TRIGGERS))
+        elif roll < 0.15:
+            words.append("https://example.com")
+        return self.message(text=" ".join(words))
+
+    def command(self) -> Dict[str, Any]:
+        command = self.rng.choice(COMMANDS)
+        return self.message(text=command, entities=[{"type": "bot_command", "offset": 0, "length": len(command)}])
+
+    def join(self) -> Dict[str, Any]:
+        members = [_user(self.rng.choice(self.users)) for _ in range(self.rng.randint(1, 3))]
+        return self.message(new_chat_members=members)
+
+    def media(self) -> Dict[str, Any]:
+        photo = {"file_id": "bench-photo", "file_unique_id": "bench", "width": 90, "height": 90}
+        return self.message(photo=[photo], caption=self.rng.choice(WORDS))
+
+
+# परिदृश्य: नाम -> (विवरण, अपडेट बनाने वाला फंक्शन)
+SCENARIOS: Dict[str, Tuple[str, Callable[[UpdateFactory], Dict[str, Any]]]] = {
+    "chatter": ("फ़िल्टर वाली चैटों में आम बातचीत", UpdateFactory.text),
+    "commands": ("कमांड की बौछार (ज़्यादातर रेट लिमिट पर रुकती है)", UpdateFactory.command),
+    "joins": ("join raid: फ़ेडरेशन और स्वागत संदेश वाली चैटों में नए सदस्य", UpdateFactory.join),
+    "media": ("media लॉक वाली चैटों में फ़ोटो (हर एक हटाई जाती है)", UpdateFactory.media),
+}
+
+
+async def seed(db, chats: List[int]):
+    """हर चैट में फ़िल्टर, स्वागत संदेश, media लॉक और एक साझा फ़ेडरेशन"""
+    fed_id = await db.create_federation("bench", OWNER_ID)
+    for user_id in range(FIRST_USER - FED_BANS, FIRST_USER):
+        await db.add_fed_ban(fed_id, user_id, "bench", OWNER_ID)
+    for chat_id in chats:
+        await db.set_group_setting(chat_id, "federation_id", fed_id)
+        await db.set_group_setting(chat_id, "welcome_message", "स्वागत है {mention}, {chatname} में!")
+        await db.set_lock(chat_id, "media", True)
+        for trigger in FILTER_TRIGGERS:
+            await db.add_filter(chat_id, trigger, f"{trigger} का जवाब", OWNER_ID)
+
+
+async def run_scenario(application, factory: UpdateFactory, api: FakeBotAPI,
+                       build: Callable[[UpdateFactory], Dict[str, Any]], count: int) -> Dict[str, Any]:
+    from telegram import Update
+    from metrics import Histogram, LATENCY_BUCKETS, metrics
+    from querylog import query_log
+
+    updates = [Update.de_json(build(factory), application.bot) for _ in range(count)]
+    metrics.reset()
+    query_log.reset()
+    api.calls.clear()
+
+    start = time.perf_counter()
+    for update in updates:
+        await application.update_queue.put(update)
+    await application.update_queue.join()
+    elapsed = time.perf_counter() - start
+
+    snapshot = metrics.snapshot()
+    handlers = {}
+    for name, stats in sorted(snapshot["handlers"].items()):
+        if not stats["calls"]:
+            continue
+        latency = Histogram.restore(LATENCY_BUCKETS, stats["latency"])
+        handlers[name] = {
+            "calls": stats["calls"],
+            "errors": stats["errors"],
+            "p50_ms": round(latency.quantile(0.5) * 1000, 3),
+            "p95_ms": round(latency.quantile(0.95) * 1000, 3),
+            "queries_per_call": round(stats["db_queries"] / stats["calls"], 3),
+        }
+    update_latency = Histogram.restore(LATENCY_BUCKETS, snapshot["update_latency"])
+    return {
+        "updates": count,
+        "seconds": round(elapsed, 4),
+        "updates_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "update_p50_ms": round(update_latency.quantile(0.5) * 1000, 3),
+        "update_p95_ms": round(update_latency.quantile(0.95) * 1000, 3),
+        "queries_per_update": round(snapshot["db_queries"] / count, 3),
+        "api_calls": dict(api.calls.most_common()),
+        "handlers": handlers,
+        "top_queries": [
+            {key: row[key] for key in ("fingerprint", "count", "total")} for row in query_log.top(5)
+        ],
+    }
+
+
+def print_report(name: str, result: Dict[str, Any]):
+    print(f"\n== {name}: {SCENARIOS[name][0]}")
+    print(
+        f"{result['updates']} अपडेट, {result['seconds']:.2f}s -> {result['updates_per_sec']:.1f} अपडेट/सेकंड | "
+        f"p50 {result['update_p50_ms']} ms, p95 {result['update_p95_ms']} ms | "
+        f"{result['queries_per_update']} क्वेरी/अपडेट"
+    )
+    print("Bot API: " + (", ".join(f"{key}={value}" for key, value in result["api_calls"].items()) or "-"))
+    print(f"  {'हैंडलर':<24}{'कॉल':>8}{'त्रुटि':>8}{'p50 ms':>10}{'p95 ms':>10}{'क्वेरी/कॉल':>12}")
+    for handler, stats in result["handlers"].items():
+        print(
+            f"  {handler:<24}{stats['calls']:>8}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['queries_per_call']:>12}"
+        )
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """baseline से `tolerance` से ज़्यादा धीमे या ज़्यादा क्वेरी वाले परिदृश्य"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["updates_per_sec"] < base["updates_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['updates_per_sec']} अपडेट/सेकंड (baseline {base['updates_per_sec']})"
+            )
+        if result["queries_per_update"] > base["queries_per_update"] * (1 + tolerance) + 0.01:
+            regressions.append(
+                f"{name}: {result['queries_per_update']} क्वेरी/अपडेट (baseline {base['queries_per_update']})"
+            )
+    return regressions
+
+
+async def run(args) -> Dict[str, Any]:
+    # bot.py import होते ही कॉन्फ़िगरेशन पढ़ता है
+    import bot
+    from ratelimit import Limit
+    from throttle import SendScheduler
+
+    api = FakeBotAPI(args.api_latency)
+    scheduler = None
+    if not args.flood_limits:
+        unlimited = Limit(1e-9, 10 ** 9)
+        scheduler = SendScheduler(unlimited, unlimited, unlimited)
+    # बेंचमार्क की रिपोर्ट के बीच बॉट के INFO लॉग न आएं
+    logging.getLogger().setLevel(logging.WARNING)
+    bot.db.init_db()
+    application = bot.build_application(webhook=True, request=api, send_scheduler=scheduler)
+
+    rng = random.Random(args.seed)
+    factory = UpdateFactory(rng, args.chats, args.users)
+    await bot.start_application(application)
+    try:
+        await seed(bot.db, factory.chats)
+        results = {}
+        for name in args.scenario or SCENARIOS:
+            results[name] = await run_scenario(application, factory, api, SCENARIOS[name][1], args.updates)
+            print_report(name, results[name])
+        return results
+    finally:
+        await bot.stop_application(application)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="नकली Bot API पर बॉट का throughput बेंचमार्क")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="सिर्फ यह परिदृश्य (कई बार दिया जा सकता है)")
+    parser.add_argument("--updates", type=int, default=5000, help="हर परिदृश्य में अपडेट")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="हर Bot API कॉल की नकली देरी (सेकंड)")
+    parser.add_argument("--storage", default="sqlite://:memory:", help="DATABASE_URL, जैसे memory://")
+    parser.add_argument("--flood-limits", action="store_true", help="Telegram की असली send सीमाएँ लागू करें")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="नतीजे इस फ़ाइल में लिखें")
+    parser.add_argument("--baseline", help="इन नतीजों से तुलना करें; धीमा होने पर exit code 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="baseline से स्वीकार्य गिरावट (अनुपात)")
+    args = parser.parse_args(argv)
+
+    os.environ["BOT_TOKEN"] = "123456:BENCHMARK"
+    os.environ["DATABASE_URL"] = args.storage
+    os.environ.pop("WEBHOOK_URL", None)
+    os.environ.setdefault("QUERY_BUDGET", "0")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD", "0")
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            regressions = compare(results, json.load(source), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
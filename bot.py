@@ -4,15 +4,18 @@ MissRose_bot Clone - Comprehensive Telegram Group Management Bot
 Created with 60+ working commands for complete group administration
 """
 import os
+import asyncio
 import logging
 import re
 import json
 import time
 import uuid
-import psycopg2
+import hashlib
+import heapq
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union, Any
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from functools import wraps
 
 from telegram import (
@@ -23,6 +26,7 @@ from telegram import (
 )
 from telegram.ext import (
     Application,
+    ChatMemberHandler,
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
@@ -32,9 +36,18 @@ from telegram.ext import (
 
 from telegram.error import TelegramError, BadRequest, Forbidden
 from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
+from telegram.request import BaseRequest
 
 # help_content.py फ़ाइल से हेल्प टेक्स्ट इम्पोर्ट करें
 from help_content import help_texts, support_text
+from matcher import AhoCorasick
+from metrics import metrics
+from querylog import query_log
+from processor import ChatOrderedUpdateProcessor
+from ratelimit import Limit, RateLimitEngine
+from storage import GROUP_COLUMNS, AuditRow, FedJobResult, FedJobRow, create_storage, to_utc
+from throttle import SendScheduler, current_priority, send_priority, PRIORITY_LOW, PRIORITY_MODERATION, PRIORITY_NORMAL
 
 # लॉगिंग कॉन्फ़िगर करें
 logging.basicConfig(
@@ -45,1646 +58,1374 @@ logger = logging.getLogger(__name__)
 
 # एनवायरनमेंट वेरिएबल्स से कॉन्फ़िगरेशन
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# बॉट चलाने वालों के user id (कॉमा से अलग); /dbstats और /querystats सिर्फ इनके लिए
+BOT_OPERATOR_IDS = frozenset(
+    int(user_id) for user_id in os.getenv("BOT_OPERATOR_IDS", "").split(",") if user_id.strip()
+)
 DATABASE_URL = os.getenv("DATABASE_URL")
-WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Render द्वारा प्रदान किया गया
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Render द्वारा प्रदान किया गया; न हो तो polling मोड
 PORT = int(os.getenv("PORT", "8443"))
-
-class Database:
-    """बॉट डेटा के लिए PostgreSQL डेटाबेस हैंडलर"""
-
-    def __init__(self, db_url: str):
-        self.db_url = db_url
-        if not self.db_url:
-            logger.error("DATABASE_URL एनवायरनमेंट वेरिएबल में नहीं मिला!")
-            raise ValueError("DATABASE_URL एनवायरनमेंट वेरिएबल सेट नहीं है।")
-
-    def get_connection(self):
-        """Render PostgreSQL database se secure connection establish karta hai."""
-        return psycopg2.connect(self.db_url, sslmode="require")
-
-    def init_db(self):
-        """डेटाबेस तालिकाओं को प्रारंभ करता है"""
-        conn = self.get_connection()
-        try:
-            with conn.cursor() as cursor:
-                # Groups टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS groups (
-                        chat_id BIGINT PRIMARY KEY,
-                        welcome_message TEXT,
-                        goodbye_message TEXT,
-                        rules TEXT,
-                        private_rules BOOLEAN DEFAULT FALSE,
-                        clean_welcome BOOLEAN DEFAULT FALSE,
-                        clean_service BOOLEAN DEFAULT FALSE,
-                        silent_actions BOOLEAN DEFAULT FALSE,
-                        log_channel BIGINT,
-                        federation_id TEXT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-                # Users टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id BIGINT PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        last_name TEXT,
-                        is_banned BOOLEAN DEFAULT FALSE,
-                        ban_reason TEXT,
-                        ban_expires TIMESTAMP WITH TIME ZONE,
-                        warnings INTEGER DEFAULT 0,
-                        last_seen TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-                # Group restrictions टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS group_restrictions (
-                        chat_id BIGINT,
-                        user_id BIGINT,
-                        restriction_type TEXT,
-                        expires_at TIMESTAMP WITH TIME ZONE,
-                        reason TEXT,
-                        admin_id BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        PRIMARY KEY (chat_id, user_id, restriction_type)
-                    )
-                ''')
-
-                # Filters टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS filters (
-                        chat_id BIGINT,
-                        trigger_word TEXT,
-                        response TEXT,
-                        is_private BOOLEAN DEFAULT FALSE,
-                        created_by BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        PRIMARY KEY (chat_id, trigger_word)
-                    )
-                ''')
-
-                # Locks टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS locks (
-                        chat_id BIGINT,
-                        lock_type TEXT,
-                        is_locked BOOLEAN DEFAULT TRUE,
-                        PRIMARY KEY (chat_id, lock_type)
-                    )
-                ''')
-
-                # Disabled commands टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS disabled_commands (
-                        chat_id BIGINT,
-                        command TEXT,
-                        PRIMARY KEY (chat_id, command)
-                    )
-                ''')
-
-                # Federation टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS federations (
-                        fed_id TEXT PRIMARY KEY,
-                        fed_name TEXT,
-                        owner_id BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-                # Federation bans टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS fed_bans (
-                        fed_id TEXT,
-                        user_id BIGINT,
-                        reason TEXT,
-                        banned_by BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        PRIMARY KEY (fed_id, user_id)
-                    )
-                ''')
-
-                # Warnings टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS warnings (
-                        id SERIAL PRIMARY KEY,
-                        chat_id BIGINT,
-                        user_id BIGINT,
-                        reason TEXT,
-                        warned_by BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-            conn.commit()
-            logger.info("डेटाबेस तालिकाएँ सफलतापूर्वक प्रारंभ हो गईं।")
-
-        except Exception as e:
-            logger.error(f"डेटाबेस प्रारंभ करने में त्रुटि: {e}")
-            conn.rollback()
-
-        finally:
-            conn.close()
-
-
-    def execute_query(self, query: str, params: tuple = (), fetch=None):
-        """क्वेरी निष्पादित करता है और डेटा लौटाता है (यदि fetch सेट हो)"""
-        conn = self.get_connection()
-        try:
-            with conn.cursor() as cursor:
-               # cursor.execute(query, params)
-                if fetch == 'one':
-                    result = cursor.fetchone()
-                elif fetch == 'all':
-                    result = cursor.fetchall()
-                else:
-                    result = None
-            
-                return result
-        except Exception as e:
-            logger.error(f"क्वेरी त्रुटि: {e}")
-            conn.rollback()
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+# Telegram हर webhook अनुरोध में यह header भेजता है; न दिया हो तो टोकन से बनता है
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or (
+    hashlib.sha256(BOT_TOKEN.encode()).hexdigest()[:32] if BOT_TOKEN else None
+)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+# 1 से ज़्यादा हो तो webhook receiver चैटों को इतने worker प्रोसेस में बाँटता है
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# कनेक्शन पूल कॉन्फ़िगरेशन
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # सेकंड
+DB_POOL_RECYCLE_USES = int(os.getenv("DB_POOL_RECYCLE_USES", "1000"))
+DB_POOL_HEALTHCHECK_IDLE = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))  # सेकंड
+# async क्वेरी चलाने वाले थ्रेड; पूल से ज़्यादा थ्रेड सिर्फ कनेक्शन का इंतज़ार करेंगे
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_POOL_MAX)))
+
+# क्वेरी आँकड़े: इससे धीमे statement लॉग होते हैं (0 = बंद)
+SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", "0.1"))  # सेकंड
+QUERY_LOG_MAX = int(os.getenv("QUERY_LOG_MAX", "500"))  # अधिकतम fingerprint
+# debug: इससे ज़्यादा क्वेरी करने वाला अपडेट लॉग होता है (0 = बंद)
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))
+
+# ग्रुप सेटिंग्स कैश कॉन्फ़िगरेशन
+GROUP_SETTINGS_TTL = float(os.getenv("GROUP_SETTINGS_TTL", "300"))  # सेकंड
+GROUP_SETTINGS_MAX = int(os.getenv("GROUP_SETTINGS_MAX", "10000"))  # अधिकतम चैट
+
+FILTER_CACHE_MAX = int(os.getenv("FILTER_CACHE_MAX", "5000"))  # अधिकतम चैट
+LOCK_CACHE_MAX = int(os.getenv("LOCK_CACHE_MAX", "50000"))  # अधिकतम चैट
+
+# लॉक प्रकार: हर प्रकार का एक बिट, क्रम ही प्राथमिकता है
+LOCK_TYPES = (
+    'all', 'msg', 'media', 'sticker', 'gif', 'url', 'bots',
+    'forward', 'game', 'location', 'rtl', 'button', 'egame', 'inline'
+)
+LOCK_BITS = {lock_type: 1 << index for index, lock_type in enumerate(LOCK_TYPES)}
+LOCK_REASONS = {
+    'all': "सभी सामग्री",
+    'media': "मीडिया",
+    'sticker': "स्टिकर",
+    'gif': "GIFs",
+    'url': "URLs",
+    'forward': "फॉरवर्ड किए गए संदेश",
+}
+URL_MARKERS = ('http', 'www.', '.com', '.net', '.org')
+
+# एडमिन कैश कॉन्फ़िगरेशन
+ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "600"))  # सेकंड
+ADMIN_CACHE_MAX = int(os.getenv("ADMIN_CACHE_MAX", "20000"))  # अधिकतम चैट
+ADMIN_STATUSES = ("administrator", "creator")
+
+# इतनी चेतावनियों पर उपयोगकर्ता स्वतः प्रतिबंधित
+WARN_LIMIT = 3
+
+# अस्थायी प्रतिबंध (tban/tmute) की समाप्ति
+TEMP_RESTRICTIONS = ("tban", "tmute")
+EXPIRY_LOAD_WINDOW = float(os.getenv("EXPIRY_LOAD_WINDOW", "86400"))  # सेकंड आगे तक की पंक्तियाँ मेमोरी में
+EXPIRY_BATCH_SIZE = int(os.getenv("EXPIRY_BATCH_SIZE", "500"))
+EXPIRY_CONCURRENCY = int(os.getenv("EXPIRY_CONCURRENCY", "10"))  # एक साथ Bot API कॉल
+
+# मॉडरेशन audit log: हैंडलर मेमोरी बफ़र में जोड़ते हैं, बैकग्राउंड में बैच INSERT
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "5"))  # सेकंड
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_MAX_BUFFER = int(os.getenv("AUDIT_MAX_BUFFER", "20000"))  # DB बंद हो तो इससे ज़्यादा पंक्तियाँ नहीं रखते
+AUDIT_HISTORY_LIMIT = 20
+
+# /report: एडमिन्स को DM
+REPORT_CONCURRENCY = int(os.getenv("REPORT_CONCURRENCY", "10"))  # सभी रिपोर्टों में एक साथ DM
+REPORT_DEDUP_WINDOW = float(os.getenv("REPORT_DEDUP_WINDOW", "300"))  # सेकंड; उसी संदेश की दोबारा रिपोर्ट अनदेखी
+REPORT_DIGEST_WINDOW = float(os.getenv("REPORT_DIGEST_WINDOW", "0"))  # सेकंड; 0 = हर रिपोर्ट तुरंत
+REPORT_MAX_PENDING = int(os.getenv("REPORT_MAX_PENDING", "2000"))  # कतार में अधिकतम DM
+
+# लॉग चैनल digest (/logdigest on वाली चैटें)
+LOG_DIGEST_INTERVAL = float(os.getenv("LOG_DIGEST_INTERVAL", "30"))  # सेकंड; पहली घटना से इतनी देर बाद भेजें
+LOG_DIGEST_MAX_EVENTS = int(os.getenv("LOG_DIGEST_MAX_EVENTS", "50"))  # इतनी घटनाएँ होते ही भेजें
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# फ़ेडरेशन बैन हर सदस्य ग्रुप तक (/fban, /unfban)
+FED_BAN_CONCURRENCY = int(os.getenv("FED_BAN_CONCURRENCY", "20"))  # सभी कामों में एक साथ Bot API कॉल
+FED_BAN_CHECKPOINT_SIZE = int(os.getenv("FED_BAN_CHECKPOINT_SIZE", "100"))  # इतने नतीजों पर checkpoint
+FED_BAN_CHECKPOINT_INTERVAL = float(os.getenv("FED_BAN_CHECKPOINT_INTERVAL", "5"))  # सेकंड
+
+# अलग-अलग चैटों के इतने अपडेट एक साथ; एक चैट के अपडेट हमेशा क्रम से
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "32"))
+
+# कमांड रेट लिमिट: हैंडलर का नाम (या "default") -> स्कोप -> Limit(period सेकंड, burst)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # प्रति स्कोप
+RATE_LIMITS = {
+    "default": {
+        "user": Limit(3, 1),       # हर यूज़र: 3 सेकंड में एक कमांड
+        "chat": Limit(1, 20),      # हर चैट: 20 का burst, फिर 1/सेकंड
+        "global": Limit(0.02, 200),  # पूरा बॉट: 50/सेकंड
+    },
+    "help_command": {"user": Limit(10, 2)},
+    "report_user": {"user": Limit(60, 2), "chat": Limit(10, 5)},
+    "kickme": {"user": Limit(30, 1)},
+}
+
+
+class GroupSettings:
+    """chat_id के हिसाब से पूरी groups पंक्ति का in-memory कैश (TTL + LRU)"""
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # chat_id -> (expires_at, row)
+        self._generation: Dict[int, int] = {}  # लोड के दौरान हुए write पहचानने के लिए
+        self._epoch = 0  # clear() पर बढ़ता है
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """कैश की पंक्ति लौटाता है, या None अगर नहीं है/पुरानी हो गई"""
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            self.misses += 1
             return None
-       # finally:
-           # conn.close()
-
-    def get_group_setting(self, chat_id: int, setting: str):
-        """विशिष्ट सेटिंग प्राप्त करें"""
-        result = self.execute_query(
-            f"SELECT {setting} FROM groups WHERE chat_id = %s",
-            (chat_id,),
-            fetch='one'
-        )
-        return result[0] if result else None
-
-    def set_group_setting(self, chat_id: int, setting: str, value):
-        """विशिष्ट सेटिंग अपडेट/सेट करें"""
-        query = f"""
-            INSERT INTO groups (chat_id, {setting}) VALUES (%s, %s)
-            ON CONFLICT (chat_id) DO UPDATE SET {setting} = EXCLUDED.{setting};
-        """
-        self.execute_query(query, (chat_id, value))
-
-
-# डेटाबेस प्रारंभ करें
-db = Database(DATABASE_URL)
-
-# --- डेकोरेटर और यूटिलिटी फ़ंक्शंस ---
-
-def admin_required(func):
-    """सिर्फ एडमिन को कमांड यूज़ करने की अनुमति"""
-    @wraps(func)
-    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        user = update.effective_user
-        chat = update.effective_chat
+        expires_at, row = entry
+        if expires_at < time.monotonic():
+            del self._entries[chat_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(chat_id)
+        self.hits += 1
+        return row
 
-        if not chat or not user:
-            return
+    def generation(self, chat_id: int) -> int:
+        return self._epoch + self._generation.get(chat_id, 0)
 
-        member = await context.bot.get_chat_member(chat.id, user.id)
-        if member.status not in ("administrator", "creator"):
-            await update.effective_message.reply_text("⛔ यह कमांड सिर्फ एडमिन के लिए है।")
+    def put(self, chat_id: int, row: Dict[str, Any], generation: Optional[int] = None):
+        """DB से लोड की गई पंक्ति रखें; बीच में write हुआ हो तो छोड़ दें"""
+        if generation is not None and generation != self.generation(chat_id):
             return
-        return await func(update, context, *args, **kwargs)
-    return wrapper
-
-
-def owner_required(func):
-    """सिर्फ ग्रुप ओनर को अनुमति"""
-    @wraps(func)
-    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        user = update.effective_user
-        chat = update.effective_chat
-
-        if not chat or not user:
+        self._entries[chat_id] = (time.monotonic() + self.ttl, row)
+        self._entries.move_to_end(chat_id)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._generation.pop(evicted, None)
+            self.evictions += 1
+
+    def update(self, chat_id: int, setting: str, value):
+        """write-through: कैश में मौजूद पंक्ति की एक सेटिंग बदलें"""
+        self._generation[chat_id] = self._generation.get(chat_id, 0) + 1
+        entry = self._entries.get(chat_id)
+        if entry is not None:
+            entry[1][setting] = value
+
+    def invalidate(self, chat_id: int):
+        """एक चैट की पंक्ति कैश से हटाएं"""
+        self._generation[chat_id] = self._generation.get(chat_id, 0) + 1
+        self._entries.pop(chat_id, None)
+
+    def clear(self):
+        """पूरा कैश खाली करें; चल रहे लोड भी नतीजा न रखें"""
+        self._epoch += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class ChatFilters:
+    """एक चैट के फ़िल्टर और उनका compiled matcher"""
+
+    __slots__ = ("responses", "_matcher")
+
+    def __init__(self, responses: Dict[str, str]):
+        self.responses = responses  # trigger -> response
+        self._matcher: Optional[AhoCorasick] = None
+
+    def match(self, text: str) -> Optional[str]:
+        """text (lowercase) से मेल खाने वाले फ़िल्टर का जवाब"""
+        if not self.responses:
+            return None
+        if self._matcher is None:
+            # सिर्फ बदली हुई चैट का matcher अगली खोज पर दोबारा बनता है
+            self._matcher = AhoCorasick(self.responses)
+        trigger = self._matcher.find_first(text)
+        return self.responses[trigger] if trigger is not None else None
+
+    def set(self, trigger: str, response: str):
+        if trigger not in self.responses:
+            self._matcher = None
+        self.responses[trigger] = response
+
+    def remove(self, trigger: str):
+        if self.responses.pop(trigger, None) is not None:
+            self._matcher = None
+
+
+class FilterCache:
+    """chat_id -> ChatFilters का LRU कैश"""
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._chats: "OrderedDict[int, ChatFilters]" = OrderedDict()
+        self._generation: Dict[int, int] = {}  # लोड के दौरान हुए invalidation पहचानने के लिए
+        self._epoch = 0
+
+    def get(self, chat_id: int) -> Optional[ChatFilters]:
+        chat_filters = self._chats.get(chat_id)
+        if chat_filters is not None:
+            self._chats.move_to_end(chat_id)
+        return chat_filters
+
+    def generation(self, chat_id: int) -> int:
+        return self._epoch + self._generation.get(chat_id, 0)
+
+    def put(self, chat_id: int, chat_filters: ChatFilters, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation(chat_id):
             return
-
-        member = await context.bot.get_chat_member(chat.id, user.id)
-        if member.status != "creator":
-            await update.effective_message.reply_text("⛔ यह कमांड सिर्फ ग्रुप ओनर के लिए है।")
+        self._chats[chat_id] = chat_filters
+        self._chats.move_to_end(chat_id)
+        while len(self._chats) > self.max_size:
+            evicted, _ = self._chats.popitem(last=False)
+            self._generation.pop(evicted, None)
+
+    def invalidate(self, chat_id: int):
+        self._generation[chat_id] = self._generation.get(chat_id, 0) + 1
+        self._chats.pop(chat_id, None)
+
+    def clear(self):
+        self._epoch += 1
+        self._chats.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chats": len(self._chats),
+            "filters": sum(len(c.responses) for c in self._chats.values()),
+        }
+
+
+class LockCache:
+    """chat_id -> लॉक bitmask का LRU कैश (0 = कोई लॉक नहीं)"""
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._masks: "OrderedDict[int, int]" = OrderedDict()
+        self._generation: Dict[int, int] = {}  # लोड के दौरान हुए invalidation पहचानने के लिए
+        self._epoch = 0
+
+    def get(self, chat_id: int) -> Optional[int]:
+        mask = self._masks.get(chat_id)
+        if mask is not None:
+            self._masks.move_to_end(chat_id)
+        return mask
+
+    def generation(self, chat_id: int) -> int:
+        return self._epoch + self._generation.get(chat_id, 0)
+
+    def put(self, chat_id: int, mask: int, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation(chat_id):
             return
-        return await func(update, context, *args, **kwargs)
-    return wrapper
-
-
-def parse_time(time_str: str) -> Optional[datetime]:
-    """उदाहरण: 1h, 2d, 30m -> timedelta में कन्वर्ट"""
-    try:
-        num = int(time_str[:-1])
-        unit = time_str[-1].lower()
-        if unit == 'm':
-            return datetime.utcnow() + timedelta(minutes=num)
-        elif unit == 'h':
-            return datetime.utcnow() + timedelta(hours=num)
-        elif unit == 'd':
-            return datetime.utcnow() + timedelta(days=num)
-    except:
-        pass
-    return None
-
-
-def get_user_from_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Reply / argument से user निकालता है"""
-    message = update.effective_message
-
-    # अगर reply किया है
-    if message.reply_to_message:
-        return message.reply_to_message.from_user
-
-    # अगर username/id पास किया गया
-    args = context.args
-    if args:
-        user = args[0]
-        if user.isdigit():
-            return context.bot.get_chat(user)
-        if user.startswith("@"):
-            try:
-                return context.bot.get_chat(user)
-            except:
-                return None
-    return None
-
-
-def get_user_id(user_obj):
-    """उपयोगकर्ता आईडी प्राप्त करें"""
-    if user_obj is None:
-        return None
-    return getattr(user_obj, 'id', user_obj.get('id') if isinstance(user_obj, dict) else None)
-
-
-def get_user_name(user_obj):
-    """उपयोगकर्ता का नाम प्राप्त करें"""
-    if user_obj is None:
-        return "Unknown"
-    return getattr(user_obj, 'first_name', user_obj.get('first_name') if isinstance(user_obj, dict) else "Unknown") or "Unknown"
-
-
-async def log_action(context: ContextTypes.DEFAULT_TYPE, chat_id: int, action: str, details: str):
-    """लॉग चैनल में एक्शन भेजे"""
-    try:
-        log_channel = db.get_group_setting(chat_id, "log_channel")
-        if log_channel:
-            await context.bot.send_message(
-                log_channel,
-                f"✅ *{action}*\n{details}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-    except Exception as e:
-        logger.error(f"लॉग संदेश भेजने में विफल: {e}")
-
-
-user_last_command = {}
-
-def rate_limit(func, limit_seconds=3):
-    """एक यूज़र को बार-बार कमांड स्पैम करने से रोकें"""
-    @wraps(func)
-    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        user_id = update.effective_user.id
-        now = time.time()
-
-        if user_id in user_last_command and now - user_last_command[user_id] < limit_seconds:
-            await update.effective_message.reply_text("⏳ धीरे यार! थोड़ा इंतज़ार कर।")
+        self._masks[chat_id] = mask
+        self._masks.move_to_end(chat_id)
+        while len(self._masks) > self.max_size:
+            evicted, _ = self._masks.popitem(last=False)
+            self._generation.pop(evicted, None)
+
+    def update(self, chat_id: int, bit: int, locked: bool):
+        """कैश में मौजूद चैट का एक बिट सेट/साफ़ करें"""
+        mask = self._masks.get(chat_id)
+        if mask is not None:
+            self._masks[chat_id] = mask | bit if locked else mask & ~bit
+        else:
+            # चल रहा लोड write से पहले का मास्क न रख दे
+            self._generation[chat_id] = self._generation.get(chat_id, 0) + 1
+
+    def invalidate(self, chat_id: int):
+        self._generation[chat_id] = self._generation.get(chat_id, 0) + 1
+        self._masks.pop(chat_id, None)
+
+    def clear(self):
+        self._epoch += 1
+        self._masks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chats": len(self._masks),
+            "locked_chats": sum(1 for mask in self._masks.values() if mask),
+        }
+
+
+class FedBanIndex:
+    """fed_id -> प्रतिबंधित user_id का set: join पर fed-ban जाँच बिना DB क्वेरी
+
+    स्टार्टअप पर fed_bans एक ही क्वेरी में पूरा लोड होता है और /fban,
+    /unfban पर write-through से ताज़ा रहता है। लोड पूरा होने से पहले, या
+    दूसरे प्रोसेस से invalidation आए उपयोगकर्ता के लिए, contains() None
+    लौटाता है और जाँच उस उपयोगकर्ता की point query पर जाती है।
+    """
+
+    def __init__(self):
+        self._bans: Dict[str, set] = {}
+        # user_id -> invalidation का version; अगली जाँच DB से
+        self._stale: Dict[int, int] = {}
+        # सिर्फ बढ़ता है: refresh के बाद नया invalidation पुराना version दोबारा न पाए
+        self._version = 0
+        self._changes: Optional[List[tuple]] = None  # लोड के दौरान हुए बदलाव (fed_id, user_id, banned)
+        self._epoch = 0
+        self.loaded = False
+        # False हो तो इंडेक्स कभी लोड नहीं होता और हर जाँच point query से
+        self.enabled = True
+
+    def contains(self, fed_id: str, user_id: int) -> Optional[bool]:
+        """True/False, या None अगर इंडेक्स इस उपयोगकर्ता के लिए भरोसेमंद नहीं"""
+        if not self.loaded or user_id in self._stale:
+            return None
+        bans = self._bans.get(fed_id)
+        return bans is not None and user_id in bans
+
+    def generation(self, user_id: int) -> Tuple[int, int]:
+        return self._epoch, self._stale.get(user_id, 0)
+
+    def _mark_stale(self, user_id: int):
+        self._version += 1
+        self._stale[user_id] = self._version
+
+    def begin_load(self) -> int:
+        self._changes = []
+        return self._epoch
+
+    def finish_load(self, rows: List[Tuple[str, int]], epoch: int):
+        changes, self._changes = self._changes or [], None
+        if epoch != self._epoch:
+            return  # लोड के दौरान clear(): पंक्तियाँ शायद पुरानी हैं
+        bans: Dict[str, set] = {}
+        for fed_id, user_id in rows:
+            bans.setdefault(fed_id, set()).add(user_id)
+        # लोड की क्वेरी के बाद हुए write उसके नतीजे में शायद न हों
+        for fed_id, user_id, banned in changes:
+            if banned:
+                bans.setdefault(fed_id, set()).add(user_id)
+            elif fed_id in bans:
+                bans[fed_id].discard(user_id)
+        self._bans = bans
+        self.loaded = True
+
+    def abort_load(self):
+        self._changes = None
+
+    def update(self, fed_id: str, user_id: int, banned: bool):
+        """इस प्रोसेस का write (DB में लिखने के बाद)"""
+        if banned:
+            self._bans.setdefault(fed_id, set()).add(user_id)
+        elif fed_id in self._bans:
+            self._bans[fed_id].discard(user_id)
+        if self._changes is not None:
+            self._changes.append((fed_id, user_id, banned))
+        if user_id in self._stale:
+            # चल रही point query इस write से पहले का नतीजा न रख दे
+            self._mark_stale(user_id)
+
+    def refresh_user(self, user_id: int, fed_ids: List[str], generation: Tuple[int, int]):
+        """point query का नतीजा रखें, अगर बीच में फिर invalidation न हुआ हो"""
+        if not self.loaded or generation != self.generation(user_id):
             return
+        for fed_id, bans in self._bans.items():
+            if fed_id not in fed_ids:
+                bans.discard(user_id)
+        for fed_id in fed_ids:
+            self._bans.setdefault(fed_id, set()).add(user_id)
+        self._stale.pop(user_id, None)
+
+    def invalidate(self, user_id: int):
+        """दूसरे प्रोसेस ने इस उपयोगकर्ता का fed-ban बदला (invalidation का chat_id = user_id)"""
+        self._mark_stale(user_id)
+
+    def clear(self):
+        self._epoch += 1
+        self._bans = {}
+        self._stale.clear()
+        self.loaded = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "loaded": self.loaded,
+            "federations": len(self._bans),
+            "bans": sum(len(bans) for bans in self._bans.values()),
+            "stale": len(self._stale),
+        }
 
-        user_last_command[user_id] = now
-        return await func(update, context, *args, **kwargs)
-    return wrapper
-# --- कमांड हैंडलर्स ---
-
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """स्टार्ट कमांड हैंडलर"""
-    user = update.effective_user
-    chat = update.effective_chat
-    message = update.effective_message
-
-    if chat.type == 'private':
-        welcome_text = (
-            f"👋 **नमस्ते {user.first_name}!**\n\n"
-            "मैं **मिस रोज़** हूँ, आपका मैत्रीपूर्ण समूह प्रबंधन बॉट! 🌹\n\n"
-            "**मैं क्या कर सकती हूँ:**\n"
-            "• 🛡️ आपके समूह को स्पैम और अवांछित सामग्री से बचाना\n"
-            "• 👥 उपयोगकर्ताओं का प्रबंधन (प्रतिबंध, म्यूट, किक, चेतावनी)\n"
-            "• 📝 स्वागत संदेश और नियम सेट करना\n"
-            "• 🤖 ऑटो-मॉडरेशन और फिल्टर\n\n"
-            "**शुरू करना:**\n"
-            "1. मुझे अपने समूह में एक एडमिन के रूप में जोड़ें\n"
-            "2. सभी उपलब्ध कमांड देखने के लिए `/help` का उपयोग करें\n"
-            "3. अपने समूह की सेटिंग्स कॉन्फ़िगर करें"
-        )
-
-        keyboard = [
-            [InlineKeyboardButton("📚 सहायता और कमांड", callback_data="help_main")],
-            [InlineKeyboardButton("➕ समूह में जोड़ें", url=f"https://t.me/{context.bot.username}?startgroup=true")],
-            [InlineKeyboardButton("💬 समर्थन", callback_data="support")]
-        ]
 
-        await message.reply_text(
-            welcome_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=InlineKeyboardMarkup(keyboard)
+class Database:
+    """बॉट डेटा: स्टोरेज बैकएंड के ऊपर कैश की परत
+
+    हैंडलर सिर्फ इसी के मेथड बुलाते हैं; SQL बैकएंड (storage*.py) में रहता है।
+    """
+
+    def __init__(self, db_url: Optional[str]):
+        # कनेक्शन पहली क्वेरी पर ही खुलते हैं
+        self.storage = create_storage(
+            db_url,
+            minconn=DB_POOL_MIN,
+            maxconn=DB_POOL_MAX,
+            timeout=DB_POOL_TIMEOUT,
+            recycle_uses=DB_POOL_RECYCLE_USES,
+            healthcheck_idle=DB_POOL_HEALTHCHECK_IDLE,
+            executor_workers=DB_EXECUTOR_WORKERS,
+            sslmode="require",
         )
-    else:
-        await message.reply_text("👋 नमस्ते! मैं मिस रोज़ हूँ, इस समूह का प्रबंधन करने में मदद करने के लिए तैयार हूँ!")
-
-
-@rate_limit
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """वर्गीकृत कमांड के साथ हेल्प कमांड"""
-    message = update.effective_message
+        self.group_settings = GroupSettings(GROUP_SETTINGS_TTL, GROUP_SETTINGS_MAX)
+        self.filter_cache = FilterCache(FILTER_CACHE_MAX)
+        self.lock_cache = LockCache(LOCK_CACHE_MAX)
+        self.fed_ban_index = FedBanIndex()
+        self._fed_ban_load: Optional[asyncio.Task] = None
+        self._fed_ban_retry_at = 0.0
+        # दूसरे प्रोसेस के write पर कौन सा कैश खाली हो (kind -> कैश)
+        self.node_id = uuid.uuid4().hex[:12]
+        self._caches: Dict[str, Any] = {
+            "settings": self.group_settings,
+            "filters": self.filter_cache,
+            "locks": self.lock_cache,
+            "fedbans": self.fed_ban_index,
+        }
+        self.invalidations = {"published": 0, "received": 0, "resets": 0}
+
+    def register_cache(self, kind: str, cache):
+        """invalidate(chat_id) और clear() वाला कैश invalidation संदेशों से जोड़ें"""
+        self._caches[kind] = cache
+
+    async def publish_invalidation(self, kind: str, chat_id: int):
+        """दूसरे प्रोसेसों को बताएं कि इस चैट का `kind` कैश पुराना है"""
+        payload = json.dumps({"node": self.node_id, "kind": kind, "chat_id": chat_id})
+        if await self.storage.publish(payload):
+            self.invalidations["published"] += 1
+
+    def _on_invalidation(self, payload: str):
+        try:
+            message = json.loads(payload)
+            node, kind, chat_id = message["node"], message["kind"], int(message["chat_id"])
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"अमान्य invalidation संदेश: {payload!r}")
+            return
+        if node == self.node_id:
+            return  # अपना write, कैश पहले ही ताज़ा है
+        cache = self._caches.get(kind)
+        if cache is not None:
+            cache.invalidate(chat_id)
+            self.invalidations["received"] += 1
+
+    def _reset_caches(self):
+        # संदेश छूट गए हों तो कौन सी चैट पुरानी है पता नहीं; सब खाली करें
+        for cache in self._caches.values():
+            cache.clear()
+        self.invalidations["resets"] += 1
+
+    def subscribe_invalidations(self) -> bool:
+        """दूसरे प्रोसेसों के write सुनना शुरू करें (चल रहे event loop में)"""
+        return self.storage.subscribe(self._on_invalidation, self._reset_caches)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """स्टोरेज बैकएंड (PostgreSQL हो तो कनेक्शन पूल) के आँकड़े"""
+        return self.storage.stats()
 
-    keyboard = [
-        [
-            InlineKeyboardButton("👥 उपयोगकर्ता प्रबंधन", callback_data="help_users"),
-            InlineKeyboardButton("🛡️ एडमिन उपकरण", callback_data="help_admin")
-        ],
-        [
-            InlineKeyboardButton("📝 स्वागत और नियम", callback_data="help_welcome"),
-            InlineKeyboardButton("🔒 ताले और फिल्टर", callback_data="help_locks")
-        ],
-        [
-            InlineKeyboardButton("📊 लॉगिंग", callback_data="help_logging"),
-            InlineKeyboardButton("🌐 फेडरेशन", callback_data="help_federation")
-        ],
-        [
-            InlineKeyboardButton("⚙️ सेटिंग्स", callback_data="help_settings"),
-            InlineKeyboardButton("🔧 उपयोगिताएँ", callback_data="help_utils")
-        ]
-    ]
+    def init_db(self):
+        """स्टोरेज खोलता है और स्कीमा तैयार करता है"""
+        try:
+            self.storage.open()
+        except Exception as e:
+            logger.error(f"डेटाबेस प्रारंभ करने में त्रुटि: {e}")
 
-    await message.reply_text(
-        help_texts.get("main", "❓ सहायता उपलब्ध नहीं है"),
-        parse_mode=ParseMode.MARKDOWN,
-        reply_markup=InlineKeyboardMarkup(keyboard)
-    )
+    async def get_group_settings(self, chat_id: int) -> Dict[str, Any]:
+        """चैट की सभी सेटिंग्स; कैश में न हों तो एक ही क्वेरी में पूरी पंक्ति लोड"""
+        row = self.group_settings.get(chat_id)
+        if row is not None:
+            return row
 
-@rate_limit
-@admin_required
-async def ban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
+        generation = self.group_settings.generation(chat_id)
+        row = await self.storage.load_group(chat_id)
+        if row is None:
+            # क्वेरी त्रुटि: खाली डिफ़ॉल्ट लौटाएं पर कैश न करें
+            return dict.fromkeys(GROUP_COLUMNS)
 
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-    
-    reason = " ".join(context.args[1:]) if len(context.args) > 1 else "कोई कारण नहीं दिया गया"
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ प्रतिबंधित करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
+        # पंक्ति न हो तब भी कैश करें, ताकि अनजान ग्रुप बार-बार DB न छुएं
+        self.group_settings.put(chat_id, row, generation)
+        return row
 
-    try:
-        await context.bot.ban_chat_member(chat_id, user_id)
-        db.execute_query(
-            """
-            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, reason, admin_id)
-            VALUES (%s, %s, 'ban', %s, %s)
-            ON CONFLICT (chat_id, user_id, restriction_type)
-            DO UPDATE SET reason = EXCLUDED.reason
-            """,
-            (chat_id, user_id, reason, admin_user.id)
+    async def get_group_setting(self, chat_id: int, setting: str):
+        """विशिष्ट सेटिंग प्राप्त करें"""
+        if setting not in GROUP_COLUMNS:
+            raise ValueError(f"अज्ञात ग्रुप सेटिंग: {setting}")
+        row = await self.get_group_settings(chat_id)
+        return row.get(setting)
+
+    async def set_group_setting(self, chat_id: int, setting: str, value):
+        """विशिष्ट सेटिंग अपडेट/सेट करें (कैश में write-through)"""
+        if setting not in GROUP_COLUMNS:
+            raise ValueError(f"अज्ञात ग्रुप सेटिंग: {setting}")
+        if not await self.storage.save_group_setting(chat_id, setting, value):
+            # write विफल: पुराना मान कैश में न रहे
+            self.group_settings.invalidate(chat_id)
+        else:
+            self.group_settings.update(chat_id, setting, value)
+            await self.publish_invalidation("settings", chat_id)
+
+    async def get_chat_filters(self, chat_id: int) -> ChatFilters:
+        """चैट के फ़िल्टर; कैश में न हों तो DB से लोड करें"""
+        chat_filters = self.filter_cache.get(chat_id)
+        if chat_filters is not None:
+            return chat_filters
+
+        generation = self.filter_cache.generation(chat_id)
+        responses = await self.storage.load_filters(chat_id)
+        if responses is None:
+            return ChatFilters({})
+        # लोड के दौरान किसी ने कैश भर दिया हो तो वही रखें
+        chat_filters = self.filter_cache.get(chat_id)
+        if chat_filters is None:
+            chat_filters = ChatFilters(responses)
+            self.filter_cache.put(chat_id, chat_filters, generation)
+        return chat_filters
+
+    async def add_filter(self, chat_id: int, trigger: str, response: str, created_by: int) -> bool:
+        """फ़िल्टर जोड़ें/अपडेट करें और कैश में बदलाव करें"""
+        if not await self.storage.save_filter(chat_id, trigger, response, created_by):
+            self.filter_cache.invalidate(chat_id)
+            return False
+        chat_filters = self.filter_cache.get(chat_id)
+        if chat_filters is not None:
+            chat_filters.set(trigger, response)
+        else:
+            # चल रहा लोड write से पहले के फ़िल्टर न रख दे
+            self.filter_cache.invalidate(chat_id)
+        await self.publish_invalidation("filters", chat_id)
+        return True
+
+    async def remove_filter(self, chat_id: int, trigger: str) -> bool:
+        """फ़िल्टर हटाएं और कैश में बदलाव करें"""
+        if not await self.storage.delete_filter(chat_id, trigger):
+            self.filter_cache.invalidate(chat_id)
+            return False
+        chat_filters = self.filter_cache.get(chat_id)
+        if chat_filters is not None:
+            chat_filters.remove(trigger)
+        else:
+            # चल रहा लोड write से पहले के फ़िल्टर न रख दे
+            self.filter_cache.invalidate(chat_id)
+        await self.publish_invalidation("filters", chat_id)
+        return True
+
+    async def get_lock_mask(self, chat_id: int) -> int:
+        """चैट के सक्रिय लॉक का bitmask; कैश में न हो तो DB से लोड करें"""
+        mask = self.lock_cache.get(chat_id)
+        if mask is not None:
+            return mask
+
+        generation = self.lock_cache.generation(chat_id)
+        lock_types = await self.storage.load_locks(chat_id)
+        if lock_types is None:
+            return 0
+        mask = 0
+        for lock_type in lock_types:
+            mask |= LOCK_BITS.get(lock_type, 0)
+        self.lock_cache.put(chat_id, mask, generation)
+        return mask
+
+    async def set_lock(self, chat_id: int, lock_type: str, locked: bool) -> bool:
+        """लॉक लगाएं/हटाएं और कैश का बिट बदलें"""
+        if not await self.storage.save_lock(chat_id, lock_type, locked):
+            self.lock_cache.invalidate(chat_id)
+            return False
+        self.lock_cache.update(chat_id, LOCK_BITS.get(lock_type, 0), locked)
+        await self.publish_invalidation("locks", chat_id)
+        return True
+
+    async def add_warning(self, chat_id: int, user_id: int, reason: str, warned_by: int) -> Optional[int]:
+        """चेतावनी जोड़ें और नई गिनती लौटाएं (एक ही round-trip); त्रुटि पर None"""
+        return await self.storage.add_warning(chat_id, user_id, reason, warned_by)
+
+    async def clear_warnings(self, chat_id: int, user_id: int) -> bool:
+        """उपयोगकर्ता की सभी चेतावनियाँ और उनकी गिनती हटाएं"""
+        return await self.storage.clear_warnings(chat_id, user_id)
+
+    async def get_warn_count(self, chat_id: int, user_id: int) -> int:
+        """warn_counts से चेतावनी गिनती (warnings स्कैन किए बिना)"""
+        return await self.storage.get_warn_count(chat_id, user_id)
+
+    async def get_warnings(self, chat_id: int, user_id: int) -> Tuple[int, List[str]]:
+        """(गिनती, कारण) — गिनती शून्य हो तो warnings टेबल नहीं छुई जाती"""
+        return await self.storage.get_warnings(chat_id, user_id)
+
+    async def add_restriction(self, chat_id: int, user_id: int, restriction_type: str,
+                              expires_at: Optional[datetime], reason: str, admin_id: int,
+                              replaces: Tuple[str, ...] = ()) -> bool:
+        """प्रतिबंध दर्ज करें; `replaces` वाले पुराने प्रकार उसी बदलाव में हटते हैं"""
+        return await self.storage.add_restriction(
+            chat_id, user_id, restriction_type, expires_at, reason, admin_id, replaces
         )
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"🔨 **उपयोगकर्ता प्रतिबंधित**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
-                f"**कारण:** {reason}\n"
-                f"**एडमिन:** {admin_user.first_name}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता प्रतिबंध", f"{user_id} प्रतिबंधित by {admin_user.id}: {reason}")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को प्रतिबंधित करने में विफल: {e}")
-
-@rate_limit
-@admin_required
-async def tban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    if len(context.args) < 1:
-        return await update.message.reply_text("❌ उपयोग: `/tban <user> <time> [reason]`")
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    time_str = context.args[1] if update.message.reply_to_message and len(context.args) > 1 else context.args[0]
-    ban_until = parse_time(time_str)
-    if not ban_until:
-        return await update.message.reply_text("❌ अमान्य समय प्रारूप। उपयोग करें: 4m, 3h, 6d, 5w")
-
-    reason_start_index = 2 if update.message.reply_to_message and len(context.args) > 1 else 1
-    reason = " ".join(context.args[reason_start_index:]) or "कोई कारण नहीं दिया गया"
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ प्रतिबंधित करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        await context.bot.ban_chat_member(chat_id, user_id, until_date=ban_until)
-
-        db.execute_query(
-            """
-            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, expires_at, reason, admin_id)
-            VALUES (%s, %s, 'tban', %s, %s, %s)
-            ON CONFLICT (chat_id, user_id, restriction_type)
-            DO UPDATE SET expires_at = EXCLUDED.expires_at, reason = EXCLUDED.reason
-            """,
-            (chat_id, user_id, ban_until, reason, admin_user.id)
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"⏰ **उपयोगकर्ता अस्थायी रूप से प्रतिबंधित**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
-                f"**अवधि:** {time_str}\n"
-                f"**कारण:** {reason}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "अस्थायी प्रतिबंध", f"{user_id} tban by {admin_user.id} for {time_str}: {reason}")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ अस्थायी रूप से प्रतिबंधित करने में विफल: {e}")
-
-@rate_limit
-@admin_required
-async def mute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    reason = " ".join(context.args[1:]) if len(context.args) > 1 else "कोई कारण नहीं दिया गया"
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ म्यूट करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    permissions = ChatPermissions(can_send_messages=False)
-
-    try:
-        await context.bot.restrict_chat_member(chat_id, user_id, permissions=permissions)
-
-        db.execute_query(
-            """
-            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, reason, admin_id)
-            VALUES (%s, %s, 'mute', %s, %s)
-            ON CONFLICT (chat_id, user_id, restriction_type)
-            DO UPDATE SET reason = EXCLUDED.reason
-            """,
-            (chat_id, user_id, reason, admin_user.id)
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"🔇 **उपयोगकर्ता म्यूट**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
-                f"**कारण:** {reason}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता म्यूट", f"{user_id} muted by {admin_user.id}: {reason}")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को म्यूट करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def tmute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    if len(context.args) < 1:
-        return await update.message.reply_text("❌ उपयोग: `/tmute <user> <time> [reason]`")
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    time_str = context.args[1] if update.message.reply_to_message and len(context.args) > 1 else context.args[0]
-    mute_until = parse_time(time_str)
-    if not mute_until:
-        return await update.message.reply_text("❌ अमान्य समय प्रारूप। उपयोग करें: 4m, 3h, 6d, 5w")
-
-    reason_start_index = 2 if update.message.reply_to_message and len(context.args) > 1 else 1
-    reason = " ".join(context.args[reason_start_index:]) or "कोई कारण नहीं दिया गया"
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ म्यूट करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    permissions = ChatPermissions(can_send_messages=False)
-
-    try:
-        await context.bot.restrict_chat_member(chat_id, user_id, permissions, until_date=mute_until)
-
-        db.execute_query(
-            "INSERT INTO group_restrictions (chat_id, user_id, restriction_type, expires_at, reason, admin_id) "
-            "VALUES (%s, %s, 'tmute', %s, %s, %s) "
-            "ON CONFLICT (chat_id, user_id, restriction_type) "
-            "DO UPDATE SET expires_at = EXCLUDED.expires_at, reason = EXCLUDED.reason",
-            (chat_id, user_id, mute_until, reason, admin_user.id)
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"⏰ **उपयोगकर्ता अस्थायी रूप से म्यूट**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
-                f"**अवधि:** {time_str}\n"
-                f"**कारण:** {reason}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "अस्थायी म्यूट", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा {time_str} के लिए म्यूट किया गया: {reason}")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ अस्थायी रूप से म्यूट करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def kick_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ किक करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        # Kick = ban + unban
-        await context.bot.ban_chat_member(chat_id, user_id)
-        await context.bot.unban_chat_member(chat_id, user_id)
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"👢 **उपयोगकर्ता किक किया गया**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता किक", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा किक किया गया")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को किक करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def unban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ अनबैन करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        await context.bot.unban_chat_member(chat_id, user_id)
-
-        # DB से ban और tban एंट्री हटाओ
-        db.execute_query(
-            "DELETE FROM group_restrictions WHERE chat_id = %s AND user_id = %s AND restriction_type IN ('ban', 'tban')",
-            (chat_id, user_id)
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"✅ **उपयोगकर्ता अनबैन**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता अनबैन", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा अनबैन किया गया")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को अनबैन करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def unmute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ अनम्यूट करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    permissions = ChatPermissions(can_send_messages=True)
-
-    try:
-        await context.bot.restrict_chat_member(chat_id, user_id, permissions)
-
-        # DB से mute और tmute एंट्री हटाओ
-        db.execute_query(
-            "DELETE FROM group_restrictions WHERE chat_id = %s AND user_id = %s AND restriction_type IN ('mute', 'tmute')",
-            (chat_id, user_id)
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"🔊 **उपयोगकर्ता अनम्यूट**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता अनम्यूट", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा अनम्यूट किया गया")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को अनम्यूट करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def promote_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ प्रमोट करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        await context.bot.promote_chat_member(
-            chat_id,
-            user_id,
-            can_delete_messages=True,
-            can_restrict_members=True,
-            can_pin_messages=True
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"⬆️ **उपयोगकर्ता प्रमोट किया गया**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता प्रमोशन", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा प्रमोट किया गया")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को प्रमोट करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def demote_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    admin_user = update.effective_user
-
-    target_user = get_user_from_message(update, context)
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    user_id = get_user_id(target_user)
-    if not user_id:
-        return await update.message.reply_text("❌ डिमोट करने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        await context.bot.promote_chat_member(
-            chat_id,
-            user_id,
-            can_change_info=False,
-            can_delete_messages=False,
-            can_invite_users=False,
-            can_restrict_members=False,
-            can_pin_messages=False,
-            can_promote_members=False
-        )
-
-        if not db.get_group_setting(chat_id, 'silent_actions'):
-            await update.message.reply_text(
-                f"⬇️ **उपयोगकर्ता डिमोट किया गया**\n\n"
-                f"**उपयोगकर्ता:** {get_user_name(target_user)}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        await log_action(context, chat_id, "उपयोगकर्ता डिमोशन", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा डिमोट किया गया")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को डिमोट करने में विफल: {e}")
-
-@rate_limit
-async def list_admins(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    try:
-        admins = await context.bot.get_chat_administrators(chat_id)
-
-        admin_list = "👥 **समूह प्रशासक:**\n\n"
-        lines = []
-        for admin in admins:
-            username = f"@{admin.user.username}" if admin.user.username else ""
-            name = admin.user.first_name
-
-            if admin.status == "creator":
-                lines.append(f"👑 **{name}** {username} - *मालिक*")
-            else:
-                lines.append(f"⭐ **{name}** {username} - *एडमिन*")
-
-        admin_list += "\n".join(lines)
-
-        await update.message.reply_text(admin_list, parse_mode=ParseMode.MARKDOWN)
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ एडमिन सूची प्राप्त करने में विफल: {e}")
-
-@admin_required
-@rate_limit
-async def set_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        return await update.message.reply_text(
-            "❌ उपयोग: `/setwelcome <message>`\n\n"
-            "वेरिएबल्स: `{first}`, `{fullname}`, `{username}`, `{mention}`, `{id}`, `{chatname}`"
-        )
-
-    welcome_message = " ".join(context.args)
-    db.set_group_setting(update.effective_chat.id, 'welcome_message', welcome_message)
-
-    await update.message.reply_text(
-        f"✅ **स्वागत संदेश सेट!**\n\n**पूर्वावलोकन:** {welcome_message}",
-        parse_mode=ParseMode.MARKDOWN
-    )
-
-@admin_required
-@rate_limit
-async def set_goodbye(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        return await update.message.reply_text("❌ उपयोग: `/setgoodbye <message>`")
-
-    goodbye_message = " ".join(context.args)
-    db.set_group_setting(update.effective_chat.id, 'goodbye_message', goodbye_message)
-
-    await update.message.reply_text(
-        f"✅ **अलविदा संदेश सेट!**\n\n**पूर्वावलोकन:** {goodbye_message}",
-        parse_mode=ParseMode.MARKDOWN
-    )
-
-@admin_required
-@rate_limit
-async def set_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        return await update.message.reply_text("❌ उपयोग: `/setrules <rules text>`")
-
-    rules = " ".join(context.args)
-    db.set_group_setting(update.effective_chat.id, 'rules', rules)
-
-    await update.message.reply_text("✅ **समूह के नियम सेट!** `/rules` का उपयोग करके उन्हें प्रदर्शित करें।")
-
-@rate_limit
-async def show_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    rules = db.get_group_setting(chat_id, 'rules')
-
-    if not rules:
-        return await update.message.reply_text("❌ इस समूह के लिए कोई नियम सेट नहीं किए गए हैं।")
-
-    private_rules = db.get_group_setting(chat_id, 'private_rules')
-    is_private_chat = update.effective_chat.type == 'private'
-
-    if private_rules and not is_private_chat:
-        try:
-            await context.bot.send_message(
-                update.effective_user.id,
-                f"📋 **{update.effective_chat.title} के लिए नियम:**\n\n{rules}",
-                parse_mode=ParseMode.MARKDOWN
-            )
-            await update.message.reply_text("📋 नियम आपके निजी संदेशों में भेज दिए गए हैं!")
-        except Exception:
-            await update.message.reply_text(
-                "❌ मैं आपको निजी तौर पर नियम नहीं भेज सका। कृपया पहले मेरे साथ बातचीत शुरू करें।"
-            )
-    else:
-        await update.message.reply_text(
-            f"📋 **समूह के नियम:**\n\n{rules}",
-            parse_mode=ParseMode.MARKDOWN
-        )
-
-
-@admin_required
-@rate_limit
-async def private_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args or context.args[0].lower() not in ["on", "off"]:
-        return await update.message.reply_text("❌ उपयोग: `/privaterules <on/off>`")
-
-    setting = context.args[0].lower() == "on"
-    db.set_group_setting(update.effective_chat.id, "private_rules", setting)
-
-    await update.message.reply_text(f"✅ निजी नियम {'सक्षम' if setting else 'अक्षम'}!")
-
-@admin_required
-@rate_limit
-async def lock_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-
-    if not context.args:
-        return await update.message.reply_text(
-            "❌ उपयोग: `/lock <type>`\n\n"
-            "**उपलब्ध प्रकार:** `all, msg, media, sticker, gif, url, bots, forward, game, location, rtl, button, egame, inline`"
-        )
-
-    lock_type = context.args[0].lower()
-    valid_types = [
-        'all', 'msg', 'media', 'sticker', 'gif', 'url', 'bots',
-        'forward', 'game', 'location', 'rtl', 'button', 'egame', 'inline'
-    ]
-
-    if lock_type not in valid_types:
-        return await update.message.reply_text("❌ अमान्य लॉक प्रकार!")
-
-    db.execute_query(
-        """
-        INSERT INTO locks (chat_id, lock_type, is_locked)
-        VALUES (%s, %s, TRUE)
-        ON CONFLICT (chat_id, lock_type)
-        DO UPDATE SET is_locked = TRUE
-        """,
-        (chat_id, lock_type)
-    )
-
-    await update.message.reply_text(f"🔒 **{lock_type.title()} बंद कर दिया गया!**")
-
-@admin_required
-@rate_limit
-async def unlock_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-
-    if not context.args:
-        return await update.message.reply_text("❌ उपयोग: `/unlock <type>`")
-
-    lock_type = context.args[0].lower()
-
-    result = db.execute_query(
-        "DELETE FROM locks WHERE chat_id = %s AND lock_type = %s",
-        (chat_id, lock_type)
-    )
-
-    await update.message.reply_text(f"🔓 **{lock_type.title()} खोल दिया गया!**")
-
-@rate_limit
-async def show_locks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-
-    locks = db.execute_query(
-        "SELECT lock_type FROM locks WHERE chat_id = %s AND is_locked = TRUE",
-        (chat_id,),
-        fetch='all'
-    )
-
-    if not locks:
-        return await update.message.reply_text("🔓 वर्तमान में कोई सामग्री बंद नहीं है।")
-
-    lock_list = "🔒 **बंद की गई सामग्री:**\n\n" + "\n".join(
-        [f"• {lock[0].title()}" for lock in locks]
-    )
-
-    await update.message.reply_text(lock_list, parse_mode=ParseMode.MARKDOWN)
-
-# --- फिल्टर कमांड ---
-@admin_required
-@rate_limit
-async def add_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id, admin_id = update.effective_chat.id, update.effective_user.id
-    
-    # चेक करें कि कम से कम दो आर्गुमेंट्स हैं
-    if len(context.args) < 2:
-        return await update.message.reply_text("❌ उपयोग: `/filter <trigger> <response>`")
-    
-    trigger = context.args[0].lower()
-    response = " ".join(context.args[1:])
-    
-    # DB में फ़िल्टर जोड़ें या अपडेट करें
-    db.execute_query(
-        """
-        INSERT INTO filters (chat_id, trigger_word, response, created_by)
-        VALUES (%s, %s, %s, %s)
-        ON CONFLICT (chat_id, trigger_word)
-        DO UPDATE SET response = EXCLUDED.response
-        """,
-        (chat_id, trigger, response, admin_id)
-    )
-    
-    await update.message.reply_text(f"✅ **'{trigger}' के लिए फ़िल्टर जोड़ा गया**")
-
-
-@admin_required
-@rate_limit
-async def remove_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        return await update.message.reply_text("❌ उपयोग: `/stop <trigger>`")
-    
-    trigger = context.args[0].lower()
-    
-    # DB से फ़िल्टर हटाएं
-    db.execute_query(
-        "DELETE FROM filters WHERE chat_id = %s AND trigger_word = %s",
-        (update.effective_chat.id, trigger)
-    )
-    
-    await update.message.reply_text(f"✅ **फ़िल्टर '{trigger}' हटा दिया गया**")
-
-
-@rate_limit
-async def list_filters(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    
-    # DB से फ़िल्टर लाएं
-    filters_list = db.execute_query(
-        "SELECT trigger_word FROM filters WHERE chat_id = %s",
-        (chat_id,),
-        fetch='all'
-    )
-    
-    if not filters_list:
-        return await update.message.reply_text("❌ इस समूह के लिए कोई फ़िल्टर सेट नहीं हैं।")
-    
-    filter_text = "🎯 **सक्रिय फिल्टर:**\n\n" + "\n".join([f"• {f[0]}" for f in filters_list])
-    
-    await update.message.reply_text(filter_text, parse_mode=ParseMode.MARKDOWN)
-
-# --- चेतावनी प्रणाली ---
-@admin_required
-@rate_limit
-async def warn_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id, admin_user = update.effective_chat.id, update.effective_user
-    target_user = get_user_from_message(update, context)
-    
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    reason = " ".join(context.args[1:]) if len(context.args) > 1 else "कोई कारण नहीं दिया गया"
-    user_id = get_user_id(target_user)
-    
-    if not user_id:
-        return await update.message.reply_text("❌ चेतावनी देने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        # DB में चेतावनी जोड़ें
-        db.execute_query(
-            "INSERT INTO warnings (chat_id, user_id, reason, warned_by) VALUES (%s, %s, %s, %s)",
-            (chat_id, user_id, reason, admin_user.id)
-        )
-
-        # कुल चेतावनियाँ गिनें
-        warns = db.execute_query(
-            "SELECT COUNT(*) FROM warnings WHERE chat_id = %s AND user_id = %s",
-            (chat_id, user_id),
-            fetch='one'
-        )
-        warn_count = warns[0] if warns else 0
-
-        # उपयोगकर्ता को संदेश भेजें
-        await update.message.reply_text(
-            f"⚠️ **उपयोगकर्ता को चेतावनी दी गई** ({warn_count}/3)\n\n"
-            f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
-            f"**कारण:** {reason}",
-            parse_mode=ParseMode.MARKDOWN
-        )
-
-        # 3 चेतावनियों पर स्वतः प्रतिबंधित
-        if warn_count >= 3:
-            await context.bot.ban_chat_member(chat_id, user_id)
-            await update.message.reply_text(
-                "🔨 **3 चेतावनियों तक पहुंचने पर उपयोगकर्ता स्वतः प्रतिबंधित हो गया!**"
-            )
-
-        await log_action(
-            context, chat_id, "उपयोगकर्ता चेतावनी",
-            f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा चेतावनी दी गई: {reason} (चेतावनी {warn_count}/3)"
-        )
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता को चेतावनी देने में विफल: {e}")
-
-
-@admin_required
-@rate_limit
-async def remove_warn(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id, admin_user = update.effective_chat.id, update.effective_user
-    target_user = get_user_from_message(update, context)
-    
-    if not target_user:
-        return await update.message.reply_text("❌ कृपया किसी उपयोगकर्ता को उत्तर दें या उपयोगकर्ता नाम/आईडी प्रदान करें।")
-
-    user_id = get_user_id(target_user)
-    
-    if not user_id:
-        return await update.message.reply_text("❌ चेतावनी हटाने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        # DB से सभी चेतावनियाँ हटाएं
-        db.execute_query(
-            "DELETE FROM warnings WHERE chat_id = %s AND user_id = %s",
-            (chat_id, user_id)
-        )
-
-        await update.message.reply_text(
-            f"✅ **उपयोगकर्ता से सभी चेतावनियाँ हटा दी गईं**\n\n"
-            f"**उपयोगकर्ता:** {get_user_name(target_user)}",
-            parse_mode=ParseMode.MARKDOWN
-        )
-
-        await log_action(
-            context, chat_id, "चेतावनियाँ साफ़ की गईं",
-            f"उपयोगकर्ता {user_id} के लिए सभी चेतावनियाँ {admin_user.id} द्वारा साफ़ की गईं"
-        )
-    except Exception as e:
-        await update.message.reply_text(f"❌ चेतावनियाँ हटाने में विफल: {e}")
-
-
-@rate_limit
-async def check_warns(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    target_user = get_user_from_message(update, context) or update.effective_user
-    user_id = get_user_id(target_user)
-    
-    if not user_id:
-        return await update.message.reply_text("❌ उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    # DB से चेतावनियाँ लाएं
-    warnings = db.execute_query(
-        "SELECT reason FROM warnings WHERE chat_id = %s AND user_id = %s",
-        (update.effective_chat.id, user_id),
-        fetch='all'
-    )
-
-    if not warnings:
-        return await update.message.reply_text("✅ इस उपयोगकर्ता के लिए कोई चेतावनी नहीं मिली।")
-
-    warn_text = (
-        f"⚠️ **{get_user_name(target_user)} के लिए चेतावनियाँ** ({len(warnings)}/3)\n\n" +
-        "\n".join([f"**{i+1}.** {reason[0]}" for i, reason in enumerate(warnings)])
-    )
-
-    await update.message.reply_text(warn_text, parse_mode=ParseMode.MARKDOWN)
-
-# --- सेटिंग्स कमांड ---
-@admin_required
-@rate_limit
-async def clean_service(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args or context.args[0].lower() not in ['on', 'off']:
-        return await update.message.reply_text("❌ उपयोग: `/cleanservice <on/off>`")
-    
-    setting = context.args[0].lower() == 'on'
-    db.set_group_setting(update.effective_chat.id, 'clean_service', setting)
-    
-    await update.message.reply_text(
-        f"✅ सेवा संदेश सफाई {'सक्षम' if setting else 'अक्षम'}!"
-    )
-
-
-@admin_required
-@rate_limit
-async def silent_actions(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args or context.args[0].lower() not in ['on', 'off']:
-        return await update.message.reply_text("❌ उपयोग: `/silent <on/off>`")
-    
-    setting = context.args[0].lower() == 'on'
-    db.set_group_setting(update.effective_chat.id, 'silent_actions', setting)
-    
-    await update.message.reply_text(
-        f"✅ मूक क्रियाएँ {'सक्षम' if setting else 'अक्षम'}!"
-    )
-
-
-@admin_required
-@rate_limit
-async def clean_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args or context.args[0].lower() not in ['on', 'off']:
-        return await update.message.reply_text("❌ उपयोग: `/cleanwelcome <on/off>`")
-    
-    setting = context.args[0].lower() == 'on'
-    db.set_group_setting(update.effective_chat.id, 'clean_welcome', setting)
-    
-    await update.message.reply_text(
-        f"✅ स्वागत संदेश की सफाई {'सक्षम' if setting else 'अक्षम'}!"
-    )
-
-# --- उपयोगिता कमांड ---
-@rate_limit
-async def user_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    target_user_obj = get_user_from_message(update, context) or update.effective_user
-    user_id = get_user_id(target_user_obj)
-    
-    if not user_id:
-        return await update.message.reply_text("❌ उपयोगकर्ता की पहचान नहीं हो सकी।")
-
-    try:
-        chat_user = await context.bot.get_chat(user_id)
-        info_text = (
-            f"👤 **उपयोगकर्ता जानकारी**\n\n"
-            f"**ID:** `{chat_user.id}`\n"
-            f"**पहला नाम:** {chat_user.first_name}\n"
-        )
-        
-        if chat_user.last_name:
-            info_text += f"**अंतिम नाम:** {chat_user.last_name}\n"
-        if chat_user.username:
-            info_text += f"**उपयोगकर्ता नाम:** @{chat_user.username}\n"
-
-        if update.effective_chat.type != 'private':
-            member = await context.bot.get_chat_member(update.effective_chat.id, user_id)
-            info_text += f"**स्थिति:** {member.status.title()}\n"
-            warns = db.execute_query(
-                "SELECT COUNT(*) FROM warnings WHERE chat_id = %s AND user_id = %s",
-                (update.effective_chat.id, user_id),
-                fetch='one'
-            )
-            info_text += f"**चेतावनी:** {warns[0] if warns else 0}/3\n"
-
-        await update.message.reply_text(info_text, parse_mode=ParseMode.MARKDOWN)
-    except Exception as e:
-        await update.message.reply_text(f"❌ उपयोगकर्ता जानकारी प्राप्त करने में विफल: {e}")
-
-
-@rate_limit
-async def report_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message.reply_to_message:
-        return await update.message.reply_text("❌ रिपोर्ट करने के लिए कृपया किसी संदेश का उत्तर दें।")
-    
-    reporter = update.effective_user
-    reported_msg = update.message.reply_to_message
-    chat_id_str = str(update.effective_chat.id).replace('-100', '')
-    
-    report_text = (
-        f"🚨 **संदेश रिपोर्ट किया गया**\n\n"
-        f"**रिपोर्टर:** {reporter.first_name} (@{reporter.username})\n"
-        f"**रिपोर्ट किया गया उपयोगकर्ता:** {reported_msg.from_user.first_name}\n"
-        f"**संदेश लिंक:** [संदेश पर जाएं](https://t.me/c/{chat_id_str}/{reported_msg.message_id})"
-    )
-    
-    try:
-        admins = await context.bot.get_chat_administrators(update.effective_chat.id)
-        for admin in admins:
-            if not admin.user.is_bot:
-                try:
-                    await context.bot.send_message(admin.user.id, report_text, parse_mode=ParseMode.MARKDOWN)
-                except:
-                    pass
-        await update.message.reply_text("✅ **रिपोर्ट एडमिन्स को भेज दी गई है!**")
-    except Exception as e:
-        await update.message.reply_text(f"❌ रिपोर्ट भेजने में विफल: {e}")
-
-
-@rate_limit
-async def kickme(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_chat.type == 'private':
-        return await update.message.reply_text("❌ यह कमांड केवल समूहों में काम करता है।")
-    
-    try:
-        await context.bot.ban_chat_member(update.effective_chat.id, update.effective_user.id)
-        await context.bot.unban_chat_member(update.effective_chat.id, update.effective_user.id)
-        await update.message.reply_text("👋 अलविदा! आपको समूह से हटा दिया गया है।")
-    except Exception as e:
-        await update.message.reply_text(f"❌ आपको हटाने में विफल: {e}")
-
-
-@rate_limit
-async def get_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    id_text = (
-        f"🆔 **आईडी जानकारी**\n\n"
-        f"**आपकी आईडी:** `{update.effective_user.id}`\n"
-    )
-    
-    if update.effective_chat.type != 'private':
-        id_text += f"**चैट आईडी:** `{update.effective_chat.id}`\n"
-    if update.message.reply_to_message:
-        id_text += f"**उत्तर दिए गए उपयोगकर्ता की आईडी:** `{update.message.reply_to_message.from_user.id}`\n"
-    
-    await update.message.reply_text(id_text, parse_mode=ParseMode.MARKDOWN)
-
-# --- हैंडलर फंक्शंस ---
-async def handle_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = update.effective_chat.id
-    welcome_message = db.get_group_setting(chat_id, 'welcome_message')
-    if not welcome_message:
-        return
-
-    for member in update.message.new_chat_members:
-        if member.is_bot:
-            continue
-        
-        formatted_message = welcome_message.format(
-            first=member.first_name,
-            last=member.last_name or "",
-            fullname=f"{member.first_name} {member.last_name or ''}".strip(),
-            username=f"@{member.username}" if member.username else member.first_name,
-            mention=f"[{member.first_name}](tg://user?id={member.id})",
-            id=member.id,
-            chatname=update.effective_chat.title
-        )
-
-        welcome_msg = await update.message.reply_text(formatted_message, parse_mode=ParseMode.MARKDOWN)
-        
-        if db.get_group_setting(chat_id, 'clean_welcome'):
-            context.job_queue.run_once(
-                lambda ctx: ctx.bot.delete_message(chat_id, welcome_msg.message_id), 60
-            )
-
-
-async def handle_filters(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message or not update.message.text:
-        return
-    
-    chat_id = update.effective_chat.id
-    message_text = update.message.text.lower()
-    
-    all_filters = db.execute_query(
-        "SELECT trigger_word, response FROM filters WHERE chat_id = %s",
-        (chat_id,), fetch='all'
-    )
-
-    if all_filters:
-        for trigger, response in all_filters:
-            if trigger in message_text:
-                await update.message.reply_text(response)
-                break
-
-
-async def handle_locks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message:
-        return
-    
-    chat_id, user_id = update.effective_chat.id, update.effective_user.id
-    
-    try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        if member.status in ['administrator', 'creator']:
-            return
-    except Exception:
-        return
-    
-    locks = db.execute_query(
-        "SELECT lock_type FROM locks WHERE chat_id = %s AND is_locked = TRUE",
-        (chat_id,), fetch='all'
-    )
-    if not locks:
-        return
-    
-    locked_types = [lock[0] for lock in locks]
-    message = update.message
-    delete, reason = False, ""
-    
-    if 'all' in locked_types:
-        delete, reason = True, "सभी सामग्री"
-    elif 'media' in locked_types and (message.photo or message.video or message.audio or message.document):
-        delete, reason = True, "मीडिया"
-    elif 'sticker' in locked_types and message.sticker:
-        delete, reason = True, "स्टिकर"
-    elif 'gif' in locked_types and message.animation:
-        delete, reason = True, "GIFs"
-    elif 'url' in locked_types and any(x in (message.text or "") for x in ['http', 'www.', '.com', '.net', '.org']):
-        delete, reason = True, "URLs"
-    elif 'forward' in locked_types and message.forward_date:
-        delete, reason = True, "फॉरवर्ड किए गए संदेश"
-
-    if delete:
-        try:
-            await message.delete()
-            if not db.get_group_setting(chat_id, 'silent_actions'):
-                warn_msg = await context.bot.send_message(chat_id, f"🔒 {reason} इस समूह में बंद है!")
-                context.job_queue.run_once(
-                    lambda ctx: ctx.bot.delete_message(chat_id, warn_msg.message_id), 5
-                )
-        except Exception:
-            pass
-
-# --- एरर हैंडलर ---
-async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
-    logger.error(f"एक अपडेट को संभालते समय अपवाद: {context.error}")
-    if isinstance(update, Update) and update.effective_message:
-        try:
-            await update.effective_message.reply_text("❌ आपके अनुरोध को संसाधित करते समय एक त्रुटि हुई।")
-        except:
-            pass
-async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """इनलाइन कीबोर्ड कॉलबैक को संभालें"""
-    query = update.callback_query
-    await query.answer()
-    data = query.data
-
-    # --- हेल्प कॉलबैक हैंडलिंग ---
-    if data.startswith("help_"):
-        category = data.split("_")[1]
-
-        if category == "main":
-            keyboard = [
-                [InlineKeyboardButton("👥 उपयोगकर्ता प्रबंधन", callback_data="help_users"),
-                 InlineKeyboardButton("🛡️ एडमिन उपकरण", callback_data="help_admin")],
-                [InlineKeyboardButton("📝 स्वागत और नियम", callback_data="help_welcome"),
-                 InlineKeyboardButton("🔒 ताले और फिल्टर", callback_data="help_locks")],
-                [InlineKeyboardButton("📊 लॉगिंग", callback_data="help_logging"),
-                 InlineKeyboardButton("🌐 फेडरेशन", callback_data="help_federation")],
-                [InlineKeyboardButton("⚙️ सेटिंग्स", callback_data="help_settings"),
-                 InlineKeyboardButton("🔧 उपयोगिताएँ", callback_data="help_utils")]
-            ]
-        else:
-            keyboard = [[InlineKeyboardButton("🔙 श्रेणियों पर वापस जाएँ", callback_data="help_main")]]
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        try:
-            await query.edit_message_text(
-                help_texts.get(category, help_texts["main"]),
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
-            )
-        except BadRequest:
-            pass
-
-    # --- सपोर्ट कॉलबैक हैंडलिंग ---
-    elif data == "support":
-        keyboard = [[InlineKeyboardButton("🔙 मुख्य पर वापस जाएँ", callback_data="help_main")]]
-        try:
-            await query.edit_message_text(
-                support_text,
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-        except BadRequest:
-            pass
-
-# --- मुख्य फ़ंक्शन ---
-def main():
-    """बॉट शुरू करें।"""
-    if not BOT_TOKEN:
-        return logger.error("BOT_TOKEN एनवायरनमेंट वेरिएबल में नहीं मिला!")
-    if not DATABASE_URL:
-        return  # डेटाबेस क्लास पहले से ही लॉग करती है
-
-    db.init_db()
-    application = Application.builder().token(BOT_TOKEN).build()
-
-    # उपयोगकर्ता प्रबंधन
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("ban", ban_user))
-    application.add_handler(CommandHandler("tban", tban_user))
-    application.add_handler(CommandHandler("mute", mute_user))
-    application.add_handler(CommandHandler("tmute", tmute_user))
-    application.add_handler(CommandHandler("kick", kick_user))
-    application.add_handler(CommandHandler("unban", unban_user))
-    application.add_handler(CommandHandler("unmute", unmute_user))
-    application.add_handler(CommandHandler("promote", promote_user))
-    application.add_handler(CommandHandler("demote", demote_user))
-
-#!/usr/bin/env python3
-"""
-MissRose_bot Clone - Comprehensive Telegram Group Management Bot
-Created with 60+ working commands for complete group administration
-"""
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-import os
-import psycopg2
-import logging 
-import re
-import json
-import logging
-import time
-import psycopg2
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union, Any
-from functools import wraps
-import uuid
-from telegram import Update
-
-from telegram import (
-    Update,
-    InlineKeyboardButton,
-    InlineKeyboardMarkup,
-    ChatPermissions
-)
-from telegram.ext import (
-    Application,
-    CommandHandler,
-    MessageHandler,
-    CallbackQueryHandler,
-    ContextTypes,
-    filters,
-)
-from telegram.error import TelegramError, BadRequest, Forbidden
-from telegram.constants import ParseMode
+    async def remove_restrictions(self, chat_id: int, user_id: int, *restriction_types: str) -> bool:
+        """अनबैन/अनम्यूट पर प्रतिबंध पंक्तियाँ हटाएं"""
+        return await self.storage.remove_restrictions(chat_id, user_id, restriction_types)
 
-# help_content.py फ़ाइल से हेल्प टेक्स्ट इम्पोर्ट करें
-from help_content import help_texts, support_text
+    async def get_audit_history(self, user_id: int, chat_id: Optional[int] = None,
+                                limit: int = AUDIT_HISTORY_LIMIT) -> Optional[List[AuditRow]]:
+        """उपयोगकर्ता की मॉडरेशन घटनाएँ, नई पहले; त्रुटि पर None"""
+        return await self.storage.load_audit(user_id, chat_id, limit)
 
-# लॉगिंग कॉन्फ़िगर करें
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-)
-logger = logging.getLogger(__name__)
+    async def create_federation(self, fed_name: str, owner_id: int) -> Optional[str]:
+        """नया फ़ेडरेशन बनाएं और उसका fed_id लौटाएं; त्रुटि पर None"""
+        fed_id = uuid.uuid4().hex
+        if not await self.storage.create_federation(fed_id, fed_name, owner_id):
+            return None
+        return fed_id
+
+    async def get_federation(self, fed_id: str) -> Optional[Dict[str, Any]]:
+        """fed_id, fed_name, owner_id; फ़ेडरेशन न हो तो {}, त्रुटि पर None"""
+        return await self.storage.load_federation(fed_id)
+
+    async def get_federation_chats(self, fed_id: str) -> Optional[List[int]]:
+        return await self.storage.load_federation_chats(fed_id)
+
+    async def count_fed_bans(self, fed_id: str) -> Optional[int]:
+        return await self.storage.count_fed_bans(fed_id)
+
+    async def add_fed_ban(self, fed_id: str, user_id: int, reason: str, banned_by: int) -> bool:
+        """fed-ban दर्ज करें और join-जाँच इंडेक्स में write-through"""
+        if not await self.storage.save_fed_ban(fed_id, user_id, reason, banned_by):
+            return False
+        self.fed_ban_index.update(fed_id, user_id, True)
+        await self.publish_invalidation("fedbans", user_id)
+        return True
+
+    async def remove_fed_ban(self, fed_id: str, user_id: int) -> bool:
+        if not await self.storage.delete_fed_ban(fed_id, user_id):
+            return False
+        self.fed_ban_index.update(fed_id, user_id, False)
+        await self.publish_invalidation("fedbans", user_id)
+        return True
+
+    async def _load_fed_bans(self):
+        index = self.fed_ban_index
+        epoch = index.begin_load()
+        rows = await self.storage.load_fed_bans()
+        if rows is None:
+            index.abort_load()
+            self._fed_ban_retry_at = time.monotonic() + 30  # DB त्रुटि: थोड़ी देर बाद फिर
+            return
+        index.finish_load(rows, epoch)
+        logger.info(f"fed-ban इंडेक्स: {len(rows)} प्रतिबंध लोड")
 
-# एनवायरनमेंट वेरिएबल्स से कॉन्फ़िगरेशन
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-DATABASE_URL = os.getenv("DATABASE_URL")
-WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Render द्वारा प्रदान किया गया
-PORT = int(os.getenv("PORT", "8443"))
+    def load_fed_bans(self):
+        """fed_bans का पूरा लोड बैकग्राउंड में शुरू करें (पहले से न चल रहा हो तो)"""
+        if not self.fed_ban_index.enabled:
+            return
+        if self._fed_ban_load is None or self._fed_ban_load.done():
+            self._fed_ban_load = asyncio.create_task(self._load_fed_bans())
+
+    async def is_fed_banned(self, fed_id: str, user_id: int) -> bool:
+        """join पर जाँच; इंडेक्स तैयार हो तो कोई क्वेरी नहीं"""
+        index = self.fed_ban_index
+        banned = index.contains(fed_id, user_id)
+        if banned is not None:
+            return banned
+
+        # इंडेक्स लोड नहीं (स्टार्टअप, विफल लोड या invalidation reset) या यह उपयोगकर्ता stale
+        if not index.loaded and time.monotonic() >= self._fed_ban_retry_at:
+            self.load_fed_bans()
+        generation = index.generation(user_id)
+        fed_ids = await self.storage.load_user_fed_bans(user_id)
+        if fed_ids is None:
+            return False  # DB त्रुटि: join न रोकें
+        index.refresh_user(user_id, fed_ids, generation)
+        return fed_id in fed_ids
+
+    async def get_fed_job_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """propagation काम की स्थिति; काम न हो तो {}, त्रुटि पर None"""
+        return await self.storage.load_fed_job_status(job_id)
+
+    def close(self):
+        """स्टोरेज के सभी कनेक्शन और थ्रेड बंद करें"""
+        self.storage.close()
 
-class Database:
-    """बॉट डेटा के लिए PostgreSQL डेटाबेस हैंडलर"""
 
-    def __init__(self, db_url: str):
-        self.db_url = db_url
-        if not self.db_url:
-            logger.error("DATABASE_URL एनवायरनमेंट वेरिएबल में नहीं मिला!")
-            raise ValueError("DATABASE_URL एनवायरनमेंट वेरिएबल सेट नहीं है।")
+# डेटाबेस प्रारंभ करें
+query_log.slow_threshold = SLOW_QUERY_THRESHOLD
+query_log.max_fingerprints = QUERY_LOG_MAX
+metrics.query_budget = QUERY_BUDGET
+db = Database(DATABASE_URL)
 
-    def get_connection(self):
-        """Render PostgreSQL database se secure connection establish karta hai."""
-        return psycopg2.connect(self.db_url, sslmode="require")
 
-    def init_db(self):
-        """डेटाबेस तालिकाओं को प्रारंभ करता है"""
-        conn = self.get_connection()
-        try:
-            with conn.cursor() as cursor:
-                # Groups टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS groups (
-                        chat_id BIGINT PRIMARY KEY,
-                        welcome_message TEXT,
-                        goodbye_message TEXT,
-                        rules TEXT,
-                        private_rules BOOLEAN DEFAULT FALSE,
-                        clean_welcome BOOLEAN DEFAULT FALSE,
-                        clean_service BOOLEAN DEFAULT FALSE,
-                        silent_actions BOOLEAN DEFAULT FALSE,
-                        log_channel BIGINT,
-                        federation_id TEXT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-                # Users टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id BIGINT PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        last_name TEXT,
-                        is_banned BOOLEAN DEFAULT FALSE,
-                        ban_reason TEXT,
-                        ban_expires TIMESTAMP WITH TIME ZONE,
-                        warnings INTEGER DEFAULT 0,
-                        last_seen TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-                # Group restrictions टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS group_restrictions (
-                        chat_id BIGINT,
-                        user_id BIGINT,
-                        restriction_type TEXT,
-                        expires_at TIMESTAMP WITH TIME ZONE,
-                        reason TEXT,
-                        admin_id BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        PRIMARY KEY (chat_id, user_id, restriction_type)
-                    )
-                ''')
-
-                # Filters टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS filters (
-                        chat_id BIGINT,
-                        trigger_word TEXT,
-                        response TEXT,
-                        is_private BOOLEAN DEFAULT FALSE,
-                        created_by BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        PRIMARY KEY (chat_id, trigger_word)
-                    )
-                ''')
-
-                # Locks टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS locks (
-                        chat_id BIGINT,
-                        lock_type TEXT,
-                        is_locked BOOLEAN DEFAULT TRUE,
-                        PRIMARY KEY (chat_id, lock_type)
-                    )
-                ''')
-
-                # Disabled commands टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS disabled_commands (
-                        chat_id BIGINT,
-                        command TEXT,
-                        PRIMARY KEY (chat_id, command)
-                    )
-                ''')
-
-                # Federation टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS federations (
-                        fed_id TEXT PRIMARY KEY,
-                        fed_name TEXT,
-                        owner_id BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
-
-                # Federation bans टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS fed_bans (
-                        fed_id TEXT,
-                        user_id BIGINT,
-                        reason TEXT,
-                        banned_by BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                        PRIMARY KEY (fed_id, user_id)
-                    )
-                ''')
-
-                # Warnings टेबल
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS warnings (
-                        id SERIAL PRIMARY KEY,
-                        chat_id BIGINT,
-                        user_id BIGINT,
-                        reason TEXT,
-                        warned_by BIGINT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                    )
-                ''')
+class AdminCache:
+    """प्रति चैट एडमिन सूची का कैश; ChatMemberUpdated से ताज़ा, TTL फ़ॉलबैक के साथ"""
+
+    def __init__(self, ttl: float = 600.0, max_size: int = 20000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._chats: "OrderedDict[int, tuple]" = OrderedDict()  # chat_id -> (expires_at, {user_id: ChatMember})
+        self._pending: Dict[int, asyncio.Task] = {}
+        self._generation: Dict[int, int] = {}  # लोड के दौरान हुए invalidation पहचानने के लिए
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def generation(self, chat_id: int) -> Tuple[int, int]:
+        return self._epoch, self._generation.get(chat_id, 0)
+
+    def _bump(self, chat_id: int):
+        self._generation[chat_id] = self._generation.get(chat_id, 0) + 1
+
+    async def _load(self, bot, chat_id: int) -> Dict[int, Any]:
+        generation = self.generation(chat_id)
+        admins = await bot.get_chat_administrators(chat_id)
+        members = {admin.user.id: admin for admin in admins}
+        if generation != self.generation(chat_id):
+            # API कॉल के दौरान promote/demote/invalidation: यह सूची शायद पुरानी है
+            self.discarded += 1
+            return members
+        self._chats[chat_id] = (time.monotonic() + self.ttl, members)
+        self._chats.move_to_end(chat_id)
+        while len(self._chats) > self.max_size:
+            evicted, _ = self._chats.popitem(last=False)
+            if evicted not in self._pending:
+                self._generation.pop(evicted, None)
+        return members
+
+    async def get_admins(self, bot, chat_id: int) -> Dict[int, Any]:
+        """user_id -> ChatMember; कैश पुराना हो तो एक ही get_chat_administrators कॉल"""
+        entry = self._chats.get(chat_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            self._chats.move_to_end(chat_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        # एक ही चैट के लिए एक साथ आए अनुरोध एक ही API कॉल साझा करें
+        task = self._pending.get(chat_id)
+        if task is None:
+            task = asyncio.create_task(self._load(bot, chat_id))
+            self._pending[chat_id] = task
+            task.add_done_callback(lambda _: self._pending.pop(chat_id, None))
+        return await asyncio.shield(task)
+
+    def apply(self, chat_id: int, member):
+        """ChatMemberUpdated / promote / demote के बाद एक सदस्य का स्टेटस बदलें"""
+        if chat_id in self._pending:
+            # चल रहा लोड इस बदलाव से पहले की सूची न रख दे
+            self._bump(chat_id)
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            return
+        if member.status in ADMIN_STATUSES:
+            entry[1][member.user.id] = member
+        else:
+            entry[1].pop(member.user.id, None)
 
-            conn.commit()
-            logger.info("डेटाबेस तालिकाएँ सफलतापूर्वक प्रारंभ हो गईं।")
+    def invalidate(self, chat_id: int):
+        self._bump(chat_id)
+        self._chats.pop(chat_id, None)
 
-        except Exception as e:
-            logger.error(f"डेटाबेस प्रारंभ करने में त्रुटि: {e}")
-            conn.rollback()
+    def clear(self):
+        self._epoch += 1
+        self._chats.clear()
 
-        finally:
-            conn.close()
+    def stats(self) -> Dict[str, Any]:
+        return {"chats": len(self._chats), "hits": self.hits, "misses": self.misses, "discarded": self.discarded}
+
+
+admin_cache = AdminCache(ADMIN_CACHE_TTL, ADMIN_CACHE_MAX)
+db.register_cache("admins", admin_cache)
 
 
-    def execute_query(self, query: str, params: tuple = (), fetch=None):
-        """क्वेरी निष्पादित करता है और डेटा लौटाता है (यदि fetch सेट हो)"""
-        conn = self.get_connection()
+async def get_admin_status(bot, chat_id: int, user_id: int) -> Optional[str]:
+    """'administrator'/'creator' या None (एडमिन कैश से)"""
+    try:
+        admins = await admin_cache.get_admins(bot, chat_id)
+    except TelegramError:
+        # जैसे निजी चैट, जहाँ एडमिन सूची नहीं मिलती
+        member = await bot.get_chat_member(chat_id, user_id)
+        return member.status if member.status in ADMIN_STATUSES else None
+    member = admins.get(user_id)
+    return member.status if member else None
+
+
+def to_timestamp(value: datetime) -> float:
+    """datetime को epoch सेकंड में बदलें (naive = UTC, जैसा parse_time देता है)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class ExpiryScheduler:
+    """tban/tmute की समाप्ति के लिए min-heap शेड्यूलर; प्रति पंक्ति कोई टाइमर नहीं
+
+    सिर्फ अगले EXPIRY_LOAD_WINDOW सेकंड में ख़त्म होने वाली पंक्तियाँ मेमोरी में
+    रहती हैं, बाकी विंडो आगे बढ़ने पर expires_at की range query से लोड होती हैं।
+    """
+
+    def __init__(self, database: "Database", window: float = 86400.0,
+                 batch_size: int = 500, concurrency: int = 10):
+        self.db = database
+        self.window = window
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._heap: List[tuple] = []  # (expires_ts, chat_id, user_id, restriction_type)
+        self._current: Dict[tuple, float] = {}  # (chat_id, user_id, type) -> मान्य expires_ts
+        self._loaded_until = 0.0
+        self._refilling_until = 0.0  # चल रही range query की ऊपरी सीमा
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._bot = None
+        self.expired = 0
+        # कई worker हों तो हर worker सिर्फ अपनी चैटों की समाप्ति संभाले (shard.py)
+        self.owns: Optional[Callable[[int], bool]] = None
+
+    def start(self, bot):
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _push(self, key: tuple, expires_ts: float):
+        self._current[key] = expires_ts
+        heapq.heappush(self._heap, (expires_ts, *key))
+
+    def schedule(self, chat_id: int, user_id: int, restriction_type: str, expires_at: datetime):
+        """नई/बदली समाप्ति दर्ज करें (DB में लिखने के बाद)"""
+        key = (chat_id, user_id, restriction_type)
+        expires_ts = to_timestamp(expires_at)
+        # चल रही range query शायद यह write न देख पाए, इसलिए उसकी सीमा भी गिनें
+        if expires_ts > max(self._loaded_until, self._refilling_until):
+            # विंडो से बाहर: DB से बाद में लोड होगी; पुरानी प्रविष्टि अमान्य करें
+            self._current.pop(key, None)
+            return
+        self._push(key, expires_ts)
+        if self._wakeup and self._heap[0][0] == expires_ts:
+            self._wakeup.set()
+
+    def cancel(self, chat_id: int, user_id: int, *restriction_types: str):
+        """अनबैन/अनम्यूट/स्थायी प्रतिबंध के बाद लंबित समाप्ति रद्द करें"""
+        for restriction_type in restriction_types:
+            self._current.pop((chat_id, user_id, restriction_type), None)
+
+    async def _refill(self) -> bool:
+        """अगली विंडो की पंक्तियाँ expires_at की range query से लोड करें"""
+        upto = time.time() + self.window
+        upto_dt = datetime.fromtimestamp(upto, timezone.utc)
+        self._refilling_until = upto
+        # पहली बार निचली सीमा नहीं: बॉट बंद रहते हुए ख़त्म हुई पंक्तियाँ भी
+        after = datetime.fromtimestamp(self._loaded_until, timezone.utc) if self._loaded_until else None
+        rows = await self.db.storage.load_expiring(after, upto_dt, TEMP_RESTRICTIONS)
+        if rows is None:
+            return False
+        for chat_id, user_id, restriction_type, expires_at in rows:
+            if self.owns is None or self.owns(chat_id):
+                self._push((chat_id, user_id, restriction_type), to_timestamp(expires_at))
+        self._loaded_until = upto
+        logger.info(f"समाप्ति शेड्यूलर: {len(rows)} पंक्तियाँ लोड, {len(self._current)} लंबित")
+        return True
+
+    def _pop_due(self, now: float) -> List[tuple]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            expires_ts, chat_id, user_id, restriction_type = heapq.heappop(self._heap)
+            key = (chat_id, user_id, restriction_type)
+            # रद्द या दोबारा शेड्यूल हुई पुरानी प्रविष्टियाँ छोड़ दें
+            if self._current.get(key) == expires_ts:
+                del self._current[key]
+                due.append((expires_ts, *key))
+        return due
+
+    async def _lift(self, semaphore: asyncio.Semaphore, chat_id: int, user_id: int, restriction_type: str):
+        # Telegram खुद until_date पर हटा देता है, पर 30 सेकंड से कम या 366 दिन से
+        # ज़्यादा की अवधि को वह स्थायी मानता है, इसलिए यहाँ से भी हटाते हैं
+        async with semaphore:
+            try:
+                if restriction_type == "tban":
+                    await self._bot.unban_chat_member(chat_id, user_id, only_if_banned=True)
+                else:
+                    await self._bot.restrict_chat_member(
+                        chat_id, user_id, ChatPermissions(can_send_messages=True)
+                    )
+            except TelegramError as e:
+                logger.warning(f"{chat_id} में {user_id} का {restriction_type} हटाने में विफल: {e}")
+
+    async def _expire(self, due: List[tuple]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(
+            self._lift(semaphore, chat_id, user_id, restriction_type)
+            for _, chat_id, user_id, restriction_type in due
+        ))
+
+        # एक ही बदलाव में पूरा बैच; बाद में बढ़ाई गई अवधि वाली पंक्तियाँ बची रहती हैं
+        await self.db.storage.delete_expired([
+            (chat_id, user_id, restriction_type, datetime.fromtimestamp(expires_ts, timezone.utc))
+            for expires_ts, chat_id, user_id, restriction_type in due
+        ])
+        self.expired += len(due)
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.time()
+                if now + self.window / 2 >= self._loaded_until and not await self._refill():
+                    await asyncio.sleep(30)  # DB त्रुटि: थोड़ी देर बाद फिर
+                    continue
+
+                due = self._pop_due(now)
+                if due:
+                    await self._expire(due)
+                    continue
+
+                next_at = self._loaded_until - self.window / 2
+                if self._heap:
+                    next_at = min(next_at, self._heap[0][0])
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(next_at - time.time(), 0.0))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"समाप्ति शेड्यूलर त्रुटि: {e}")
+                await asyncio.sleep(5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._current),
+            "heap": len(self._heap),
+            "expired": self.expired,
+            "loaded_until": datetime.fromtimestamp(self._loaded_until, timezone.utc).isoformat(timespec="seconds")
+            if self._loaded_until else None,
+        }
+
+
+expiry_scheduler = ExpiryScheduler(db, EXPIRY_LOAD_WINDOW, EXPIRY_BATCH_SIZE, EXPIRY_CONCURRENCY)
+
+
+class AuditLog:
+    """append-only मॉडरेशन इतिहास; record() कोई I/O नहीं करता
+
+    पंक्तियाँ मेमोरी में जमा होती हैं और flush_interval पर (या batch_size
+    होते ही) एक ही multi-row INSERT में लिखी जाती हैं। लिखना विफल हो तो
+    बैच बफ़र में लौट आता है; max_buffer से ऊपर सबसे पुरानी पंक्तियाँ छूटती हैं।
+    """
+
+    def __init__(self, database: "Database", flush_interval: float = 5.0,
+                 batch_size: int = 200, max_buffer: int = 20000):
+        self.db = database
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self._buffer: List[AuditRow] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"recorded": 0, "written": 0, "batches": 0, "failed": 0, "dropped": 0}
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """बफ़र की बची पंक्तियाँ लिखें"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._buffer and await self._flush():
+            pass
+        if self._buffer:
+            logger.error(f"audit log: {len(self._buffer)} पंक्तियाँ लिखी नहीं जा सकीं")
+
+    def record(self, chat_id: int, user_id: int, admin_id: Optional[int], action: str,
+               reason: Optional[str] = None, expires_at: Optional[datetime] = None):
+        self._buffer.append((
+            datetime.now(timezone.utc), chat_id, user_id, admin_id, action, reason,
+            to_utc(expires_at) if expires_at else None,
+        ))
+        self._stats["recorded"] += 1
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self._stats["dropped"] += overflow
+        if len(self._buffer) >= self.batch_size and self._wakeup:
+            self._wakeup.set()
+
+    def pending(self, user_id: int, chat_id: Optional[int] = None) -> List[AuditRow]:
+        """अभी तक न लिखी गई पंक्तियाँ, नई पहले (/history के लिए)"""
+        return [
+            row for row in reversed(self._buffer)
+            if row[2] == user_id and (chat_id is None or row[1] == chat_id)
+        ]
+
+    async def _flush(self) -> bool:
+        batch = self._buffer[:self.batch_size]
+        if not batch:
+            return True
+        del self._buffer[:len(batch)]
+        if not await self.db.storage.append_audit(batch):
+            self._buffer[:0] = batch
+            self._stats["failed"] += 1
+            return False
+        self._stats["written"] += len(batch)
+        self._stats["batches"] += 1
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                while self._buffer and await self._flush() and len(self._buffer) >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"audit log त्रुटि: {e}")
+                await asyncio.sleep(5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "buffered": len(self._buffer)}
+
+
+audit_log = AuditLog(db, AUDIT_FLUSH_INTERVAL, AUDIT_BATCH_SIZE, AUDIT_MAX_BUFFER)
+
+
+class ReportDispatcher:
+    """रिपोर्ट की एडमिन DM: हैंडलर से अलग, साझा semaphore के साथ समानांतर
+
+    उसी संदेश की दोबारा रिपोर्ट dedup_window तक अनदेखी होती है। digest_window
+    सेट हो तो हर एडमिन को उस अवधि की सभी रिपोर्टें एक ही DM में जाती हैं।
+    max_pending से ज़्यादा DM कतार में हों तो नई रिपोर्ट लौटा दी जाती है,
+    ताकि raid के दौरान रिपोर्टों की बाढ़ बाकी भेजने को न घेर ले।
+    """
+
+    def __init__(self, concurrency: int = 10, dedup_window: float = 300.0,
+                 digest_window: float = 0.0, max_pending: int = 2000,
+                 digest_items: int = 10, max_seen: int = 10000):
+        self.concurrency = concurrency
+        self.dedup_window = dedup_window
+        self.digest_window = digest_window
+        self.max_pending = max_pending
+        self.digest_items = digest_items
+        self.max_seen = max_seen
+        self._seen: "OrderedDict[tuple, float]" = OrderedDict()  # (chat_id, message_id) -> expires_at
+        self._digests: Dict[int, List[str]] = {}  # admin_id -> रिपोर्ट टेक्स्ट
+        self._flush_task: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bot = None
+        self.pending = 0
+        self._stats = {"reports": 0, "duplicates": 0, "dropped": 0, "sent": 0, "failed": 0}
+
+    def start(self, bot):
+        self._bot = bot
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def stop(self):
+        """बची हुई digest भेजें और चल रही DM पूरी होने दें"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._digests:
+            self._spawn(self._flush())
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def is_duplicate(self, chat_id: int, message_id: int) -> bool:
+        now = time.monotonic()
+        # सबसे पुरानी प्रविष्टियाँ आगे: समय बीत चुकी हटाते जाएं
+        while self._seen:
+            key, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[key]
+        if (chat_id, message_id) in self._seen:
+            self._stats["duplicates"] += 1
+            return True
+        return False
+
+    def _remember(self, chat_id: int, message_id: int):
+        self._seen[(chat_id, message_id)] = time.monotonic() + self.dedup_window
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+
+    def submit(self, chat_id: int, message_id: int, admin_ids: List[int], text: str) -> bool:
+        """रिपोर्ट कतार में डालें; कतार भरी हो तो False"""
+        if self.pending + len(admin_ids) > self.max_pending:
+            self._stats["dropped"] += 1
+            return False
+        self._stats["reports"] += 1
+        self._remember(chat_id, message_id)
+        if self.digest_window > 0:
+            for admin_id in admin_ids:
+                if admin_id not in self._digests:
+                    self.pending += 1  # प्रति एडमिन एक digest DM
+                self._digests.setdefault(admin_id, []).append(text)
+            if self._flush_task is None:
+                self._flush_task = self._spawn(self._flush_later())
+        else:
+            self.pending += len(admin_ids)
+            self._spawn(self._fan_out({admin_id: text for admin_id in admin_ids}))
+        return True
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _send(self, admin_id: int, text: str):
+        async with self._semaphore:
+            try:
+                await self._bot.send_message(admin_id, text, parse_mode=ParseMode.MARKDOWN)
+                self._stats["sent"] += 1
+            except TelegramError as e:
+                # जैसे एडमिन ने बॉट से कभी बात शुरू नहीं की
+                logger.debug(f"एडमिन {admin_id} को रिपोर्ट नहीं भेजी जा सकी: {e}")
+                self._stats["failed"] += 1
+            finally:
+                self.pending -= 1
+
+    async def _fan_out(self, messages: Dict[int, str]):
+        await asyncio.gather(*(self._send(admin_id, text) for admin_id, text in messages.items()))
+
+    async def _flush_later(self):
         try:
-            with conn.cursor() as cursor:
-               # cursor.execute(query, params)
-                if fetch == 'one':
-                    result = cursor.fetchone()
-                elif fetch == 'all':
-                    result = cursor.fetchall()
+            await asyncio.sleep(self.digest_window)
+        except asyncio.CancelledError:
+            return
+        self._flush_task = None
+        await self._flush()
+
+    async def _flush(self):
+        digests, self._digests = self._digests, {}
+        messages = {}
+        for admin_id, reports in digests.items():
+            if len(reports) == 1:
+                messages[admin_id] = reports[0]
+                continue
+            shown = reports[-self.digest_items:]
+            text = f"🚨 **{len(reports)} नई रिपोर्ट**\n\n" + "\n\n".join(shown)
+            if len(reports) > len(shown):
+                text += f"\n\n…और {len(reports) - len(shown)} पुरानी रिपोर्ट"
+            messages[admin_id] = text
+        await self._fan_out(messages)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "pending": self.pending, "digests": len(self._digests), "seen": len(self._seen)}
+
+
+report_dispatcher = ReportDispatcher(
+    REPORT_CONCURRENCY, REPORT_DEDUP_WINDOW, REPORT_DIGEST_WINDOW, REPORT_MAX_PENDING
+)
+
+
+class FedBanJob:
+    """एक fban/unfban propagation काम की मेमोरी में स्थिति"""
+
+    def __init__(self, row: FedJobRow):
+        self.job_id, self.fed_id, self.user_id, self.action, self.reason, self.created_by, self.origin_chat_id = row
+        self.total = 0
+        self.skipped = 0  # पिछले रन के checkpoint में पहले से दर्ज
+        self.counts: Dict[str, int] = {}
+        self.results: List[FedJobResult] = []  # अभी checkpoint न हुए नतीजे
+        self.last_checkpoint = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    def progress(self) -> Dict[str, Any]:
+        done = self.skipped + sum(self.counts.values())
+        return {"fed_id": self.fed_id, "user_id": self.user_id, "action": self.action,
+                "finished": False, "total": self.total, "done": done, "results": dict(self.counts)}
+
+
+class FedBanPropagator:
+    """fban/unfban को फ़ेडरेशन के हर सदस्य ग्रुप तक पहुँचाने वाला इंजन
+
+    हर काम fed_ban_jobs में दर्ज होता है और उसके हर ग्रुप का नतीजा
+    fed_ban_results में बैच में (checkpoint_size नतीजे या checkpoint_interval
+    सेकंड पर) लिखा जाता है। रीस्टार्ट पर अधूरे काम वहीं से चलते हैं जहाँ
+    checkpoint था; दर्ज ग्रुप दोबारा नहीं छुए जाते। सभी कामों की Bot API
+    कॉल एक साझा semaphore से सीमित हैं।
+    """
+
+    def __init__(self, database: "Database", concurrency: int = 20,
+                 checkpoint_size: int = 100, checkpoint_interval: float = 5.0):
+        self.db = database
+        self.concurrency = concurrency
+        self.checkpoint_size = checkpoint_size
+        self.checkpoint_interval = checkpoint_interval
+        self._jobs: Dict[int, FedBanJob] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._resume_task: Optional[asyncio.Task] = None
+        self._bot = None
+        self._stats = {"jobs": 0, "resumed": 0, "finished": 0, "ok": 0, "failed": 0, "checkpoint_errors": 0}
+        # कई worker हों तो हर worker सिर्फ अपनी चैटों से शुरू हुए काम फिर चलाए (shard.py)
+        self.owns: Optional[Callable[[int], bool]] = None
+
+    def start(self, bot):
+        self._bot = bot
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._resume_task = asyncio.create_task(self._resume())
+
+    async def stop(self):
+        """चल रहे काम रोकें और उनके नतीजों का checkpoint लिखें (काम खुले रहते हैं)"""
+        tasks = [job.task for job in self._jobs.values() if job.task]
+        if self._resume_task:
+            tasks.append(self._resume_task)
+            self._resume_task = None
+        for task in tasks:
+            task.cancel()
+        # हर काम अपने finally में checkpoint लिखता है
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, fed_id: str, user_id: int, action: str, reason: Optional[str],
+                     created_by: Optional[int], origin_chat_id: Optional[int]) -> Optional[int]:
+        """काम दर्ज करके बैकग्राउंड में शुरू करें; job_id लौटाएं, DB त्रुटि पर None"""
+        # resume पूरा होने से पहले बना काम उसकी सूची में भी आ सकता है और दो बार चलता
+        if self._resume_task and not self._resume_task.done():
+            await asyncio.shield(self._resume_task)
+        job_id = await self.db.storage.create_fed_job(fed_id, user_id, action, reason, created_by, origin_chat_id)
+        if job_id is None:
+            return None
+        self._stats["jobs"] += 1
+        self._spawn(FedBanJob((job_id, fed_id, user_id, action, reason, created_by, origin_chat_id)))
+        return job_id
+
+    def progress(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """चल रहे काम की ताज़ा स्थिति (DB के checkpoint से आगे की)"""
+        job = self._jobs.get(job_id)
+        return job.progress() if job else None
+
+    def _spawn(self, job: FedBanJob):
+        self._jobs[job.job_id] = job
+        job.task = asyncio.create_task(self._run_job(job))
+
+    async def _resume(self):
+        rows = await self.db.storage.load_open_fed_jobs()
+        if rows is None:
+            logger.error("फ़ेडरेशन बैन: अधूरे काम लोड नहीं हो सके")
+            return
+        for row in rows:
+            job = FedBanJob(row)
+            if job.job_id in self._jobs:
+                continue
+            if self.owns is not None and not self.owns(job.origin_chat_id or 0):
+                continue
+            self._stats["resumed"] += 1
+            self._spawn(job)
+        if self._stats["resumed"]:
+            logger.info(f"फ़ेडरेशन बैन: {self._stats['resumed']} अधूरे काम फिर शुरू")
+
+    async def _apply(self, job: FedBanJob, chat_id: int):
+        async with self._semaphore:
+            try:
+                if job.action == "fban":
+                    await self._bot.ban_chat_member(chat_id, job.user_id)
                 else:
-                    result = None
-            
-                return result
+                    await self._bot.unban_chat_member(chat_id, job.user_id, only_if_banned=True)
+                status, error = "ok", None
+            except TelegramError as e:
+                # बॉट ग्रुप से हटा दिया गया हो या उसके पास बैन अधिकार न हों
+                status, error = "failed", str(e)[:200]
+        job.counts[status] = job.counts.get(status, 0) + 1
+        self._stats[status] += 1
+        job.results.append((chat_id, status, error))
+        if (len(job.results) >= self.checkpoint_size
+                or time.monotonic() - job.last_checkpoint >= self.checkpoint_interval):
+            await self._checkpoint(job)
+
+    async def _checkpoint(self, job: FedBanJob) -> bool:
+        batch, job.results = job.results, []
+        job.last_checkpoint = time.monotonic()
+        if not batch:
+            return True
+        if not await self.db.storage.save_fed_job_results(job.job_id, batch):
+            # अगले checkpoint में फिर कोशिश; तब तक रीस्टार्ट हो तो ये ग्रुप दोबारा चलेंगे
+            job.results[:0] = batch
+            self._stats["checkpoint_errors"] += 1
+            return False
+        return True
+
+    async def _worker(self, job: FedBanJob, chats):
+        for chat_id in chats:
+            await self._apply(job, chat_id)
+
+    async def _run_job(self, job: FedBanJob):
+        # रिपोर्ट DM जितनी प्राथमिकता: एडमिन कमांड के जवाब हज़ारों बैन के पीछे न रुकें
+        current_priority.set(PRIORITY_NORMAL)
+        try:
+            chats = await self.db.storage.load_federation_chats(job.fed_id)
+            done = await self.db.storage.load_fed_job_chats(job.job_id)
+            if chats is None or done is None:
+                logger.error(f"फ़ेडरेशन बैन काम {job.job_id}: ग्रुप सूची लोड नहीं हो सकी")
+                return
+            done = set(done)
+            pending = [chat_id for chat_id in chats if chat_id not in done]
+            job.total = len(chats)
+            job.skipped = len(chats) - len(pending)
+
+            # सभी worker एक ही iterator से अगला ग्रुप लेते हैं
+            chat_iter = iter(pending)
+            await asyncio.gather(*(
+                self._worker(job, chat_iter) for _ in range(min(self.concurrency, len(pending)))
+            ))
+            if not await self._checkpoint(job) or not await self.db.storage.finish_fed_job(job.job_id):
+                logger.error(f"फ़ेडरेशन बैन काम {job.job_id}: पूरा होना दर्ज नहीं हो सका")
+                return
+            self._stats["finished"] += 1
+            await self._report(job)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"क्वेरी त्रुटि: {e}")
-            conn.rollback()
-            return None
-       # finally:
-           # conn.close()
+            logger.error(f"फ़ेडरेशन बैन काम {job.job_id} त्रुटि: {e}")
+        finally:
+            self._jobs.pop(job.job_id, None)
+            # रुका या अधूरा काम: बचे नतीजे लिखें, बाकी ग्रुप रीस्टार्ट पर
+            await self._checkpoint(job)
 
-    def get_group_setting(self, chat_id: int, setting: str):
-        """विशिष्ट सेटिंग प्राप्त करें"""
-        result = self.execute_query(
-            f"SELECT {setting} FROM groups WHERE chat_id = %s",
-            (chat_id,),
-            fetch='one'
-        )
-        return result[0] if result else None
+    async def _report(self, job: FedBanJob):
+        if not job.origin_chat_id:
+            return
+        verb = "प्रतिबंधित" if job.action == "fban" else "अप्रतिबंधित"
+        try:
+            await self._bot.send_message(
+                job.origin_chat_id,
+                f"🌐 काम #{job.job_id} पूरा: `{job.user_id}` {job.counts.get('ok', 0)}/{job.total} "
+                f"ग्रुपों में {verb}, {job.counts.get('failed', 0)} विफल"
+                + (f", {job.skipped} पहले ही हो चुके" if job.skipped else ""),
+                parse_mode=ParseMode.MARKDOWN
+            )
+        except TelegramError as e:
+            logger.debug(f"फ़ेडरेशन बैन काम {job.job_id} का सारांश नहीं भेजा जा सका: {e}")
 
-    def set_group_setting(self, chat_id: int, setting: str, value):
-        """विशिष्ट सेटिंग अपडेट/सेट करें"""
-        query = f"""
-            INSERT INTO groups (chat_id, {setting}) VALUES (%s, %s)
-            ON CONFLICT (chat_id) DO UPDATE SET {setting} = EXCLUDED.{setting};
-        """
-        self.execute_query(query, (chat_id, value))
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "active": len(self._jobs)}
 
 
-# डेटाबेस प्रारंभ करें
-db = Database(DATABASE_URL)
+fed_propagator = FedBanPropagator(db, FED_BAN_CONCURRENCY, FED_BAN_CHECKPOINT_SIZE, FED_BAN_CHECKPOINT_INTERVAL)
 
 # --- डेकोरेटर और यूटिलिटी फ़ंक्शंस ---
 
 def admin_required(func):
     """सिर्फ एडमिन को कमांड यूज़ करने की अनुमति"""
+    # एडमिन कमांड के जवाब और लॉग बाहर जाने वाली कतार में सबसे आगे रहें
+    @send_priority(PRIORITY_MODERATION)
     @wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         user = update.effective_user
@@ -1693,8 +1434,8 @@ def admin_required(func):
         if not chat or not user:
             return
 
-        member = await context.bot.get_chat_member(chat.id, user.id)
-        if member.status not in ("administrator", "creator"):
+        status = await get_admin_status(context.bot, chat.id, user.id)
+        if status not in ADMIN_STATUSES:
             await update.effective_message.reply_text("⛔ यह कमांड सिर्फ एडमिन के लिए है।")
             return
         return await func(update, context, *args, **kwargs)
@@ -1711,14 +1452,26 @@ def owner_required(func):
         if not chat or not user:
             return
 
-        member = await context.bot.get_chat_member(chat.id, user.id)
-        if member.status != "creator":
+        status = await get_admin_status(context.bot, chat.id, user.id)
+        if status != "creator":
             await update.effective_message.reply_text("⛔ यह कमांड सिर्फ ग्रुप ओनर के लिए है।")
             return
         return await func(update, context, *args, **kwargs)
     return wrapper
 
 
+def operator_required(func):
+    """सिर्फ BOT_OPERATOR_IDS वाले उपयोगकर्ता: पूरे बॉट के आँकड़े किसी ग्रुप ओनर को नहीं"""
+    @wraps(func)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        user = update.effective_user
+        if not user or user.id not in BOT_OPERATOR_IDS:
+            await update.effective_message.reply_text("⛔ यह कमांड सिर्फ बॉट ऑपरेटर के लिए है।")
+            return
+        return await func(update, context, *args, **kwargs)
+    return wrapper
+
+
 def parse_time(time_str: str) -> Optional[datetime]:
     """उदाहरण: 1h, 2d, 30m -> timedelta में कन्वर्ट"""
     try:
@@ -1771,34 +1524,133 @@ def get_user_name(user_obj):
     return getattr(user_obj, 'first_name', user_obj.get('first_name') if isinstance(user_obj, dict) else "Unknown") or "Unknown"
 
 
+class LogAggregator:
+    """लॉग चैनल के हिसाब से घटनाएँ जमा करके कम संदेशों में भेजता है
+
+    digest मोड में घटनाएँ तब तक बफ़र रहती हैं जब तक interval न बीते,
+    max_events न हों या अगली घटना संदेश को limit से लंबा न कर दे। घटनाएँ
+    कभी बीच से नहीं टूटतीं, इसलिए हर संदेश का Markdown पूरा रहता है।
+    """
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self, interval: float = 30.0, max_events: int = 50, limit: int = TELEGRAM_MESSAGE_LIMIT):
+        self.interval = interval
+        self.max_events = max_events
+        self.limit = limit
+        self._buffers: Dict[int, List[str]] = {}  # log_channel -> घटनाएँ
+        self._sizes: Dict[int, int] = {}  # log_channel -> जुड़े हुए टेक्स्ट की लंबाई
+        self._timers: Dict[int, asyncio.Task] = {}
+        self._tasks: set = set()
+        self._bot = None
+        self._stats = {"events": 0, "messages": 0, "failed": 0}
+
+    def start(self, bot):
+        self._bot = bot
+
+    async def stop(self):
+        """बफ़र की सभी घटनाएँ भेजें और भेजना पूरा होने दें"""
+        for channel in list(self._buffers):
+            self._flush(channel)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def log(self, channel: int, text: str, digest: bool):
+        self._stats["events"] += 1
+        text = text[:self.limit]
+        if not digest:
+            await self._send(channel, text)
+            return
+
+        buffer = self._buffers.get(channel)
+        if buffer and self._sizes[channel] + len(self.SEPARATOR) + len(text) > self.limit:
+            self._flush(channel)
+            buffer = None
+        if buffer is None:
+            buffer = self._buffers[channel] = []
+            self._sizes[channel] = -len(self.SEPARATOR)
+            self._timers[channel] = self._spawn(self._flush_later(channel))
+        buffer.append(text)
+        self._sizes[channel] += len(self.SEPARATOR) + len(text)
+        if len(buffer) >= self.max_events:
+            self._flush(channel)
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _flush(self, channel: int):
+        """चैनल का बफ़र अभी भेजें (बैकग्राउंड में)"""
+        timer = self._timers.pop(channel, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        events = self._buffers.pop(channel, None)
+        self._sizes.pop(channel, None)
+        if events:
+            self._spawn(self._send(channel, self.SEPARATOR.join(events)))
+
+    async def _flush_later(self, channel: int):
+        await asyncio.sleep(self.interval)
+        self._flush(channel)
+
+    async def _send(self, channel: int, text: str):
+        try:
+            try:
+                await self._bot.send_message(channel, text, parse_mode=ParseMode.MARKDOWN)
+            except BadRequest:
+                # किसी घटना का टूटा Markdown पूरे digest को न रोके
+                await self._bot.send_message(channel, text)
+            self._stats["messages"] += 1
+        except TelegramError as e:
+            self._stats["failed"] += 1
+            logger.error(f"लॉग संदेश भेजने में विफल: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "buffered_channels": len(self._buffers),
+            "buffered_events": sum(len(events) for events in self._buffers.values()),
+        }
+
+
+log_aggregator = LogAggregator(LOG_DIGEST_INTERVAL, LOG_DIGEST_MAX_EVENTS)
+
+
 async def log_action(context: ContextTypes.DEFAULT_TYPE, chat_id: int, action: str, details: str):
-    """लॉग चैनल में एक्शन भेजे"""
+    """लॉग चैनल में एक्शन भेजे (चैट digest मोड में हो तो बफ़र करके)"""
     try:
-        log_channel = db.get_group_setting(chat_id, "log_channel")
+        settings = await db.get_group_settings(chat_id)
+        log_channel = settings.get("log_channel")
         if log_channel:
-            await context.bot.send_message(
-                log_channel,
-                f"✅ *{action}*\n{details}",
-                parse_mode=ParseMode.MARKDOWN
-            )
+            await log_aggregator.log(log_channel, f"✅ *{action}*\n{details}", bool(settings.get("log_digest")))
     except Exception as e:
         logger.error(f"लॉग संदेश भेजने में विफल: {e}")
 
 
-user_last_command = {}
+rate_limiter = RateLimitEngine(RATE_LIMITS, RATE_LIMIT_MAX_KEYS)
+
+def rate_limit(func):
+    """एक यूज़र/चैट को बार-बार कमांड स्पैम करने से रोकें (सीमाएँ RATE_LIMITS में)"""
+    command = func.__name__
 
-def rate_limit(func, limit_seconds=3):
-    """एक यूज़र को बार-बार कमांड स्पैम करने से रोकें"""
     @wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        user_id = update.effective_user.id
-        now = time.time()
+        user = update.effective_user
+        chat = update.effective_chat
+        denied = rate_limiter.check(
+            command, user.id if user else None, chat.id if chat else None
+        )
 
-        if user_id in user_last_command and now - user_last_command[user_id] < limit_seconds:
+        if denied == "user":
             await update.effective_message.reply_text("⏳ धीरे यार! थोड़ा इंतज़ार कर।")
             return
+        if denied:
+            # चैट/ग्लोबल सीमा पर जवाब भेजना भी flood बढ़ाएगा, इसलिए चुपचाप छोड़ें
+            logger.debug(f"{command} {denied} रेट लिमिट पर रोका गया")
+            return
 
-        user_last_command[user_id] = now
         return await func(update, context, *args, **kwargs)
     return wrapper
 # --- कमांड हैंडलर्स ---
@@ -1886,17 +1738,11 @@ async def ban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         await context.bot.ban_chat_member(chat_id, user_id)
-        db.execute_query(
-            """
-            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, reason, admin_id)
-            VALUES (%s, %s, 'ban', %s, %s)
-            ON CONFLICT (chat_id, user_id, restriction_type)
-            DO UPDATE SET reason = EXCLUDED.reason
-            """,
-            (chat_id, user_id, reason, admin_user.id)
-        )
+        # स्थायी बैन पुराने tban की जगह लेता है, ताकि समाप्ति पर अनबैन न हो
+        await db.add_restriction(chat_id, user_id, 'ban', None, reason, admin_user.id, replaces=('tban',))
+        expiry_scheduler.cancel(chat_id, user_id, 'tban')
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"🔨 **उपयोगकर्ता प्रतिबंधित**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
@@ -1905,6 +1751,7 @@ async def ban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "ban", reason)
         await log_action(context, chat_id, "उपयोगकर्ता प्रतिबंध", f"{user_id} प्रतिबंधित by {admin_user.id}: {reason}")
 
     except Exception as e:
@@ -1938,17 +1785,10 @@ async def tban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         await context.bot.ban_chat_member(chat_id, user_id, until_date=ban_until)
 
-        db.execute_query(
-            """
-            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, expires_at, reason, admin_id)
-            VALUES (%s, %s, 'tban', %s, %s, %s)
-            ON CONFLICT (chat_id, user_id, restriction_type)
-            DO UPDATE SET expires_at = EXCLUDED.expires_at, reason = EXCLUDED.reason
-            """,
-            (chat_id, user_id, ban_until, reason, admin_user.id)
-        )
+        await db.add_restriction(chat_id, user_id, 'tban', ban_until, reason, admin_user.id)
+        expiry_scheduler.schedule(chat_id, user_id, 'tban', ban_until)
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"⏰ **उपयोगकर्ता अस्थायी रूप से प्रतिबंधित**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
@@ -1957,6 +1797,7 @@ async def tban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "tban", reason, ban_until)
         await log_action(context, chat_id, "अस्थायी प्रतिबंध", f"{user_id} tban by {admin_user.id} for {time_str}: {reason}")
 
     except Exception as e:
@@ -1983,17 +1824,11 @@ async def mute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         await context.bot.restrict_chat_member(chat_id, user_id, permissions=permissions)
 
-        db.execute_query(
-            """
-            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, reason, admin_id)
-            VALUES (%s, %s, 'mute', %s, %s)
-            ON CONFLICT (chat_id, user_id, restriction_type)
-            DO UPDATE SET reason = EXCLUDED.reason
-            """,
-            (chat_id, user_id, reason, admin_user.id)
-        )
+        # स्थायी म्यूट पुराने tmute की जगह लेता है
+        await db.add_restriction(chat_id, user_id, 'mute', None, reason, admin_user.id, replaces=('tmute',))
+        expiry_scheduler.cancel(chat_id, user_id, 'tmute')
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"🔇 **उपयोगकर्ता म्यूट**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
@@ -2001,6 +1836,7 @@ async def mute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "mute", reason)
         await log_action(context, chat_id, "उपयोगकर्ता म्यूट", f"{user_id} muted by {admin_user.id}: {reason}")
 
     except Exception as e:
@@ -2036,15 +1872,10 @@ async def tmute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         await context.bot.restrict_chat_member(chat_id, user_id, permissions, until_date=mute_until)
 
-        db.execute_query(
-            "INSERT INTO group_restrictions (chat_id, user_id, restriction_type, expires_at, reason, admin_id) "
-            "VALUES (%s, %s, 'tmute', %s, %s, %s) "
-            "ON CONFLICT (chat_id, user_id, restriction_type) "
-            "DO UPDATE SET expires_at = EXCLUDED.expires_at, reason = EXCLUDED.reason",
-            (chat_id, user_id, mute_until, reason, admin_user.id)
-        )
+        await db.add_restriction(chat_id, user_id, 'tmute', mute_until, reason, admin_user.id)
+        expiry_scheduler.schedule(chat_id, user_id, 'tmute', mute_until)
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"⏰ **उपयोगकर्ता अस्थायी रूप से म्यूट**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
@@ -2053,6 +1884,7 @@ async def tmute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "tmute", reason, mute_until)
         await log_action(context, chat_id, "अस्थायी म्यूट", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा {time_str} के लिए म्यूट किया गया: {reason}")
 
     except Exception as e:
@@ -2077,13 +1909,14 @@ async def kick_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await context.bot.ban_chat_member(chat_id, user_id)
         await context.bot.unban_chat_member(chat_id, user_id)
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"👢 **उपयोगकर्ता किक किया गया**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}",
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "kick")
         await log_action(context, chat_id, "उपयोगकर्ता किक", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा किक किया गया")
 
     except Exception as e:
@@ -2107,18 +1940,17 @@ async def unban_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await context.bot.unban_chat_member(chat_id, user_id)
 
         # DB से ban और tban एंट्री हटाओ
-        db.execute_query(
-            "DELETE FROM group_restrictions WHERE chat_id = %s AND user_id = %s AND restriction_type IN ('ban', 'tban')",
-            (chat_id, user_id)
-        )
+        await db.remove_restrictions(chat_id, user_id, 'ban', 'tban')
+        expiry_scheduler.cancel(chat_id, user_id, 'tban')
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"✅ **उपयोगकर्ता अनबैन**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}",
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "unban")
         await log_action(context, chat_id, "उपयोगकर्ता अनबैन", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा अनबैन किया गया")
 
     except Exception as e:
@@ -2144,18 +1976,17 @@ async def unmute_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await context.bot.restrict_chat_member(chat_id, user_id, permissions)
 
         # DB से mute और tmute एंट्री हटाओ
-        db.execute_query(
-            "DELETE FROM group_restrictions WHERE chat_id = %s AND user_id = %s AND restriction_type IN ('mute', 'tmute')",
-            (chat_id, user_id)
-        )
+        await db.remove_restrictions(chat_id, user_id, 'mute', 'tmute')
+        expiry_scheduler.cancel(chat_id, user_id, 'tmute')
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"🔊 **उपयोगकर्ता अनम्यूट**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}",
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "unmute")
         await log_action(context, chat_id, "उपयोगकर्ता अनम्यूट", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा अनम्यूट किया गया")
 
     except Exception as e:
@@ -2183,14 +2014,18 @@ async def promote_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
             can_restrict_members=True,
             can_pin_messages=True
         )
+        # नया एडमिन: अगली जाँच पर सूची दोबारा लोड हो
+        admin_cache.invalidate(chat_id)
+        await db.publish_invalidation("admins", chat_id)
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"⬆️ **उपयोगकर्ता प्रमोट किया गया**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}",
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "promote")
         await log_action(context, chat_id, "उपयोगकर्ता प्रमोशन", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा प्रमोट किया गया")
 
     except Exception as e:
@@ -2221,14 +2056,17 @@ async def demote_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
             can_pin_messages=False,
             can_promote_members=False
         )
+        admin_cache.invalidate(chat_id)
+        await db.publish_invalidation("admins", chat_id)
 
-        if not db.get_group_setting(chat_id, 'silent_actions'):
+        if not await db.get_group_setting(chat_id, 'silent_actions'):
             await update.message.reply_text(
                 f"⬇️ **उपयोगकर्ता डिमोट किया गया**\n\n"
                 f"**उपयोगकर्ता:** {get_user_name(target_user)}",
                 parse_mode=ParseMode.MARKDOWN
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "demote")
         await log_action(context, chat_id, "उपयोगकर्ता डिमोशन", f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा डिमोट किया गया")
 
     except Exception as e:
@@ -2238,7 +2076,7 @@ async def demote_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def list_admins(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     try:
-        admins = await context.bot.get_chat_administrators(chat_id)
+        admins = list((await admin_cache.get_admins(context.bot, chat_id)).values())
 
         admin_list = "👥 **समूह प्रशासक:**\n\n"
         lines = []
@@ -2268,7 +2106,7 @@ async def set_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     welcome_message = " ".join(context.args)
-    db.set_group_setting(update.effective_chat.id, 'welcome_message', welcome_message)
+    await db.set_group_setting(update.effective_chat.id, 'welcome_message', welcome_message)
 
     await update.message.reply_text(
         f"✅ **स्वागत संदेश सेट!**\n\n**पूर्वावलोकन:** {welcome_message}",
@@ -2282,7 +2120,7 @@ async def set_goodbye(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ उपयोग: `/setgoodbye <message>`")
 
     goodbye_message = " ".join(context.args)
-    db.set_group_setting(update.effective_chat.id, 'goodbye_message', goodbye_message)
+    await db.set_group_setting(update.effective_chat.id, 'goodbye_message', goodbye_message)
 
     await update.message.reply_text(
         f"✅ **अलविदा संदेश सेट!**\n\n**पूर्वावलोकन:** {goodbye_message}",
@@ -2296,19 +2134,19 @@ async def set_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ उपयोग: `/setrules <rules text>`")
 
     rules = " ".join(context.args)
-    db.set_group_setting(update.effective_chat.id, 'rules', rules)
+    await db.set_group_setting(update.effective_chat.id, 'rules', rules)
 
     await update.message.reply_text("✅ **समूह के नियम सेट!** `/rules` का उपयोग करके उन्हें प्रदर्शित करें।")
 
 @rate_limit
 async def show_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    rules = db.get_group_setting(chat_id, 'rules')
+    rules = await db.get_group_setting(chat_id, 'rules')
 
     if not rules:
         return await update.message.reply_text("❌ इस समूह के लिए कोई नियम सेट नहीं किए गए हैं।")
 
-    private_rules = db.get_group_setting(chat_id, 'private_rules')
+    private_rules = await db.get_group_setting(chat_id, 'private_rules')
     is_private_chat = update.effective_chat.type == 'private'
 
     if private_rules and not is_private_chat:
@@ -2337,7 +2175,7 @@ async def private_rules(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ उपयोग: `/privaterules <on/off>`")
 
     setting = context.args[0].lower() == "on"
-    db.set_group_setting(update.effective_chat.id, "private_rules", setting)
+    await db.set_group_setting(update.effective_chat.id, "private_rules", setting)
 
     await update.message.reply_text(f"✅ निजी नियम {'सक्षम' if setting else 'अक्षम'}!")
 
@@ -2353,23 +2191,12 @@ async def lock_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     lock_type = context.args[0].lower()
-    valid_types = [
-        'all', 'msg', 'media', 'sticker', 'gif', 'url', 'bots',
-        'forward', 'game', 'location', 'rtl', 'button', 'egame', 'inline'
-    ]
 
-    if lock_type not in valid_types:
+    if lock_type not in LOCK_BITS:
         return await update.message.reply_text("❌ अमान्य लॉक प्रकार!")
 
-    db.execute_query(
-        """
-        INSERT INTO locks (chat_id, lock_type, is_locked)
-        VALUES (%s, %s, TRUE)
-        ON CONFLICT (chat_id, lock_type)
-        DO UPDATE SET is_locked = TRUE
-        """,
-        (chat_id, lock_type)
-    )
+    if not await db.set_lock(chat_id, lock_type, True):
+        return await update.message.reply_text("❌ लॉक सेव करने में विफल।")
 
     await update.message.reply_text(f"🔒 **{lock_type.title()} बंद कर दिया गया!**")
 
@@ -2383,10 +2210,8 @@ async def unlock_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     lock_type = context.args[0].lower()
 
-    result = db.execute_query(
-        "DELETE FROM locks WHERE chat_id = %s AND lock_type = %s",
-        (chat_id, lock_type)
-    )
+    if not await db.set_lock(chat_id, lock_type, False):
+        return await update.message.reply_text("❌ लॉक हटाने में विफल।")
 
     await update.message.reply_text(f"🔓 **{lock_type.title()} खोल दिया गया!**")
 
@@ -2394,17 +2219,13 @@ async def unlock_content(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def show_locks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
 
-    locks = db.execute_query(
-        "SELECT lock_type FROM locks WHERE chat_id = %s AND is_locked = TRUE",
-        (chat_id,),
-        fetch='all'
-    )
+    mask = await db.get_lock_mask(chat_id)
 
-    if not locks:
+    if not mask:
         return await update.message.reply_text("🔓 वर्तमान में कोई सामग्री बंद नहीं है।")
 
     lock_list = "🔒 **बंद की गई सामग्री:**\n\n" + "\n".join(
-        [f"• {lock[0].title()}" for lock in locks]
+        [f"• {lock_type.title()}" for lock_type in LOCK_TYPES if mask & LOCK_BITS[lock_type]]
     )
 
     await update.message.reply_text(lock_list, parse_mode=ParseMode.MARKDOWN)
@@ -2422,16 +2243,9 @@ async def add_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
     trigger = context.args[0].lower()
     response = " ".join(context.args[1:])
     
-    # DB में फ़िल्टर जोड़ें या अपडेट करें
-    db.execute_query(
-        """
-        INSERT INTO filters (chat_id, trigger_word, response, created_by)
-        VALUES (%s, %s, %s, %s)
-        ON CONFLICT (chat_id, trigger_word)
-        DO UPDATE SET response = EXCLUDED.response
-        """,
-        (chat_id, trigger, response, admin_id)
-    )
+    # DB और कैश में फ़िल्टर जोड़ें या अपडेट करें
+    if not await db.add_filter(chat_id, trigger, response, admin_id):
+        return await update.message.reply_text("❌ फ़िल्टर सेव करने में विफल।")
     
     await update.message.reply_text(f"✅ **'{trigger}' के लिए फ़िल्टर जोड़ा गया**")
 
@@ -2444,11 +2258,9 @@ async def remove_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     trigger = context.args[0].lower()
     
-    # DB से फ़िल्टर हटाएं
-    db.execute_query(
-        "DELETE FROM filters WHERE chat_id = %s AND trigger_word = %s",
-        (update.effective_chat.id, trigger)
-    )
+    # DB और कैश से फ़िल्टर हटाएं
+    if not await db.remove_filter(update.effective_chat.id, trigger):
+        return await update.message.reply_text("❌ फ़िल्टर हटाने में विफल।")
     
     await update.message.reply_text(f"✅ **फ़िल्टर '{trigger}' हटा दिया गया**")
 
@@ -2457,17 +2269,13 @@ async def remove_filter(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def list_filters(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     
-    # DB से फ़िल्टर लाएं
-    filters_list = db.execute_query(
-        "SELECT trigger_word FROM filters WHERE chat_id = %s",
-        (chat_id,),
-        fetch='all'
-    )
+    # कैश (या DB) से फ़िल्टर लाएं
+    chat_filters = await db.get_chat_filters(chat_id)
     
-    if not filters_list:
+    if not chat_filters.responses:
         return await update.message.reply_text("❌ इस समूह के लिए कोई फ़िल्टर सेट नहीं हैं।")
     
-    filter_text = "🎯 **सक्रिय फिल्टर:**\n\n" + "\n".join([f"• {f[0]}" for f in filters_list])
+    filter_text = "🎯 **सक्रिय फिल्टर:**\n\n" + "\n".join([f"• {f}" for f in sorted(chat_filters.responses)])
     
     await update.message.reply_text(filter_text, parse_mode=ParseMode.MARKDOWN)
 
@@ -2488,38 +2296,31 @@ async def warn_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ चेतावनी देने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
 
     try:
-        # DB में चेतावनी जोड़ें
-        db.execute_query(
-            "INSERT INTO warnings (chat_id, user_id, reason, warned_by) VALUES (%s, %s, %s, %s)",
-            (chat_id, user_id, reason, admin_user.id)
-        )
-
-        # कुल चेतावनियाँ गिनें
-        warns = db.execute_query(
-            "SELECT COUNT(*) FROM warnings WHERE chat_id = %s AND user_id = %s",
-            (chat_id, user_id),
-            fetch='one'
-        )
-        warn_count = warns[0] if warns else 0
+        # चेतावनी जोड़ें और नई गिनती एक ही स्टेटमेंट में पाएं
+        warn_count = await db.add_warning(chat_id, user_id, reason, admin_user.id)
+        if warn_count is None:
+            return await update.message.reply_text("❌ उपयोगकर्ता को चेतावनी देने में विफल।")
 
         # उपयोगकर्ता को संदेश भेजें
         await update.message.reply_text(
-            f"⚠️ **उपयोगकर्ता को चेतावनी दी गई** ({warn_count}/3)\n\n"
+            f"⚠️ **उपयोगकर्ता को चेतावनी दी गई** ({warn_count}/{WARN_LIMIT})\n\n"
             f"**उपयोगकर्ता:** {get_user_name(target_user)}\n"
             f"**कारण:** {reason}",
             parse_mode=ParseMode.MARKDOWN
         )
 
-        # 3 चेतावनियों पर स्वतः प्रतिबंधित
-        if warn_count >= 3:
+        # WARN_LIMIT चेतावनियों पर स्वतः प्रतिबंधित
+        if warn_count >= WARN_LIMIT:
             await context.bot.ban_chat_member(chat_id, user_id)
+            audit_log.record(chat_id, user_id, admin_user.id, "ban", f"{WARN_LIMIT} चेतावनियाँ")
             await update.message.reply_text(
-                "🔨 **3 चेतावनियों तक पहुंचने पर उपयोगकर्ता स्वतः प्रतिबंधित हो गया!**"
+                f"🔨 **{WARN_LIMIT} चेतावनियों तक पहुंचने पर उपयोगकर्ता स्वतः प्रतिबंधित हो गया!**"
             )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "warn", reason)
         await log_action(
             context, chat_id, "उपयोगकर्ता चेतावनी",
-            f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा चेतावनी दी गई: {reason} (चेतावनी {warn_count}/3)"
+            f"उपयोगकर्ता {user_id} को {admin_user.id} द्वारा चेतावनी दी गई: {reason} (चेतावनी {warn_count}/{WARN_LIMIT})"
         )
     except Exception as e:
         await update.message.reply_text(f"❌ उपयोगकर्ता को चेतावनी देने में विफल: {e}")
@@ -2540,11 +2341,9 @@ async def remove_warn(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ चेतावनी हटाने के लिए उपयोगकर्ता की पहचान नहीं हो सकी।")
 
     try:
-        # DB से सभी चेतावनियाँ हटाएं
-        db.execute_query(
-            "DELETE FROM warnings WHERE chat_id = %s AND user_id = %s",
-            (chat_id, user_id)
-        )
+        # DB से सभी चेतावनियाँ और उनकी गिनती हटाएं
+        if not await db.clear_warnings(chat_id, user_id):
+            return await update.message.reply_text("❌ चेतावनियाँ हटाने में विफल।")
 
         await update.message.reply_text(
             f"✅ **उपयोगकर्ता से सभी चेतावनियाँ हटा दी गईं**\n\n"
@@ -2552,6 +2351,7 @@ async def remove_warn(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode=ParseMode.MARKDOWN
         )
 
+        audit_log.record(chat_id, user_id, admin_user.id, "unwarn")
         await log_action(
             context, chat_id, "चेतावनियाँ साफ़ की गईं",
             f"उपयोगकर्ता {user_id} के लिए सभी चेतावनियाँ {admin_user.id} द्वारा साफ़ की गईं"
@@ -2568,19 +2368,15 @@ async def check_warns(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not user_id:
         return await update.message.reply_text("❌ उपयोगकर्ता की पहचान नहीं हो सकी।")
 
-    # DB से चेतावनियाँ लाएं
-    warnings = db.execute_query(
-        "SELECT reason FROM warnings WHERE chat_id = %s AND user_id = %s",
-        (update.effective_chat.id, user_id),
-        fetch='all'
-    )
+    # गिनती warn_counts से, कारण warnings से — एक ही क्वेरी में
+    warn_count, reasons = await db.get_warnings(update.effective_chat.id, user_id)
 
-    if not warnings:
+    if not warn_count:
         return await update.message.reply_text("✅ इस उपयोगकर्ता के लिए कोई चेतावनी नहीं मिली।")
 
     warn_text = (
-        f"⚠️ **{get_user_name(target_user)} के लिए चेतावनियाँ** ({len(warnings)}/3)\n\n" +
-        "\n".join([f"**{i+1}.** {reason[0]}" for i, reason in enumerate(warnings)])
+        f"⚠️ **{get_user_name(target_user)} के लिए चेतावनियाँ** ({warn_count}/{WARN_LIMIT})\n\n" +
+        "\n".join([f"**{i+1}.** {reason}" for i, reason in enumerate(reasons)])
     )
 
     await update.message.reply_text(warn_text, parse_mode=ParseMode.MARKDOWN)
@@ -2593,7 +2389,7 @@ async def clean_service(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ उपयोग: `/cleanservice <on/off>`")
     
     setting = context.args[0].lower() == 'on'
-    db.set_group_setting(update.effective_chat.id, 'clean_service', setting)
+    await db.set_group_setting(update.effective_chat.id, 'clean_service', setting)
     
     await update.message.reply_text(
         f"✅ सेवा संदेश सफाई {'सक्षम' if setting else 'अक्षम'}!"
@@ -2607,7 +2403,7 @@ async def silent_actions(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ उपयोग: `/silent <on/off>`")
     
     setting = context.args[0].lower() == 'on'
-    db.set_group_setting(update.effective_chat.id, 'silent_actions', setting)
+    await db.set_group_setting(update.effective_chat.id, 'silent_actions', setting)
     
     await update.message.reply_text(
         f"✅ मूक क्रियाएँ {'सक्षम' if setting else 'अक्षम'}!"
@@ -2621,12 +2417,257 @@ async def clean_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("❌ उपयोग: `/cleanwelcome <on/off>`")
     
     setting = context.args[0].lower() == 'on'
-    db.set_group_setting(update.effective_chat.id, 'clean_welcome', setting)
+    await db.set_group_setting(update.effective_chat.id, 'clean_welcome', setting)
     
     await update.message.reply_text(
         f"✅ स्वागत संदेश की सफाई {'सक्षम' if setting else 'अक्षम'}!"
     )
 
+@admin_required
+@rate_limit
+async def log_digest(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not context.args or context.args[0].lower() not in ['on', 'off']:
+        return await update.message.reply_text("❌ उपयोग: `/logdigest <on/off>`")
+
+    setting = context.args[0].lower() == 'on'
+    await db.set_group_setting(update.effective_chat.id, 'log_digest', setting)
+
+    await update.message.reply_text(
+        f"✅ लॉग digest {'सक्षम' if setting else 'अक्षम'}!"
+    )
+
+def get_target_user_id(message, args: List[str]) -> Optional[int]:
+    """उत्तर दिए गए संदेश या पहले argument (संख्यात्मक आईडी) से उपयोगकर्ता आईडी"""
+    if message.reply_to_message:
+        return message.reply_to_message.from_user.id
+    if args and args[0].lstrip("-").isdigit():
+        return int(args[0])
+    return None
+
+
+def format_audit_row(row: AuditRow) -> str:
+    created_at, chat_id, _, admin_id, action, reason, expires_at = row
+    line = f"`{to_utc(created_at):%Y-%m-%d %H:%M}` **{action}** · चैट `{chat_id}` · एडमिन `{admin_id}`"
+    if expires_at:
+        line += f" · `{to_utc(expires_at):%Y-%m-%d %H:%M}` तक"
+    if reason:
+        # कारण उपयोगकर्ता का टेक्स्ट है: बेमेल * या _ पूरा जवाब न तोड़ दे
+        line += f"\n   {escape_markdown(reason)}"
+    return line
+
+
+@admin_required
+@rate_limit
+async def audit_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """उपयोगकर्ता का मॉडरेशन इतिहास; /history <user> [all]
+
+    डिफ़ॉल्ट रूप से सिर्फ इस चैट का: किसी भी ग्रुप का एडमिन दूसरे ग्रुपों
+    का इतिहास न देख सके। `all` (सभी चैटें) सिर्फ BOT_OPERATOR_IDS के लिए।
+    """
+    message = update.effective_message
+    args = list(context.args or [])
+    everywhere = bool(args) and args[-1].lower() == "all"
+    if everywhere:
+        args.pop()
+        if update.effective_user.id not in BOT_OPERATOR_IDS:
+            return await message.reply_text("⛔ सभी चैटों का इतिहास सिर्फ बॉट ऑपरेटर देख सकते हैं।")
+    user_id = get_target_user_id(message, args)
+    if user_id is None:
+        return await message.reply_text("❌ उपयोग: `/history <user id या उत्तर> [all]`", parse_mode=ParseMode.MARKDOWN)
+
+    chat_id = None if everywhere else update.effective_chat.id
+    rows = await db.get_audit_history(user_id, chat_id)
+    if rows is None:
+        return await message.reply_text("❌ इतिहास लोड नहीं हो सका।")
+    # अभी बफ़र में पड़ी (न लिखी गई) घटनाएँ भी दिखें
+    rows = (audit_log.pending(user_id, chat_id) + rows)[:AUDIT_HISTORY_LIMIT]
+    if not rows:
+        return await message.reply_text("ℹ️ इस उपयोगकर्ता का कोई मॉडरेशन इतिहास नहीं है।")
+
+    scope = "सभी चैटों में" if everywhere else "इस चैट में"
+    await message.reply_text(
+        f"📜 **`{user_id}` का इतिहास ({scope})**\n\n" + "\n".join(format_audit_row(row) for row in rows),
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+# --- फ़ेडरेशन ---
+@rate_limit
+async def new_federation(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/newfed <name> — बनाने वाला फ़ेडरेशन का मालिक"""
+    fed_name = " ".join(context.args or []).strip()
+    if not fed_name:
+        return await update.message.reply_text("❌ उपयोग: `/newfed <name>`", parse_mode=ParseMode.MARKDOWN)
+
+    fed_id = await db.create_federation(fed_name[:100], update.effective_user.id)
+    if fed_id is None:
+        return await update.message.reply_text("❌ फ़ेडरेशन नहीं बनाया जा सका।")
+    await update.message.reply_text(
+        f"🌐 **फ़ेडरेशन बनाया गया:** {fed_name}\n\n"
+        f"**Fed ID:** `{fed_id}`\n"
+        f"ग्रुप जोड़ने के लिए ग्रुप ओनर `/joinfed {fed_id}` भेजें।",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@owner_required
+@rate_limit
+async def join_federation(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not context.args:
+        return await update.message.reply_text("❌ उपयोग: `/joinfed <fed_id>`", parse_mode=ParseMode.MARKDOWN)
+
+    federation = await db.get_federation(context.args[0])
+    if federation is None:
+        return await update.message.reply_text("❌ फ़ेडरेशन लोड नहीं हो सका।")
+    if not federation:
+        return await update.message.reply_text("❌ इस आईडी का कोई फ़ेडरेशन नहीं है।")
+
+    await db.set_group_setting(update.effective_chat.id, 'federation_id', federation["fed_id"])
+    await update.message.reply_text(f"✅ यह ग्रुप फ़ेडरेशन **{federation['fed_name']}** में जुड़ गया!",
+                                    parse_mode=ParseMode.MARKDOWN)
+
+
+@owner_required
+@rate_limit
+async def leave_federation(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    if not await db.get_group_setting(chat_id, 'federation_id'):
+        return await update.message.reply_text("ℹ️ यह ग्रुप किसी फ़ेडरेशन में नहीं है।")
+    await db.set_group_setting(chat_id, 'federation_id', None)
+    await update.message.reply_text("✅ ग्रुप ने फ़ेडरेशन छोड़ दिया।")
+
+
+@rate_limit
+async def federation_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/fedinfo [fed_id] — बिना आईडी के इस ग्रुप का फ़ेडरेशन"""
+    fed_id = context.args[0] if context.args else None
+    if fed_id is None and update.effective_chat.type != 'private':
+        fed_id = await db.get_group_setting(update.effective_chat.id, 'federation_id')
+    if not fed_id:
+        return await update.message.reply_text("❌ उपयोग: `/fedinfo <fed_id>`", parse_mode=ParseMode.MARKDOWN)
+
+    federation = await db.get_federation(fed_id)
+    if not federation:
+        return await update.message.reply_text("❌ फ़ेडरेशन नहीं मिला।")
+    chats = await db.get_federation_chats(fed_id)
+    bans = await db.count_fed_bans(fed_id)
+    await update.message.reply_text(
+        f"🌐 **फ़ेडरेशन जानकारी**\n\n"
+        f"**नाम:** {federation['fed_name']}\n"
+        f"**Fed ID:** `{fed_id}`\n"
+        f"**मालिक:** `{federation['owner_id']}`\n"
+        f"**ग्रुप:** {len(chats) if chats is not None else '?'}\n"
+        f"**प्रतिबंधित उपयोगकर्ता:** {bans if bans is not None else '?'}",
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+async def get_owned_federation(update: Update) -> Optional[Dict[str, Any]]:
+    """इस ग्रुप का फ़ेडरेशन, अगर भेजने वाला उसका मालिक है; वरना जवाब देकर None"""
+    fed_id = None
+    if update.effective_chat.type != 'private':
+        fed_id = await db.get_group_setting(update.effective_chat.id, 'federation_id')
+    if not fed_id:
+        await update.message.reply_text("❌ यह ग्रुप किसी फ़ेडरेशन में नहीं है।")
+        return None
+    federation = await db.get_federation(fed_id)
+    if not federation:
+        await update.message.reply_text("❌ फ़ेडरेशन लोड नहीं हो सका।")
+        return None
+    if federation["owner_id"] != update.effective_user.id:
+        await update.message.reply_text("⛔ यह कमांड सिर्फ फ़ेडरेशन के मालिक के लिए है।")
+        return None
+    return federation
+
+
+@send_priority(PRIORITY_MODERATION)
+@rate_limit
+async def fed_ban(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/fban <user> [reason] — फ़ेडरेशन के हर ग्रुप से प्रतिबंध"""
+    federation = await get_owned_federation(update)
+    if federation is None:
+        return
+    args = list(context.args or [])
+    user_id = get_target_user_id(update.message, args)
+    if user_id is None:
+        return await update.message.reply_text("❌ उपयोग: `/fban <user id या उत्तर> [कारण]`", parse_mode=ParseMode.MARKDOWN)
+    reason_args = args if update.message.reply_to_message else args[1:]
+    reason = " ".join(reason_args) or "कोई कारण नहीं दिया गया"
+
+    fed_id, admin_id, chat_id = federation["fed_id"], update.effective_user.id, update.effective_chat.id
+    if not await db.add_fed_ban(fed_id, user_id, reason, admin_id):
+        return await update.message.reply_text("❌ फ़ेडरेशन बैन दर्ज नहीं हो सका।")
+    job_id = await fed_propagator.submit(fed_id, user_id, "fban", reason, admin_id, chat_id)
+    if job_id is None:
+        return await update.message.reply_text("❌ बैन दर्ज हुआ, पर ग्रुपों में लागू करने का काम शुरू नहीं हो सका।")
+
+    audit_log.record(chat_id, user_id, admin_id, "fban", reason)
+    await update.message.reply_text(
+        f"🌐 **फ़ेडरेशन बैन**\n\n"
+        f"**उपयोगकर्ता:** `{user_id}`\n"
+        f"**फ़ेडरेशन:** {federation['fed_name']}\n"
+        f"**कारण:** {reason}\n\n"
+        f"सभी ग्रुपों में लागू हो रहा है (काम #{job_id}, `/fedstatus {job_id}`)।",
+        parse_mode=ParseMode.MARKDOWN
+    )
+    await log_action(context, chat_id, "फ़ेडरेशन बैन", f"{user_id} fed-प्रतिबंधित by {admin_id}: {reason}")
+
+
+@send_priority(PRIORITY_MODERATION)
+@rate_limit
+async def fed_unban(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unfban <user> — फ़ेडरेशन बैन हटाएं और हर ग्रुप में अनबैन"""
+    federation = await get_owned_federation(update)
+    if federation is None:
+        return
+    user_id = get_target_user_id(update.message, list(context.args or []))
+    if user_id is None:
+        return await update.message.reply_text("❌ उपयोग: `/unfban <user id या उत्तर>`", parse_mode=ParseMode.MARKDOWN)
+
+    fed_id, admin_id, chat_id = federation["fed_id"], update.effective_user.id, update.effective_chat.id
+    if not await db.remove_fed_ban(fed_id, user_id):
+        return await update.message.reply_text("❌ फ़ेडरेशन बैन हटाया नहीं जा सका।")
+    job_id = await fed_propagator.submit(fed_id, user_id, "unfban", None, admin_id, chat_id)
+    if job_id is None:
+        return await update.message.reply_text("❌ बैन हटा, पर ग्रुपों में अनबैन का काम शुरू नहीं हो सका।")
+
+    audit_log.record(chat_id, user_id, admin_id, "unfban")
+    await update.message.reply_text(
+        f"✅ `{user_id}` का फ़ेडरेशन बैन हटाया गया; सभी ग्रुपों में अनबैन हो रहा है "
+        f"(काम #{job_id}, `/fedstatus {job_id}`)।",
+        parse_mode=ParseMode.MARKDOWN
+    )
+    await log_action(context, chat_id, "फ़ेडरेशन अनबैन", f"{user_id} fed-अप्रतिबंधित by {admin_id}")
+
+
+@rate_limit
+async def fed_job_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/fedstatus <job_id> — fban/unfban काम की प्रगति"""
+    if not context.args or not context.args[0].isdigit():
+        return await update.message.reply_text("❌ उपयोग: `/fedstatus <job_id>`", parse_mode=ParseMode.MARKDOWN)
+    job_id = int(context.args[0])
+
+    status = fed_propagator.progress(job_id) or await db.get_fed_job_status(job_id)
+    if status is None:
+        return await update.message.reply_text("❌ काम की स्थिति लोड नहीं हो सकी।")
+    if not status:
+        return await update.message.reply_text("❌ इस आईडी का कोई काम नहीं है।")
+    # काम का ब्योरा (यूज़र, ग्रुपों की गिनती) सिर्फ उसके फ़ेडरेशन का मालिक देखे
+    federation = await db.get_federation(status["fed_id"])
+    if not federation:
+        return await update.message.reply_text("❌ फ़ेडरेशन लोड नहीं हो सका।")
+    if federation["owner_id"] != update.effective_user.id:
+        return await update.message.reply_text("⛔ यह कमांड सिर्फ फ़ेडरेशन के मालिक के लिए है।")
+
+    results = status["results"]
+    lines = [
+        f"🌐 **काम #{job_id}** ({status['action']} `{status['user_id']}`)",
+        f"**स्थिति:** {'पूरा' if status['finished'] else 'चल रहा है'}",
+        f"**सफल:** {results.get('ok', 0)} · **विफल:** {results.get('failed', 0)}",
+    ]
+    if "total" in status:
+        lines.append(f"**प्रगति:** {status['done']}/{status['total']} ग्रुप")
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.MARKDOWN)
+
 # --- उपयोगिता कमांड ---
 @rate_limit
 async def user_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2652,12 +2693,8 @@ async def user_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if update.effective_chat.type != 'private':
             member = await context.bot.get_chat_member(update.effective_chat.id, user_id)
             info_text += f"**स्थिति:** {member.status.title()}\n"
-            warns = db.execute_query(
-                "SELECT COUNT(*) FROM warnings WHERE chat_id = %s AND user_id = %s",
-                (update.effective_chat.id, user_id),
-                fetch='one'
-            )
-            info_text += f"**चेतावनी:** {warns[0] if warns else 0}/3\n"
+            warn_count = await db.get_warn_count(update.effective_chat.id, user_id)
+            info_text += f"**चेतावनी:** {warn_count}/{WARN_LIMIT}\n"
 
         await update.message.reply_text(info_text, parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
@@ -2671,26 +2708,29 @@ async def report_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     reporter = update.effective_user
     reported_msg = update.message.reply_to_message
-    chat_id_str = str(update.effective_chat.id).replace('-100', '')
-    
+    chat_id = update.effective_chat.id
+    chat_id_str = str(chat_id).replace('-100', '')
+
+    if report_dispatcher.is_duplicate(chat_id, reported_msg.message_id):
+        return await update.message.reply_text("ℹ️ यह संदेश पहले ही रिपोर्ट हो चुका है।")
+
     report_text = (
         f"🚨 **संदेश रिपोर्ट किया गया**\n\n"
         f"**रिपोर्टर:** {reporter.first_name} (@{reporter.username})\n"
         f"**रिपोर्ट किया गया उपयोगकर्ता:** {reported_msg.from_user.first_name}\n"
         f"**संदेश लिंक:** [संदेश पर जाएं](https://t.me/c/{chat_id_str}/{reported_msg.message_id})"
     )
-    
+
     try:
-        admins = await context.bot.get_chat_administrators(update.effective_chat.id)
-        for admin in admins:
-            if not admin.user.is_bot:
-                try:
-                    await context.bot.send_message(admin.user.id, report_text, parse_mode=ParseMode.MARKDOWN)
-                except:
-                    pass
-        await update.message.reply_text("✅ **रिपोर्ट एडमिन्स को भेज दी गई है!**")
+        admins = await admin_cache.get_admins(context.bot, chat_id)
     except Exception as e:
-        await update.message.reply_text(f"❌ रिपोर्ट भेजने में विफल: {e}")
+        return await update.message.reply_text(f"❌ रिपोर्ट भेजने में विफल: {e}")
+
+    # DM बैकग्राउंड में जाती हैं; यह अपडेट उनका इंतज़ार नहीं करता
+    admin_ids = [admin.user.id for admin in admins.values() if not admin.user.is_bot]
+    if not report_dispatcher.submit(chat_id, reported_msg.message_id, admin_ids, report_text):
+        return await update.message.reply_text("⏳ अभी बहुत सारी रिपोर्टें कतार में हैं, थोड़ी देर बाद फिर कोशिश करें।")
+    await update.message.reply_text("✅ **रिपोर्ट एडमिन्स को भेज दी गई है!**")
 
 
 @rate_limit
@@ -2720,16 +2760,106 @@ async def get_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await update.message.reply_text(id_text, parse_mode=ParseMode.MARKDOWN)
 
+
+@operator_required
+@rate_limit
+async def db_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """डेटाबेस पूल और कैश के आँकड़े दिखाएं"""
+    sections = {
+        "🗄️ **डेटाबेस पूल**": db.pool_stats(),
+        "⚙️ **सेटिंग्स कैश**": db.group_settings.stats(),
+        "🎯 **फ़िल्टर कैश**": db.filter_cache.stats(),
+        "🔒 **लॉक कैश**": db.lock_cache.stats(),
+        "🚫 **Fed-ban इंडेक्स**": db.fed_ban_index.stats(),
+        "👮 **एडमिन कैश**": admin_cache.stats(),
+        "📡 **कैश invalidation**": db.invalidations,
+        "⏳ **रेट लिमिट**": rate_limiter.stats(),
+        "⏰ **समाप्ति शेड्यूलर**": expiry_scheduler.stats(),
+        "🚨 **रिपोर्ट**": report_dispatcher.stats(),
+        "📜 **Audit log**": audit_log.stats(),
+        "📋 **लॉग चैनल**": log_aggregator.stats(),
+        "🌐 **फ़ेडरेशन बैन**": fed_propagator.stats(),
+    }
+    if isinstance(context.bot.rate_limiter, SendScheduler):
+        sections["📤 **आउटबाउंड कतार**"] = context.bot.rate_limiter.stats()
+    if isinstance(context.application.update_processor, ChatOrderedUpdateProcessor):
+        sections["📨 **अपडेट प्रोसेसर**"] = context.application.update_processor.stats()
+    stats_text = "\n\n".join(
+        title + "\n" + "\n".join(f"**{key}:** `{value}`" for key, value in stats.items())
+        for title, stats in sections.items()
+    )
+    await update.message.reply_text(stats_text, parse_mode=ParseMode.MARKDOWN)
+
+
+QUERY_STATS_ORDERS = ("total", "max", "count", "rows")
+
+
+@operator_required
+@rate_limit
+async def query_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """SQL fingerprint के हिसाब से सबसे महंगी क्वेरी; /querystats [total|max|count|rows|reset]"""
+    order = context.args[0].lower() if context.args else "total"
+    if order == "reset":
+        query_log.reset()
+        await update.message.reply_text("✅ क्वेरी आँकड़े रीसेट कर दिए गए।")
+        return
+    if order not in QUERY_STATS_ORDERS:
+        await update.message.reply_text(f"उपयोग: /querystats [{'|'.join(QUERY_STATS_ORDERS)}|reset]")
+        return
+
+    top = query_log.top(10, order)
+    if not top:
+        await update.message.reply_text("अभी कोई क्वेरी दर्ज नहीं हुई।")
+        return
+    lines = [
+        f"🐢 **सबसे महंगी क्वेरी ({order})**",
+        f"धीमी: `{query_log.slow}` | बजट पार: `{metrics.budget_exceeded}` | न गिनी: `{query_log.dropped}`",
+    ]
+    for row in top:
+        lines.append(
+            f"\n`{row['fingerprint'][:200]}`\n"
+            f"गिनती `{row['count']}` · कुल `{row['total'] * 1000:.0f} ms` · "
+            f"अधिकतम `{row['max'] * 1000:.1f} ms` · पंक्तियाँ `{row['rows']}` · त्रुटियाँ `{row['errors']}`"
+        )
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.MARKDOWN)
+
 # --- हैंडलर फंक्शंस ---
+@send_priority(PRIORITY_MODERATION)
+async def enforce_fed_ban(update: Update, context: ContextTypes.DEFAULT_TYPE, fed_id: str, member) -> bool:
+    """fed-banned सदस्य को हटाएं; हटाया गया हो तो True"""
+    if not await db.is_fed_banned(fed_id, member.id):
+        return False
+    chat_id = update.effective_chat.id
+    try:
+        await context.bot.ban_chat_member(chat_id, member.id)
+    except TelegramError as e:
+        logger.warning(f"{chat_id} में fed-banned {member.id} को हटाने में विफल: {e}")
+        return False
+    audit_log.record(chat_id, member.id, None, "fban", "फ़ेडरेशन बैन (join पर)")
+    await update.message.reply_text(
+        f"🌐 {get_user_name(member)} (`{member.id}`) इस ग्रुप के फ़ेडरेशन में प्रतिबंधित है, हटा दिया गया।",
+        parse_mode=ParseMode.MARKDOWN
+    )
+    return True
+
+
+@send_priority(PRIORITY_LOW)
 async def handle_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    welcome_message = db.get_group_setting(chat_id, 'welcome_message')
-    if not welcome_message:
+    # एक ही (कैश की हुई) पंक्ति से फ़ेडरेशन और स्वागत दोनों
+    settings = await db.get_group_settings(chat_id)
+    fed_id = settings.get('federation_id')
+    welcome_message = settings.get('welcome_message')
+    if not welcome_message and not fed_id:
         return
 
     for member in update.message.new_chat_members:
         if member.is_bot:
             continue
+        if fed_id and await enforce_fed_ban(update, context, fed_id, member):
+            continue
+        if not welcome_message:
+            continue
         
         formatted_message = welcome_message.format(
             first=member.first_name,
@@ -2743,78 +2873,141 @@ async def handle_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         welcome_msg = await update.message.reply_text(formatted_message, parse_mode=ParseMode.MARKDOWN)
         
-        if db.get_group_setting(chat_id, 'clean_welcome'):
+        if await db.get_group_setting(chat_id, 'clean_welcome'):
             context.job_queue.run_once(
                 lambda ctx: ctx.bot.delete_message(chat_id, welcome_msg.message_id), 60
             )
 
 
-async def handle_filters(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message or not update.message.text:
-        return
-    
-    chat_id = update.effective_chat.id
-    message_text = update.message.text.lower()
-    
-    all_filters = db.execute_query(
-        "SELECT trigger_word, response FROM filters WHERE chat_id = %s",
-        (chat_id,), fetch='all'
+class MessageContext:
+    """एक संदेश के लिए पाइपलाइन के सभी चरणों की साझा स्थिति"""
+
+    __slots__ = (
+        "update", "context", "message", "chat_id", "user_id",
+        "lock_mask", "chat_filters", "settings", "_admin_status",
     )
 
-    if all_filters:
-        for trigger, response in all_filters:
-            if trigger in message_text:
-                await update.message.reply_text(response)
-                break
+    def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                 lock_mask: int, chat_filters: ChatFilters, settings: Dict[str, Any]):
+        self.update = update
+        self.context = context
+        self.message = update.message
+        self.chat_id = update.effective_chat.id
+        self.user_id = update.effective_user.id if update.effective_user else None
+        self.lock_mask = lock_mask
+        self.chat_filters = chat_filters
+        self.settings = settings
+        self._admin_status = None
+
+    async def is_admin(self) -> bool:
+        """भेजने वाला एडमिन है? (ज़रूरत पड़ने पर ही, एक बार जाँचा जाता है)"""
+        if self._admin_status is None:
+            status = await get_admin_status(self.context.bot, self.chat_id, self.user_id)
+            self._admin_status = status or ""
+        return bool(self._admin_status)
+
+
+def classify_message(message) -> int:
+    """संदेश की सामग्री को लॉक बिट्स में बदलें"""
+    bits = LOCK_BITS['all']
+    if message.photo or message.video or message.audio or message.document:
+        bits |= LOCK_BITS['media']
+    if message.sticker:
+        bits |= LOCK_BITS['sticker']
+    if message.animation:
+        bits |= LOCK_BITS['gif']
+    if message.text and any(marker in message.text for marker in URL_MARKERS):
+        bits |= LOCK_BITS['url']
+    if message.forward_date:
+        bits |= LOCK_BITS['forward']
+    return bits
+
+
+async def enforce_locks(ctx: MessageContext) -> bool:
+    """बंद सामग्री वाला संदेश हटाएं; हटाया गया तो True (पाइपलाइन रुकती है)"""
+    # ज़्यादातर चैट में कोई लॉक नहीं: बिना किसी I/O के आगे बढ़ें
+    if not ctx.lock_mask or ctx.user_id is None:
+        return False
+
+    hit = ctx.lock_mask & classify_message(ctx.message)
+    if not hit:
+        return False
 
+    try:
+        if await ctx.is_admin():
+            return False
+    except Exception:
+        return False
+
+    # सबसे निचला बिट = सबसे ऊँची प्राथमिकता वाला लॉक
+    lock_type = LOCK_TYPES[(hit & -hit).bit_length() - 1]
+    reason = LOCK_REASONS.get(lock_type, lock_type)
+    chat_id = ctx.chat_id
 
-async def handle_locks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message:
-        return
-    
-    chat_id, user_id = update.effective_chat.id, update.effective_user.id
-    
     try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        if member.status in ['administrator', 'creator']:
-            return
+        await ctx.message.delete()
+        if not ctx.settings.get('silent_actions'):
+            warn_msg = await ctx.context.bot.send_message(chat_id, f"🔒 {reason} इस समूह में बंद है!")
+            ctx.context.job_queue.run_once(
+                lambda job_ctx: job_ctx.bot.delete_message(chat_id, warn_msg.message_id), 5
+            )
     except Exception:
+        pass
+    return True
+
+
+async def apply_filters(ctx: MessageContext) -> bool:
+    """टेक्स्ट पर फ़िल्टर का जवाब भेजें"""
+    if not ctx.message.text:
+        return False
+
+    # compiled matcher: एक ही पास में सभी ट्रिगर्स की जाँच, DB क्वेरी के बिना
+    response = ctx.chat_filters.match(ctx.message.text.lower())
+    if response:
+        await ctx.message.reply_text(response)
+    return False
+
+
+# हर संदेश पर क्रम से चलने वाले चरण; कोई चरण True लौटाए तो बाकी छोड़ दिए जाते हैं
+MESSAGE_STAGES = (enforce_locks, apply_filters)
+
+
+@send_priority(PRIORITY_LOW)
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """सभी गैर-कमांड संदेशों के लिए एक-पास मॉडरेशन पाइपलाइन"""
+    if not update.message or not update.effective_chat:
         return
-    
-    locks = db.execute_query(
-        "SELECT lock_type FROM locks WHERE chat_id = %s AND is_locked = TRUE",
-        (chat_id,), fetch='all'
+
+    chat_id = update.effective_chat.id
+    # चैट की स्थिति एक बार में (ज़्यादातर कैश से) लाएं और सभी चरणों में साझा करें
+    lock_mask, chat_filters, settings = await asyncio.gather(
+        db.get_lock_mask(chat_id),
+        db.get_chat_filters(chat_id),
+        db.get_group_settings(chat_id),
     )
-    if not locks:
+    ctx = MessageContext(update, context, lock_mask, chat_filters, settings)
+
+    for stage in MESSAGE_STAGES:
+        if await stage(ctx):
+            break
+
+async def handle_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """ChatMemberUpdated इवेंट से एडमिन कैश ताज़ा रखें"""
+    member_update = update.chat_member or update.my_chat_member
+    if not member_update:
         return
-    
-    locked_types = [lock[0] for lock in locks]
-    message = update.message
-    delete, reason = False, ""
-    
-    if 'all' in locked_types:
-        delete, reason = True, "सभी सामग्री"
-    elif 'media' in locked_types and (message.photo or message.video or message.audio or message.document):
-        delete, reason = True, "मीडिया"
-    elif 'sticker' in locked_types and message.sticker:
-        delete, reason = True, "स्टिकर"
-    elif 'gif' in locked_types and message.animation:
-        delete, reason = True, "GIFs"
-    elif 'url' in locked_types and any(x in (message.text or "") for x in ['http', 'www.', '.com', '.net', '.org']):
-        delete, reason = True, "URLs"
-    elif 'forward' in locked_types and message.forward_date:
-        delete, reason = True, "फॉरवर्ड किए गए संदेश"
-
-    if delete:
-        try:
-            await message.delete()
-            if not db.get_group_setting(chat_id, 'silent_actions'):
-                warn_msg = await context.bot.send_message(chat_id, f"🔒 {reason} इस समूह में बंद है!")
-                context.job_queue.run_once(
-                    lambda ctx: ctx.bot.delete_message(chat_id, warn_msg.message_id), 5
-                )
-        except Exception:
-            pass
+
+    chat_id = member_update.chat.id
+    new_member = member_update.new_chat_member
+    if update.my_chat_member and new_member.status in ("left", "kicked"):
+        # बॉट हटाया गया: इस चैट की सूची रखने का कोई मतलब नहीं
+        admin_cache.invalidate(chat_id)
+        await db.publish_invalidation("admins", chat_id)
+        return
+    admin_cache.apply(chat_id, new_member)
+    if member_update.old_chat_member.status in ADMIN_STATUSES or new_member.status in ADMIN_STATUSES:
+        # एडमिन सूची बदली: दूसरे प्रोसेसों की कैश की हुई सूची पुरानी है
+        await db.publish_invalidation("admins", chat_id)
 
 # --- एरर हैंडलर ---
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -2871,18 +3064,74 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             pass
 
 # --- मुख्य फ़ंक्शन ---
-async def main():
-    """बॉट शुरू करें।"""
-    if not BOT_TOKEN:
-        return logger.error("BOT_TOKEN एनवायरनमेंट वेरिएबल में नहीं मिला!")
-    if not DATABASE_URL:
-        return logger.error("DATABASE_URL एनवायरनमेंट वेरिएबल में नहीं मिला!")
-
-    # डेटाबेस इनिशियलाइज़ करें
-    db.init_db()
-
-    # Telegram Application बनाएँ
-    application = Application.builder().token(BOT_TOKEN).build()
+async def start_background(application: Application):
+    """बॉट शुरू होने पर बैकग्राउंड काम (समाप्ति शेड्यूलर) चालू करें"""
+    expiry_scheduler.start(application.bot)
+    audit_log.start()
+    report_dispatcher.start(application.bot)
+    log_aggregator.start(application.bot)
+    fed_propagator.start(application.bot)
+    if db.subscribe_invalidations():
+        logger.info("दूसरे प्रोसेसों के कैश invalidation संदेश सुन रहे हैं")
+    elif WORKERS > 1:
+        # दूसरे worker का /fban इस प्रोसेस के इंडेक्स तक नहीं पहुँचेगा
+        db.fed_ban_index.enabled = False
+        logger.warning("invalidation सुनना संभव नहीं: fed-ban जाँच हर join पर DB से होगी")
+    db.load_fed_bans()
+
+
+async def close_db(application: Application):
+    """बंद होते समय बैकग्राउंड काम रोकें और पूल के कनेक्शन छोड़ें"""
+    await expiry_scheduler.stop()
+    await audit_log.stop()
+    await db.storage.unsubscribe()
+    db.close()
+
+
+async def start_application(application: Application):
+    """run_polling/run_webhook के बिना Application चालू करें (main.py और shard.py)"""
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+
+
+async def stop_application(application: Application):
+    """पहले नए अपडेट बंद करें, फिर कतार में बचे अपडेट पूरे होने दें"""
+    if application.updater and application.updater.running:
+        await application.updater.stop()
+    await application.stop()
+    # shutdown के बाद bot भेज नहीं सकता, इसलिए बची रिपोर्ट DM और लॉग उससे पहले
+    await fed_propagator.stop()
+    await report_dispatcher.stop()
+    await log_aggregator.stop()
+    await application.shutdown()
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+def build_application(webhook: bool = False, request: Optional[BaseRequest] = None,
+                      send_scheduler: Optional[SendScheduler] = None) -> Application:
+    """सभी हैंडलर्स के साथ Telegram Application बनाएँ
+
+    webhook मोड में Updater नहीं बनता; अपडेट main.py का HTTP सर्वर
+    application.update_queue में डालता है। request सिर्फ bench.py के लिए है
+    (नकली Bot API); send_scheduler bench.py (बिना flood limit) और shard.py
+    (global बजट का worker वाला हिस्सा) देते हैं।
+    """
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .rate_limiter(send_scheduler or SendScheduler())
+        .concurrent_updates(ChatOrderedUpdateProcessor(UPDATE_CONCURRENCY))
+        .post_init(start_background)
+        .post_shutdown(close_db)
+    )
+    if request is not None:
+        builder = builder.request(request)
+    if webhook:
+        builder = builder.updater(None)
+    application = builder.build()
 
     # --- हैंडलर्स जोड़ें ---
     # उपयोगकर्ता प्रबंधन
@@ -2920,29 +3169,43 @@ async def main():
     application.add_handler(CommandHandler("warn", warn_user))
     application.add_handler(CommandHandler(["unwarn", "rmwarn"], remove_warn))
     application.add_handler(CommandHandler("warns", check_warns))
+    application.add_handler(CommandHandler("history", audit_history))
 
     # सेटिंग्स
     application.add_handler(CommandHandler("cleanservice", clean_service))
     application.add_handler(CommandHandler("silent", silent_actions))
     application.add_handler(CommandHandler("cleanwelcome", clean_welcome))
+    application.add_handler(CommandHandler("logdigest", log_digest))
+
+    # फ़ेडरेशन
+    application.add_handler(CommandHandler("newfed", new_federation))
+    application.add_handler(CommandHandler("joinfed", join_federation))
+    application.add_handler(CommandHandler("leavefed", leave_federation))
+    application.add_handler(CommandHandler("fedinfo", federation_info))
+    application.add_handler(CommandHandler("fban", fed_ban))
+    application.add_handler(CommandHandler("unfban", fed_unban))
+    application.add_handler(CommandHandler("fedstatus", fed_job_status))
 
     # उपयोगिताएँ
     application.add_handler(CommandHandler("info", user_info))
     application.add_handler(CommandHandler("report", report_user))
     application.add_handler(CommandHandler("kickme", kickme))
     application.add_handler(CommandHandler("id", get_id))
+    application.add_handler(CommandHandler("dbstats", db_stats))
+    application.add_handler(CommandHandler("querystats", query_stats))
 
     # संदेश और कॉलबैक हैंडलर्स
     application.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, handle_new_member))
-    application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), handle_filters))
-    application.add_handler(MessageHandler(filters.ALL & (~filters.COMMAND), handle_locks))
+    application.add_handler(MessageHandler(filters.ALL & (~filters.COMMAND), handle_message))
     application.add_handler(CallbackQueryHandler(handle_callback_query))
+    application.add_handler(ChatMemberHandler(handle_chat_member, ChatMemberHandler.ANY_CHAT_MEMBER))
+
+    # हर हैंडलर का समय, त्रुटियाँ और DB/API गिनती (/metrics पर)
+    for group in application.handlers.values():
+        for handler in group:
+            handler.callback = metrics.instrument(handler.callback)
 
     # एरर हैंडलर
     application.add_error_handler(error_handler)
 
-    # --- बॉट शुरू करें ---
-    await application.run_polling()
-
-
-
+    return application
@@ -31,6 +31,9 @@ Select a category below to see available commands:
 • `/warn <user> [reason]` - Warn a user (3 warns = ban)
 • `/unwarn <user>` - Remove all warnings
 • `/warns [user]` - Check warnings
+
+**History:**
+• `/history <user> [all]` - Moderation history in this chat (`all`: every chat, bot operators only)
     """,
     "admin": """
 🛡️ **Admin Management Commands**
@@ -79,6 +82,7 @@ Admin commands require administrator privileges in the group.
 
 **Admin Logging:**
 • `/setlog` - Set log channel (use in private)
+• `/logdigest <on/off>` - Batch log messages into periodic digests
 • All admin actions are automatically logged
 
 **Log Categories:**
@@ -94,9 +98,13 @@ Admin commands require administrator privileges in the group.
 • `/newfed <name>` - Create new federation
 • `/joinfed <fed_id>` - Join group to federation
 • `/leavefed` - Leave current federation
-• `/fedinfo` - Show federation info
+• `/fedinfo [fed_id]` - Show federation info
+
+**Cross-Group Bans (federation owner):**
+• `/fban <user> [reason]` - Ban user in every member group
+• `/unfban <user>` - Lift the federation ban everywhere
+• `/fedstatus <job_id>` - Progress of a fban/unfban
 
-**Cross-Group Bans:**
 Federation bans are automatically shared across all member groups.
     """,
     "settings": """
@@ -1,21 +1,188 @@
 # main.py
-from threading import Thread
+"""
+एक ही asyncio प्रोसेस: Telegram webhook (या विकास के लिए polling), health और metrics routes
+
+WEBHOOK_URL सेट हो तो webhook मोड, वरना polling मोड। दोनों में PORT पर
+HTTP सर्वर health route और /metrics (Prometheus) देता है। webhook मोड में
+WORKERS > 1 हो तो यह प्रोसेस सिर्फ receiver है और अपडेट shard.py के worker
+प्रोसेस चलाते हैं।
+"""
 import asyncio
-from bot import main as bot_main  # async main
+import json
+import logging
+import signal
+
+from telegram import Bot, Update
+
+from bot import (
+    BOT_TOKEN,
+    DATABASE_URL,
+    PORT,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+    WORKERS,
+    build_application,
+    db,
+    start_application,
+    stop_application,
+)
+import metrics
+from shard import ShardedReceiver
+from webserver import HTTPServer, Request, Response
+
+logger = logging.getLogger(__name__)
+
+
+def make_webhook_handler(application):
+    """Telegram का POST पढ़कर अपडेट application की कतार में डालता है"""
+    async def telegram_webhook(request: Request) -> Response:
+        if request.headers.get("x-telegram-bot-api-secret-token") != WEBHOOK_SECRET:
+            return Response(403, "forbidden")
+        try:
+            update = Update.de_json(json.loads(request.body), application.bot)
+        except (ValueError, TypeError):
+            return Response(400, "invalid update")
+        # जवाब तुरंत; प्रोसेसिंग application के अपने tasks में होती है
+        await application.update_queue.put(update)
+        return Response(200)
+    return telegram_webhook
+
+
+def make_sharded_webhook_handler(receiver: ShardedReceiver):
+    """Telegram का POST चैट के worker की कतार में भेजता है"""
+    async def telegram_webhook(request: Request) -> Response:
+        if request.headers.get("x-telegram-bot-api-secret-token") != WEBHOOK_SECRET:
+            return Response(403, "forbidden")
+        try:
+            data = json.loads(request.body)
+            dispatched = receiver.dispatch(data, request.body)
+        except (ValueError, TypeError):
+            return Response(400, "invalid update")
+        # कतार भरी हो तो Telegram बाद में फिर भेजेगा
+        return Response(200) if dispatched else Response(503, "busy")
+    return telegram_webhook
+
+
+async def health(request: Request) -> Response:
+    return Response(200, "Bot is running!")
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """इस प्रोसेस के हैंडलर/अपडेट मेट्रिक्स, Prometheus text format में"""
+    return Response(200, metrics.render([({}, metrics.metrics.snapshot())]), metrics.CONTENT_TYPE)
+
+
+def make_sharded_metrics_handler(receiver: ShardedReceiver):
+    """हर worker के मेट्रिक्स worker label के साथ, और receiver की अपनी गिनती"""
+    async def metrics_endpoint(request: Request) -> Response:
+        snapshots = receiver.collect_metrics()
+        queued = receiver.queued()
+        gauges = {
+            "bot_receiver_dispatched_total": ("workers को भेजे गए अपडेट", receiver.stats["dispatched"]),
+            "bot_receiver_dropped_total": ("कतार भरी होने से लौटाए गए अपडेट", receiver.stats["dropped"]),
+            "bot_receiver_worker_restarts_total": ("फिर शुरू किए गए worker", receiver.stats["restarts"]),
+            "bot_receiver_queued": ("workers की कतारों में कुल अपडेट", sum(size for size in queued if size > 0)),
+        }
+        sources = [({"worker": index}, snapshot) for index, snapshot in sorted(snapshots.items())]
+        return Response(200, metrics.render(sources, gauges), metrics.CONTENT_TYPE)
+    return metrics_endpoint
+
+
+async def set_webhook(bot: Bot):
+    # chat_member अपडेट डिफ़ॉल्ट रूप से नहीं आते, इसलिए सभी प्रकार माँगें
+    await bot.set_webhook(
+        url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        allowed_updates=Update.ALL_TYPES,
+        secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+    )
+
+
+def stop_event() -> asyncio.Event:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    return stop
+
+
+def base_server() -> HTTPServer:
+    server = HTTPServer()
+    server.route("GET", "/", health)
+    server.route("GET", "/healthz", health)
+    return server
+
+
+def missing_database_url() -> bool:
+    """DATABASE_URL के बिना सब डेटा रीस्टार्ट पर खो जाएगा; in-memory चाहिए तो memory:// दें"""
+    if DATABASE_URL:
+        return False
+    logger.error("DATABASE_URL एनवायरनमेंट वेरिएबल में नहीं मिला! (सिर्फ परीक्षण के लिए memory://)")
+    return True
+
+
+async def run():
+    if missing_database_url():
+        return
+    webhook = bool(WEBHOOK_URL)
+    db.init_db()
+    application = build_application(webhook=webhook)
+
+    server = base_server()
+    server.route("GET", "/metrics", metrics_endpoint)
+    if webhook:
+        server.route("POST", WEBHOOK_PATH, make_webhook_handler(application))
+    stop = stop_event()
 
-def run_bot():
-    asyncio.run(bot_main())  # directly run in main thread of asyncio
+    await start_application(application)
+    try:
+        await server.start("0.0.0.0", PORT)
+        if webhook:
+            await set_webhook(application.bot)
+            logger.info("webhook मोड में चालू")
+        else:
+            await application.bot.delete_webhook()
+            await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+            logger.info("polling मोड में चालू")
+        await stop.wait()
+    finally:
+        await server.stop()
+        await stop_application(application)
 
-Thread(target=run_bot, daemon=True).start()  # Flask ke start se pehle
 
-from flask import Flask
-import os
+async def run_sharded():
+    """receiver: worker प्रोसेस शुरू करें और webhook अपडेट उन पर बाँटें"""
+    if missing_database_url():
+        return
+    if db.storage.backend != "postgresql":
+        # memory:// में हर worker का अपना डेटा, और invalidation सिर्फ LISTEN/NOTIFY से
+        return logger.error(f"WORKERS > 1 के लिए PostgreSQL चाहिए ({db.storage.backend} स्टोरेज पर sharding नहीं)")
+    receiver = ShardedReceiver(WORKERS)
+    server = base_server()
+    server.route("POST", WEBHOOK_PATH, make_sharded_webhook_handler(receiver))
+    server.route("GET", "/metrics", make_sharded_metrics_handler(receiver))
+    stop = stop_event()
 
-app = Flask(__name__)
+    await receiver.start()
+    try:
+        await server.start("0.0.0.0", PORT)
+        async with Bot(BOT_TOKEN) as bot:
+            await set_webhook(bot)
+        logger.info(f"webhook मोड में {WORKERS} worker के साथ चालू")
+        await stop.wait()
+    finally:
+        await server.stop()
+        await receiver.stop()
 
-@app.route("/")
-def home():
-    return "Bot is running!"
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 10000)))
+    if not BOT_TOKEN:
+        logger.error("BOT_TOKEN एनवायरनमेंट वेरिएबल में नहीं मिला!")
+    elif WORKERS > 1 and WEBHOOK_URL:
+        asyncio.run(run_sharded())
+    else:
+        if WORKERS > 1:
+            logger.warning("WORKERS > 1 सिर्फ webhook मोड में; polling एक ही प्रोसेस में चलेगा")
+        asyncio.run(run())
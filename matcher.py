@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+फ़िल्टर ट्रिगर्स के लिए Aho-Corasick मल्टी-पैटर्न मैचर
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class AhoCorasick:
+    """कई ट्रिगर्स को एक साथ खोजने वाला automaton; खोज O(संदेश की लंबाई) है"""
+
+    __slots__ = ("_goto", "_fail", "_out", "_patterns")
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # हर node पर ख़त्म होने वाला सबसे लंबा पैटर्न (index), नहीं तो -1
+        self._out: List[int] = [-1]
+        self._patterns: List[str] = []
+
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(-1)
+            node = nxt
+        if self._out[node] == -1:
+            self._out[node] = len(self._patterns)
+            self._patterns.append(pattern)
+
+    def _build(self):
+        """BFS से failure links और output links बनाएं"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # अपना पैटर्न न हो तो suffix वाला सबसे लंबा पैटर्न इस्तेमाल करें
+                if self._out[child] == -1:
+                    self._out[child] = self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def find_first(self, text: str) -> Optional[str]:
+        """text में सबसे पहले ख़त्म होने वाला ट्रिगर (बराबरी पर सबसे लंबा) लौटाता है"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node] != -1:
+                return self._patterns[out[node]]
+        return None
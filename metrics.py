@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+प्रति-हैंडलर latency/throughput मेट्रिक्स और Prometheus text format
+
+हर हैंडलर की कॉल/त्रुटि गिनती और latency histogram, और हर अपडेट में हुई
+DB क्वेरी व Bot API कॉल। अपडेट के भीतर गिनती contextvar से होती है, इसलिए
+साथ-साथ चल रहे अपडेट एक-दूसरे की गिनती में नहीं मिलते। query_budget सेट
+हो तो उससे ज़्यादा क्वेरी करने वाला अपडेट हैंडलर और fingerprint के साथ लॉग
+होता है।
+"""
+import bisect
+import contextvars
+import logging
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from querylog import query_log
+
+logger = logging.getLogger(__name__)
+
+# latency बकेट (सेकंड) और प्रति-अपडेट गिनती के बकेट
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+QUANTILES = (0.5, 0.95, 0.99)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """तय बकेट वाला histogram; quantile बकेट के भीतर linear अनुमान से"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # आख़िरी = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]  # +Inf बकेट: सबसे बड़ी सीमा ही बता सकते हैं
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def restore(cls, bounds: Tuple[float, ...], data: Dict[str, Any]) -> "Histogram":
+        histogram = cls(bounds)
+        histogram.counts = list(data["counts"])
+        histogram.sum = data["sum"]
+        histogram.count = data["count"]
+        return histogram
+
+
+class UpdateCounters:
+    """एक अपडेट के दौरान हुई DB क्वेरी और Bot API कॉल"""
+
+    __slots__ = ("db_queries", "api_calls", "queries", "handlers")
+
+    def __init__(self, detailed: bool = False):
+        self.db_queries = 0
+        self.api_calls = 0
+        # सिर्फ query_budget चालू होने पर: fingerprint -> गिनती, और चले हैंडलर
+        self.queries: Optional[Dict[str, int]] = {} if detailed else None
+        self.handlers: Optional[List[str]] = [] if detailed else None
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("update_counters", default=None)
+
+
+def current_counters() -> Optional[UpdateCounters]:
+    return _current.get()
+
+
+class HandlerStats:
+    __slots__ = ("calls", "errors", "latency", "db_queries", "api_calls")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_queries = 0
+        self.api_calls = 0
+
+
+class Metrics:
+    """एक प्रोसेस के सभी मेट्रिक्स"""
+
+    def __init__(self, query_budget: int = 0, query_export: int = 50):
+        self.handlers: Dict[str, HandlerStats] = {}
+        self.update_latency = Histogram(LATENCY_BUCKETS)
+        self.update_db_queries = Histogram(COUNT_BUCKETS)
+        self.update_api_calls = Histogram(COUNT_BUCKETS)
+        self.db_queries = 0
+        self.api_calls: Dict[str, int] = {}  # endpoint -> कॉल
+        self.started = time.time()
+        self.query_budget = query_budget  # प्रति अपडेट अधिकतम क्वेरी; 0 = जाँच बंद
+        self.query_export = query_export  # /metrics पर सबसे महंगे इतने fingerprint
+        self.budget_exceeded = 0
+
+    def reset(self):
+        """सारी गिनती शून्य करें (bench.py के परिदृश्यों के बीच)
+
+        instrument किए गए wrapper अपना HandlerStats पकड़े रहते हैं, इसलिए वे
+        अपनी जगह शून्य होते हैं, बदले नहीं जाते।
+        """
+        for stats in self.handlers.values():
+            stats.__init__()
+        self.update_latency = Histogram(LATENCY_BUCKETS)
+        self.update_db_queries = Histogram(COUNT_BUCKETS)
+        self.update_api_calls = Histogram(COUNT_BUCKETS)
+        self.db_queries = 0
+        self.api_calls = {}
+        self.budget_exceeded = 0
+        self.started = time.time()
+
+    # --- गिनती ---
+
+    def count_db_query(self, fingerprint: Optional[str] = None, queries: int = 1):
+        self.db_queries += queries
+        counters = _current.get()
+        if counters is not None:
+            counters.db_queries += queries
+            if counters.queries is not None:
+                key = fingerprint or "?"
+                counters.queries[key] = counters.queries.get(key, 0) + queries
+
+    def count_api_call(self, endpoint: str):
+        self.api_calls[endpoint] = self.api_calls.get(endpoint, 0) + 1
+        counters = _current.get()
+        if counters is not None:
+            counters.api_calls += 1
+
+    def _handler(self, name: str) -> HandlerStats:
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        return stats
+
+    def instrument(self, callback: Callable[..., Awaitable[Any]], name: Optional[str] = None):
+        """हैंडलर callback को समय, त्रुटि और DB/API गिनती के साथ लपेटें"""
+        name = name or callback.__name__
+        stats = self._handler(name)
+
+        @wraps(callback)
+        async def wrapper(update, context):
+            counters = _current.get()
+            db_before = counters.db_queries if counters else 0
+            api_before = counters.api_calls if counters else 0
+            stats.calls += 1
+            start = time.perf_counter()
+            try:
+                return await callback(update, context)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.latency.observe(time.perf_counter() - start)
+                if counters is not None:
+                    if counters.handlers is not None:
+                        counters.handlers.append(name)
+                    stats.db_queries += counters.db_queries - db_before
+                    stats.api_calls += counters.api_calls - api_before
+        return wrapper
+
+    async def track_update(self, coroutine: Awaitable[Any]):
+        """एक अपडेट की पूरी प्रोसेसिंग चलाएं और उसकी गिनती दर्ज करें"""
+        counters = UpdateCounters(detailed=self.query_budget > 0)
+        token = _current.set(counters)
+        start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            _current.reset(token)
+            self.update_latency.observe(time.perf_counter() - start)
+            self.update_db_queries.observe(counters.db_queries)
+            self.update_api_calls.observe(counters.api_calls)
+            if self.query_budget and counters.db_queries > self.query_budget:
+                self._report_budget(counters)
+
+    def _report_budget(self, counters: UpdateCounters):
+        self.budget_exceeded += 1
+        queries = sorted(counters.queries.items(), key=lambda item: item[1], reverse=True)
+        logger.warning(
+            f"अपडेट ने {counters.db_queries} क्वेरी कीं (बजट {self.query_budget}); "
+            f"हैंडलर: {', '.join(counters.handlers) or '-'}; "
+            + "; ".join(f"{count}× {key}" for key, count in queries[:5])
+        )
+
+    # --- निर्यात ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """pickle होने लायक सादा dict (worker से receiver तक भेजने के लिए)"""
+        return {
+            "handlers": {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "latency": stats.latency.snapshot(),
+                    "db_queries": stats.db_queries,
+                    "api_calls": stats.api_calls,
+                }
+                for name, stats in self.handlers.items()
+            },
+            "update_latency": self.update_latency.snapshot(),
+            "update_db_queries": self.update_db_queries.snapshot(),
+            "update_api_calls": self.update_api_calls.snapshot(),
+            "db_queries": self.db_queries,
+            "api_calls": dict(self.api_calls),
+            "started": self.started,
+            "queries": query_log.top(self.query_export),
+            "slow_queries": query_log.slow,
+            "budget_exceeded": self.budget_exceeded,
+        }
+
+
+metrics = Metrics()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Family:
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.lines: List[str] = []
+
+    def sample(self, labels: Dict[str, Any], value: float, suffix: str = ""):
+        self.lines.append(f"{self.name}{suffix}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, labels: Dict[str, Any], bounds: Tuple[float, ...], data: Dict[str, Any]):
+        cumulative = 0
+        for bound, count in zip(bounds + (float("inf"),), data["counts"]):
+            cumulative += count
+            self.sample({**labels, "le": _number(bound)}, cumulative, "_bucket")
+        self.sample(labels, data["sum"], "_sum")
+        self.sample(labels, data["count"], "_count")
+
+    def render(self) -> List[str]:
+        if not self.lines:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.lines]
+
+
+def render(sources: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+           gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+    """(labels, snapshot) जोड़ियों को Prometheus text format में बदलें
+
+    sharded मोड में हर worker का snapshot उसके worker label के साथ आता है।
+    gauges: नाम -> (help, मान), जैसे receiver की कतार की लंबाई।
+    """
+    families = {
+        name: _Family(name, kind, help_text)
+        for name, kind, help_text in (
+            ("bot_handler_calls_total", "counter", "हैंडलर कॉल"),
+            ("bot_handler_errors_total", "counter", "अपवाद के साथ ख़त्म हुई हैंडलर कॉल"),
+            ("bot_handler_latency_seconds", "histogram", "हैंडलर latency"),
+            ("bot_handler_latency_quantile_seconds", "gauge", "हैंडलर latency quantile (बकेट से अनुमान)"),
+            ("bot_handler_db_queries_total", "counter", "हैंडलर के भीतर हुई DB क्वेरी"),
+            ("bot_handler_api_calls_total", "counter", "हैंडलर के भीतर हुई Bot API कॉल"),
+            ("bot_update_latency_seconds", "histogram", "एक अपडेट की पूरी प्रोसेसिंग का समय"),
+            ("bot_update_db_queries", "histogram", "प्रति अपडेट DB क्वेरी"),
+            ("bot_update_api_calls", "histogram", "प्रति अपडेट Bot API कॉल"),
+            ("bot_db_queries_total", "counter", "सभी DB क्वेरी (बैकग्राउंड काम सहित)"),
+            ("bot_api_calls_total", "counter", "endpoint के हिसाब से Bot API कॉल"),
+            ("bot_start_time_seconds", "gauge", "प्रोसेस शुरू होने का Unix समय"),
+            ("bot_db_statement_calls_total", "counter", "SQL fingerprint के हिसाब से statement"),
+            ("bot_db_statement_errors_total", "counter", "SQL fingerprint के हिसाब से विफल statement"),
+            ("bot_db_statement_seconds_total", "counter", "SQL fingerprint के हिसाब से कुल समय"),
+            ("bot_db_statement_max_seconds", "gauge", "SQL fingerprint का सबसे लंबा एक statement"),
+            ("bot_db_statement_rows_total", "counter", "SQL fingerprint के हिसाब से लौटी/बदली पंक्तियाँ"),
+            ("bot_db_slow_queries_total", "counter", "slow-query सीमा से धीमे statement"),
+            ("bot_update_query_budget_exceeded_total", "counter", "query_budget से ज़्यादा क्वेरी वाले अपडेट"),
+        )
+    }
+
+    for labels, snapshot in sources:
+        for name, stats in sorted(snapshot["handlers"].items()):
+            handler = {**labels, "handler": name}
+            families["bot_handler_calls_total"].sample(handler, stats["calls"])
+            families["bot_handler_errors_total"].sample(handler, stats["errors"])
+            families["bot_handler_latency_seconds"].histogram(handler, LATENCY_BUCKETS, stats["latency"])
+            latency = Histogram.restore(LATENCY_BUCKETS, stats["latency"])
+            for q in QUANTILES:
+                families["bot_handler_latency_quantile_seconds"].sample(
+                    {**handler, "quantile": q}, round(latency.quantile(q), 6)
+                )
+            families["bot_handler_db_queries_total"].sample(handler, stats["db_queries"])
+            families["bot_handler_api_calls_total"].sample(handler, stats["api_calls"])
+        families["bot_update_latency_seconds"].histogram(labels, LATENCY_BUCKETS, snapshot["update_latency"])
+        families["bot_update_db_queries"].histogram(labels, COUNT_BUCKETS, snapshot["update_db_queries"])
+        families["bot_update_api_calls"].histogram(labels, COUNT_BUCKETS, snapshot["update_api_calls"])
+        families["bot_db_queries_total"].sample(labels, snapshot["db_queries"])
+        for endpoint, count in sorted(snapshot["api_calls"].items()):
+            families["bot_api_calls_total"].sample({**labels, "endpoint": endpoint}, count)
+        families["bot_start_time_seconds"].sample(labels, snapshot["started"])
+        for query in snapshot["queries"]:
+            statement = {**labels, "fingerprint": query["fingerprint"]}
+            families["bot_db_statement_calls_total"].sample(statement, query["count"])
+            families["bot_db_statement_errors_total"].sample(statement, query["errors"])
+            families["bot_db_statement_seconds_total"].sample(statement, round(query["total"], 6))
+            families["bot_db_statement_max_seconds"].sample(statement, round(query["max"], 6))
+            families["bot_db_statement_rows_total"].sample(statement, query["rows"])
+        families["bot_db_slow_queries_total"].sample(labels, snapshot["slow_queries"])
+        families["bot_update_query_budget_exceeded_total"].sample(labels, snapshot["budget_exceeded"])
+
+    for name, (help_text, value) in (gauges or {}).items():
+        family = families[name] = _Family(name, "gauge", help_text)
+        family.sample({}, value)
+
+    lines = [line for family in families.values() for line in family.render()]
+    return "\n".join(lines) + "\n"
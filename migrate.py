@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+क्रमबद्ध SQL माइग्रेशन और schema_version टेबल
+
+migrations/ में हर फ़ाइल `<version>_<name>.sql` है; जो version अभी तक
+schema_version में नहीं है वही चलता है। स्कीमा अप-टू-डेट हो तो स्टार्टअप
+पर सिर्फ एक SELECT लगता है।
+"""
+import logging
+import os
+import re
+from typing import List, NamedTuple
+
+from psycopg2 import errors
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# एक साथ शुरू हुए कई प्रोसेस में से एक ही माइग्रेशन चलाए
+MIGRATION_LOCK_ID = 0x726F7365
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+    def sql(self) -> str:
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """डायरेक्टरी की माइग्रेशन फ़ाइलें version के क्रम में"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+
+    for previous, current in zip(migrations, migrations[1:]):
+        if previous.version == current.version:
+            raise ValueError(f"डुप्लिकेट माइग्रेशन version {current.version}: {previous.name}, {current.name}")
+    return migrations
+
+
+def current_version(conn) -> int:
+    """लागू हुआ सबसे बड़ा version; schema_version न हो तो 0"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            return cursor.fetchone()[0]
+    except errors.UndefinedTable:
+        conn.rollback()
+        return 0
+
+
+def apply_migrations(conn, directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """बाकी माइग्रेशन एक ही transaction में चलाएं और लागू हुई सूची लौटाएं"""
+    migrations = discover(directory)
+    latest = migrations[-1].version if migrations else 0
+
+    version = current_version(conn)
+    if version >= latest:
+        conn.rollback()  # सिर्फ पढ़ने वाला transaction बंद करें
+        if version > latest:
+            logger.warning(f"डेटाबेस स्कीमा ({version}) कोड ({latest}) से नया है")
+        return []
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        ''')
+        # lock मिलने तक किसी और प्रोसेस ने माइग्रेशन चला दिए हों
+        cursor.execute("SELECT version FROM schema_version")
+        done = {row[0] for row in cursor.fetchall()}
+
+        applied = []
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            logger.info(f"माइग्रेशन {migration.version:04d}_{migration.name} लागू हो रहा है")
+            cursor.execute(migration.sql())
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                (migration.version, migration.name)
+            )
+            applied.append(migration)
+
+    conn.commit()
+    return applied
@@ -0,0 +1,95 @@
+-- प्रारंभिक स्कीमा; IF NOT EXISTS ताकि माइग्रेशन से पहले बने डेटाबेस पर भी चले
+
+-- Groups टेबल
+CREATE TABLE IF NOT EXISTS groups (
+    chat_id BIGINT PRIMARY KEY,
+    welcome_message TEXT,
+    goodbye_message TEXT,
+    rules TEXT,
+    private_rules BOOLEAN DEFAULT FALSE,
+    clean_welcome BOOLEAN DEFAULT FALSE,
+    clean_service BOOLEAN DEFAULT FALSE,
+    silent_actions BOOLEAN DEFAULT FALSE,
+    log_channel BIGINT,
+    federation_id TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Users टेबल
+CREATE TABLE IF NOT EXISTS users (
+    user_id BIGINT PRIMARY KEY,
+    username TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    is_banned BOOLEAN DEFAULT FALSE,
+    ban_reason TEXT,
+    ban_expires TIMESTAMP WITH TIME ZONE,
+    warnings INTEGER DEFAULT 0,
+    last_seen TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Group restrictions टेबल
+CREATE TABLE IF NOT EXISTS group_restrictions (
+    chat_id BIGINT,
+    user_id BIGINT,
+    restriction_type TEXT,
+    expires_at TIMESTAMP WITH TIME ZONE,
+    reason TEXT,
+    admin_id BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (chat_id, user_id, restriction_type)
+);
+
+-- Filters टेबल
+CREATE TABLE IF NOT EXISTS filters (
+    chat_id BIGINT,
+    trigger_word TEXT,
+    response TEXT,
+    is_private BOOLEAN DEFAULT FALSE,
+    created_by BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (chat_id, trigger_word)
+);
+
+-- Locks टेबल
+CREATE TABLE IF NOT EXISTS locks (
+    chat_id BIGINT,
+    lock_type TEXT,
+    is_locked BOOLEAN DEFAULT TRUE,
+    PRIMARY KEY (chat_id, lock_type)
+);
+
+-- Disabled commands टेबल
+CREATE TABLE IF NOT EXISTS disabled_commands (
+    chat_id BIGINT,
+    command TEXT,
+    PRIMARY KEY (chat_id, command)
+);
+
+-- Federation टेबल
+CREATE TABLE IF NOT EXISTS federations (
+    fed_id TEXT PRIMARY KEY,
+    fed_name TEXT,
+    owner_id BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Federation bans टेबल
+CREATE TABLE IF NOT EXISTS fed_bans (
+    fed_id TEXT,
+    user_id BIGINT,
+    reason TEXT,
+    banned_by BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (fed_id, user_id)
+);
+
+-- Warnings टेबल
+CREATE TABLE IF NOT EXISTS warnings (
+    id SERIAL PRIMARY KEY,
+    chat_id BIGINT,
+    user_id BIGINT,
+    reason TEXT,
+    warned_by BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,13 @@
+-- प्रति (chat, user) चेतावनी गिनती; warnings के साथ एक ही स्टेटमेंट में बदलती है
+CREATE TABLE IF NOT EXISTS warn_counts (
+    chat_id BIGINT,
+    user_id BIGINT,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, user_id)
+);
+
+-- मौजूदा चेतावनियों से गिनती भरें
+INSERT INTO warn_counts (chat_id, user_id, count)
+SELECT chat_id, user_id, COUNT(*) FROM warnings
+GROUP BY chat_id, user_id
+ON CONFLICT (chat_id, user_id) DO NOTHING;
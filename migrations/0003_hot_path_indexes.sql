@@ -0,0 +1,12 @@
+-- /warns: (chat_id, user_id) से कारण id के क्रम में
+CREATE INDEX IF NOT EXISTS idx_warnings_chat_user
+    ON warnings (chat_id, user_id, id);
+
+-- ExpiryScheduler की expires_at range query; स्थायी प्रतिबंध (NULL) इंडेक्स में नहीं
+CREATE INDEX IF NOT EXISTS idx_group_restrictions_expires_at
+    ON group_restrictions (expires_at)
+    WHERE expires_at IS NOT NULL;
+
+-- नए सदस्य की सभी फ़ेडरेशनों में जाँच
+CREATE INDEX IF NOT EXISTS idx_fed_bans_user
+    ON fed_bans (user_id);
@@ -0,0 +1,2 @@
+-- प्रति चैट लॉग मोड: FALSE = हर घटना तुरंत, TRUE = लॉग चैनल में digest
+ALTER TABLE groups ADD COLUMN IF NOT EXISTS log_digest BOOLEAN DEFAULT FALSE;
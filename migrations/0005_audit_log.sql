@@ -0,0 +1,17 @@
+-- append-only मॉडरेशन इतिहास; पंक्तियाँ कभी बदली या हटाई नहीं जातीं
+CREATE TABLE IF NOT EXISTS audit_log (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    chat_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    admin_id BIGINT,
+    action TEXT NOT NULL,
+    reason TEXT,
+    expires_at TIMESTAMP WITH TIME ZONE
+);
+
+-- /history: एक उपयोगकर्ता का इतिहास सभी चैटों में, या एक चैट में, नया पहले
+CREATE INDEX IF NOT EXISTS idx_audit_log_user
+    ON audit_log (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_log_chat_user
+    ON audit_log (chat_id, user_id, created_at DESC);
@@ -0,0 +1,29 @@
+-- फ़ेडरेशन के सदस्य ग्रुप: fban हर सदस्य ग्रुप तक पहुँचाने के लिए
+CREATE INDEX IF NOT EXISTS idx_groups_federation_id
+    ON groups (federation_id)
+    WHERE federation_id IS NOT NULL;
+
+-- fban/unfban propagation: एक पंक्ति प्रति काम, अधूरे काम रीस्टार्ट पर फिर शुरू
+CREATE TABLE IF NOT EXISTS fed_ban_jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    fed_id TEXT NOT NULL,
+    user_id BIGINT NOT NULL,
+    action TEXT NOT NULL,
+    reason TEXT,
+    created_by BIGINT,
+    origin_chat_id BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS idx_fed_ban_jobs_open
+    ON fed_ban_jobs (job_id)
+    WHERE finished_at IS NULL;
+
+-- हर ग्रुप का नतीजा; यही checkpoint है (जिन ग्रुप का नतीजा है वे दोबारा नहीं)
+CREATE TABLE IF NOT EXISTS fed_ban_results (
+    job_id BIGINT,
+    chat_id BIGINT,
+    status TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (job_id, chat_id)
+);
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+चैटों में समानांतर, पर हर चैट के भीतर क्रम से अपडेट प्रोसेसिंग
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def ordering_key(update: object) -> Optional[Hashable]:
+    """एक ही चैट (या बिना चैट वाले अपडेट में एक ही यूज़र) के अपडेट एक key पर"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return ("user", update.effective_user.id)
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """अलग-अलग चैटों के अपडेट साथ-साथ चलते हैं, एक चैट के अपडेट आने के क्रम में
+
+    Application हर अपडेट के लिए कतार के क्रम में task बनाता है और यहाँ
+    process_update का पहला कदम बिना रुके चलता है, इसलिए do_process_update में
+    घुसते ही चैट की कड़ी में जगह लेने से आने का क्रम बना रहता है। पिछले अपडेट
+    का इंतज़ार करते हुए कोई slot नहीं घिरता; सिर्फ चल रहे हैंडलर
+    `max_running` तक सीमित हैं।
+    """
+
+    def __init__(self, max_running: int = 32, max_pending: int = 10000):
+        # बेस क्लास का semaphore सिर्फ कुल लंबित अपडेट की ऊपरी सीमा है
+        super().__init__(max(max_pending, max_running, 2))
+        self.max_running = max_running
+        self._running: Optional[asyncio.Semaphore] = None
+        self._tails: Dict[Hashable, asyncio.Future] = {}  # key -> चैट का आख़िरी अपडेट
+        self._stats = {"processed": 0, "waited": 0, "max_running": 0}
+        self._active = 0
+
+    async def initialize(self) -> None:
+        self._running = asyncio.Semaphore(self.max_running)
+
+    async def shutdown(self) -> None:
+        self._tails.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats.update(running=self._active, ordered_chats=len(self._tails), limit=self.max_running)
+        return stats
+
+    async def _run(self, coroutine: Awaitable[Any]):
+        if self._running is None:
+            self._running = asyncio.Semaphore(self.max_running)
+        try:
+            await self._running.acquire()
+        except BaseException:
+            # रद्द होने पर भी coroutine बंद करें ("never awaited" चेतावनी न आए)
+            coroutine.close()
+            raise
+        self._active += 1
+        self._stats["max_running"] = max(self._stats["max_running"], self._active)
+        try:
+            await metrics.track_update(coroutine)
+        finally:
+            self._active -= 1
+            self._stats["processed"] += 1
+            self._running.release()
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = ordering_key(update)
+        if key is None:
+            return await self._run(coroutine)
+
+        # await से पहले कड़ी में जगह लें, ताकि क्रम कतार वाला ही रहे
+        previous = self._tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self._tails[key] = done
+        try:
+            if previous is not None and not previous.done():
+                self._stats["waited"] += 1
+                try:
+                    await asyncio.shield(previous)
+                except BaseException:
+                    coroutine.close()
+                    raise
+            await self._run(coroutine)
+        finally:
+            if previous is not None and not previous.done():
+                # रद्द हुआ अपडेट अपने अगले को पिछले से पहले न छोड़े
+                previous.add_done_callback(lambda _: self._release(key, done))
+            else:
+                self._release(key, done)
+
+    def _release(self, key: Hashable, done: asyncio.Future):
+        done.set_result(None)
+        if self._tails.get(key) is done:
+            del self._tails[key]
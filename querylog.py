@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+SQL fingerprint के हिसाब से क्वेरी के आँकड़े और slow-query लॉग
+
+क्वेरी executor थ्रेड में चलती हैं, इसलिए दर्ज करना lock के पीछे है।
+fingerprint में शाब्दिक मान और placeholder की लंबी सूचियाँ एक जैसी हो जाती
+हैं, ताकि एक ही क्वेरी के सभी रूप एक पंक्ति में गिने जाएं।
+"""
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """मान हटाकर क्वेरी का सामान्य रूप, जैसे `IN (1, 2, 3)` -> `IN (?)`"""
+    normalized = _STRING.sub("?", query)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _LIST.sub("(?)", normalized)
+    normalized = _ROWS.sub("(?), ...", normalized)
+    normalized = _SPACE.sub(" ", normalized).strip().rstrip(";").strip()
+    return normalized
+
+
+def redact(params: Any) -> str:
+    """लॉग के लिए पैरामीटर के सिर्फ प्रकार (और लंबाई), मान नहीं"""
+    if params is None:
+        return "()"
+    if not isinstance(params, (list, tuple)):
+        params = (params,)
+
+    def describe(value):
+        if value is None:
+            return "NULL"
+        if isinstance(value, (str, bytes)):
+            return f"<{type(value).__name__}:{len(value)}>"
+        if isinstance(value, (list, tuple)):
+            return f"<{type(value).__name__}:{len(value)}>"
+        return f"<{type(value).__name__}>"
+
+    return "(" + ", ".join(describe(value) for value in params) + ")"
+
+
+class QueryStats:
+    __slots__ = ("count", "errors", "total", "max", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+
+class QueryLog:
+    """fingerprint -> (गिनती, कुल/अधिकतम समय, लौटी पंक्तियाँ)"""
+
+    def __init__(self, slow_threshold: float = 0.1, max_fingerprints: int = 500):
+        self.slow_threshold = slow_threshold  # सेकंड; 0 = slow-query लॉग बंद
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+        self.slow = 0
+        self.dropped = 0  # max_fingerprints भर जाने पर न गिनी गई क्वेरी
+
+    def record(self, query: str, params: Any, seconds: float, rows: int = 0, error: bool = False):
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self.dropped += 1
+                    return
+                stats = self._stats[key] = QueryStats()
+            stats.count += 1
+            stats.errors += error
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.rows += rows
+            slow = self.slow_threshold and seconds >= self.slow_threshold
+            if slow:
+                self.slow += 1
+        if slow:
+            logger.warning(f"धीमी क्वेरी ({seconds * 1000:.1f} ms, {rows} पंक्तियाँ): {key} {redact(params)}")
+
+    def top(self, limit: int = 10, order: str = "total") -> List[Dict[str, Any]]:
+        """सबसे ज़्यादा `order` (total/max/count/rows) वाले fingerprint"""
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": key,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "total": stats.total,
+                    "max": stats.max,
+                    "rows": stats.rows,
+                }
+                for key, stats in self._stats.items()
+            ]
+        rows.sort(key=lambda row: row[order], reverse=True)
+        return rows[:limit]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return self.top(self.max_fingerprints)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.slow = 0
+            self.dropped = 0
+
+
+query_log = QueryLog()
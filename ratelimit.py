@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+कमांड रेट लिमिटिंग के लिए token bucket इंजन (user / chat / global स्कोप)
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional
+
+
+class Limit(NamedTuple):
+    """`burst` कमांड तुरंत, उसके बाद हर `period` सेकंड में एक"""
+    period: float
+    burst: int = 1
+
+
+class TokenBucketLimiter:
+    """हर key के लिए एक token bucket; खाली पड़ी keys अपने-आप हटती हैं
+
+    जितने समय में bucket पूरा भर जाता है (period * burst) उतनी देर idle रहने
+    वाली key नई key जैसी ही होती है, इसलिए उसे हटाने से व्यवहार नहीं बदलता।
+    """
+
+    __slots__ = ("rate", "burst", "idle_ttl", "max_keys", "_buckets", "evictions")
+
+    def __init__(self, limit: Limit, max_keys: int = 100000):
+        self.rate = 1.0 / limit.period
+        self.burst = float(limit.burst)
+        self.idle_ttl = limit.period * limit.burst
+        self.max_keys = max_keys
+        # key -> [tokens, last_refill]; पुरानी से नई के क्रम में
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        # सबसे पुरानी keys आगे हैं, इसलिए idle keys हटाना amortized O(1) है
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if now - bucket[1] < self.idle_ttl and len(buckets) <= self.max_keys:
+                break
+            del buckets[key]
+            self.evictions += 1
+
+    def peek(self, key: Hashable, now: float) -> list:
+        """key का bucket refill करके लौटाता है (टोकन घटाए बिना)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            tokens = bucket[0] + (now - bucket[1]) * self.rate
+            bucket[0] = tokens if tokens < self.burst else self.burst
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def consume(self, key: Hashable):
+        """peek के बाद एक टोकन घटाएं"""
+        self._buckets[key][0] -= 1.0
+
+    def allow(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """एक टोकन मिले तो True और टोकन घटा दें"""
+        bucket = self.peek(key, time.monotonic() if now is None else now)
+        if bucket[0] < 1.0:
+            return False
+        bucket[0] -= 1.0
+        return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimitEngine:
+    """कमांड के हिसाब से user, chat और global स्कोप की सीमाएँ लागू करता है
+
+    "default" की सीमाएँ सभी कमांड में साझा हैं: एक यूज़र का cooldown और
+    पूरे बॉट का global bucket हर कमांड से घटता है। जो कमांड किसी स्कोप
+    की सीमा खुद तय करे, सिर्फ उस स्कोप के लिए उसका अलग bucket बनता है
+    (None देने पर वह स्कोप उस कमांड पर लागू नहीं होता)।
+    """
+
+    SCOPES = ("user", "chat", "global")
+
+    def __init__(self, limits: Dict[str, Dict[str, Limit]], max_keys: int = 100000):
+        """limits: कमांड नाम (या "default") -> {scope: Limit}"""
+        self.limits = limits
+        self.max_keys = max_keys
+        defaults = limits.get("default", {})
+        self._shared: Dict[str, TokenBucketLimiter] = {
+            scope: TokenBucketLimiter(defaults[scope], max_keys)
+            for scope in self.SCOPES if defaults.get(scope)
+        }
+        self._limiters: Dict[str, tuple] = {}  # कमांड -> ((scope, limiter), ...)
+        self._own: list = []  # कमांड के अपने (साझा नहीं) limiters, stats के लिए
+        self.denied = dict.fromkeys(self.SCOPES, 0)
+
+    def _limiters_for(self, command: str) -> tuple:
+        limiters = self._limiters.get(command)
+        if limiters is None:
+            overrides = self.limits.get(command, {})
+            limiters = []
+            for scope in self.SCOPES:
+                if scope not in overrides:
+                    limiter = self._shared.get(scope)
+                elif overrides[scope]:
+                    limiter = TokenBucketLimiter(overrides[scope], self.max_keys)
+                    self._own.append(limiter)
+                else:
+                    limiter = None
+                if limiter is not None:
+                    limiters.append((scope, limiter))
+            limiters = self._limiters[command] = tuple(limiters)
+        return limiters
+
+    def check(self, command: str, user_id: Optional[int], chat_id: Optional[int]) -> Optional[str]:
+        """अनुमति हो तो None, वरना उस स्कोप का नाम जिसकी सीमा पार हुई
+
+        टोकन तभी घटते हैं जब सभी स्कोप अनुमति दें।
+        """
+        now = time.monotonic()
+        limiters = self._limiters_for(command)
+
+        for scope, limiter in limiters:
+            key = user_id if scope == "user" else chat_id if scope == "chat" else scope
+            if key is None:
+                continue
+            if limiter.peek(key, now)[0] < 1.0:
+                self.denied[scope] += 1
+                return scope
+
+        for scope, limiter in limiters:
+            key = user_id if scope == "user" else chat_id if scope == "chat" else scope
+            if key is not None:
+                limiter.consume(key)
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        stats = {f"denied_{scope}": count for scope, count in self.denied.items()}
+        limiters = [*self._shared.values(), *self._own]
+        stats["keys"] = sum(len(limiter) for limiter in limiters)
+        stats["evictions"] = sum(limiter.evictions for limiter in limiters)
+        return stats
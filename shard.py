@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+कई worker प्रोसेस में चैटों का बँटवारा (consistent hashing)
+
+एक receiver प्रोसेस webhook से अपडेट लेता है और chat_id के हिसाब से हर
+अपडेट को हमेशा उसी worker की लोकल कतार में डालता है। हर worker का अपना
+event loop, DB पूल और कैश है; एक चैट एक ही worker पर रहने से उसके कैश गर्म
+रहते हैं और processor.py का प्रति-चैट क्रम भी बना रहता है।
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import multiprocessing
+import signal
+from queue import Empty, Full
+from typing import Any, Dict, Hashable, List, Optional
+
+from telegram import Update
+
+from processor import ordering_key
+from throttle import GLOBAL_SEND_LIMIT, SendScheduler, split_limit
+
+logger = logging.getLogger(__name__)
+
+STOP = None  # worker की कतार में यह मिलने पर worker बंद होता है
+METRICS_INTERVAL = 5.0  # worker कितनी देर में अपने मेट्रिक्स receiver को भेजे
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """virtual nodes वाली consistent hash ring
+
+    worker की गिनती बदलने पर सिर्फ ~1/N चैटें दूसरे worker पर जाती हैं।
+    """
+
+    def __init__(self, nodes: int, replicas: int = 128):
+        points = sorted(
+            (_hash(f"worker-{node}:{replica}"), node)
+            for node in range(nodes) for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: Hashable) -> int:
+        index = bisect.bisect(self._hashes, _hash(str(key))) % len(self._hashes)
+        return self._nodes[index]
+
+
+def update_key(data: dict) -> Optional[Hashable]:
+    """कच्चे JSON अपडेट से वही key जो ChatOrderedUpdateProcessor इस्तेमाल करता है"""
+    return ordering_key(Update.de_json(data, None))
+
+
+_EMPTY = object()
+
+
+def _get(queue: "multiprocessing.Queue"):
+    try:
+        return queue.get(timeout=1.0)
+    except Empty:
+        return _EMPTY
+
+
+async def push_metrics(index: int, metrics_queue: "multiprocessing.Queue"):
+    """receiver के /metrics के लिए इस worker का snapshot समय-समय पर भेजें"""
+    from metrics import metrics
+
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        try:
+            metrics_queue.put_nowait((index, metrics.snapshot()))
+        except Full:
+            pass  # receiver पढ़ नहीं रहा; अगला snapshot वैसे भी पूरा होगा
+
+
+def run_worker(index: int, workers: int, queue: "multiprocessing.Queue",
+               metrics_queue: "multiprocessing.Queue"):
+    """worker प्रोसेस: अपनी कतार से अपडेट लेकर अपना Application चलाता है"""
+    # Ctrl+C पूरे process group को जाता है; worker receiver के STOP का इंतज़ार करे
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import bot  # spawn के बाद हर worker अपना DB पूल और कैश बनाता है
+
+    ring = HashRing(workers)
+    # tban/tmute की समाप्ति सिर्फ अपनी चैटों की
+    bot.expiry_scheduler.owns = lambda chat_id: ring.node_for(chat_id) == index
+    # अधूरे fban/unfban काम वही worker फिर चलाए जिसकी चैट से वे शुरू हुए
+    bot.fed_propagator.owns = lambda chat_id: ring.node_for(chat_id) == index
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+
+        bot.db.init_db()
+        # सभी worker एक ही token से भेजते हैं: global बजट उनमें बराबर बँटे,
+        # वरना N worker मिलकर N गुना भेजेंगे और flood wait लौट आएगा
+        scheduler = SendScheduler(global_limit=split_limit(GLOBAL_SEND_LIMIT, workers))
+        application = bot.build_application(webhook=True, send_scheduler=scheduler)
+        await bot.start_application(application)
+        pusher = asyncio.create_task(push_metrics(index, metrics_queue))
+        logger.info(f"worker {index}/{workers} चालू")
+        try:
+            while not stopping.is_set():
+                # ब्लॉक करने वाला get अलग थ्रेड में; 1 सेकंड पर SIGTERM जाँचें
+                raw = await loop.run_in_executor(None, _get, queue)
+                if raw is _EMPTY:
+                    continue
+                if raw is STOP:
+                    break
+                try:
+                    update = Update.de_json(json.loads(raw), application.bot)
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"worker {index}: अमान्य अपडेट छोड़ा: {e}")
+                    continue
+                await application.update_queue.put(update)
+        finally:
+            pusher.cancel()
+            await bot.stop_application(application)
+            logger.info(f"worker {index} बंद")
+
+    asyncio.run(main())
+
+
+class ShardedReceiver:
+    """worker प्रोसेस शुरू करता है, उन पर अपडेट बाँटता है और मरे worker फिर चलाता है"""
+
+    def __init__(self, workers: int, queue_size: int = 10000):
+        self.workers = workers
+        self.ring = HashRing(workers)
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = [self._context.Queue(queue_size) for _ in range(workers)]
+        self._metrics_queue = self._context.Queue(workers * 4)
+        self.snapshots: Dict[int, Dict[str, Any]] = {}  # worker -> आख़िरी मेट्रिक्स
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self._monitor: Optional[asyncio.Task] = None
+        self.stats = {"dispatched": 0, "dropped": 0, "restarts": 0}
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=run_worker,
+            args=(index, self.workers, self._queues[index], self._metrics_queue),
+            name=f"bot-worker-{index}",
+            daemon=False,
+        )
+        process.start()
+        self._processes[index] = process
+
+    async def start(self):
+        for index in range(self.workers):
+            self._spawn(index)
+        self._monitor = asyncio.create_task(self._watch())
+        logger.info(f"{self.workers} worker प्रोसेस शुरू")
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(5)
+            self.collect_metrics()
+            for index, process in enumerate(self._processes):
+                if process is not None and not process.is_alive():
+                    logger.error(f"worker {index} बंद हो गया (exit {process.exitcode}); फिर शुरू")
+                    self.stats["restarts"] += 1
+                    self._spawn(index)
+
+    def dispatch(self, data: dict, raw: bytes) -> bool:
+        """अपडेट को उसकी चैट वाले worker की कतार में डालें; कतार भरी हो तो False"""
+        key = update_key(data)
+        # बिना चैट/यूज़र वाले अपडेट का क्रम मायने नहीं रखता
+        index = self.ring.node_for(key) if key is not None else self.stats["dispatched"] % self.workers
+        try:
+            self._queues[index].put_nowait(raw)
+        except Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["dispatched"] += 1
+        return True
+
+    def collect_metrics(self) -> Dict[int, Dict[str, Any]]:
+        """workers के भेजे snapshot पढ़ें; हर worker का सबसे नया रखें"""
+        while True:
+            try:
+                index, snapshot = self._metrics_queue.get_nowait()
+            except Empty:
+                return self.snapshots
+            self.snapshots[index] = snapshot
+
+    def queued(self) -> List[int]:
+        sizes = []
+        for queue in self._queues:
+            try:
+                sizes.append(queue.qsize())
+            except NotImplementedError:  # macOS
+                sizes.append(-1)
+        return sizes
+
+    async def stop(self, timeout: float = 30.0):
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+        loop = asyncio.get_running_loop()
+        for index, queue in enumerate(self._queues):
+            # भरी कतार पर put ब्लॉक करता है; event loop पर नहीं
+            try:
+                await loop.run_in_executor(None, queue.put, STOP, True, timeout)
+            except Full:
+                logger.warning(f"worker {index} की कतार भरी है; STOP नहीं भेजा जा सका")
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"worker {index} समय पर बंद नहीं हुआ; terminate")
+                process.terminate()
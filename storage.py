@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+बॉट डेटा का स्टोरेज इंटरफ़ेस और in-memory बैकएंड
+
+हैंडलर कभी सीधे SQL नहीं लिखते; वे Database (bot.py) के ज़रिए इन्हीं
+मेथड्स को बुलाते हैं। DATABASE_URL के scheme से बैकएंड चुना जाता है:
+postgres(ql)://, sqlite:///path या memory://।
+"""
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# groups टेबल के वे कॉलम जिन्हें एक ही क्वेरी में कैश किया जाता है
+GROUP_COLUMNS = (
+    "welcome_message",
+    "goodbye_message",
+    "rules",
+    "private_rules",
+    "clean_welcome",
+    "clean_service",
+    "silent_actions",
+    "log_channel",
+    "federation_id",
+    "log_digest",
+)
+
+# (chat_id, user_id, restriction_type, expires_at)
+RestrictionRow = Tuple[int, int, str, datetime]
+
+# (created_at, chat_id, user_id, admin_id, action, reason, expires_at)
+AuditRow = Tuple[datetime, int, int, Optional[int], str, Optional[str], Optional[datetime]]
+
+# (job_id, fed_id, user_id, action, reason, created_by, origin_chat_id)
+FedJobRow = Tuple[int, str, int, str, Optional[str], Optional[int], Optional[int]]
+
+# (chat_id, status, error)
+FedJobResult = Tuple[int, str, Optional[str]]
+
+
+def to_utc(value: datetime) -> datetime:
+    """naive datetime (datetime.utcnow() वाले) को UTC मानें"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class Storage(ABC):
+    """सभी बैकएंड का साझा इंटरफ़ेस
+
+    पढ़ने वाले मेथड त्रुटि पर None लौटाते हैं (ताकि कॉलर कैश न करे), लिखने
+    वाले False; अपवाद बाहर नहीं आते।
+    """
+
+    backend = "abstract"
+
+    def open(self):
+        """कनेक्शन खोलें और स्कीमा तैयार करें"""
+
+    def close(self):
+        """सभी संसाधन छोड़ें"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    # --- प्रोसेसों के बीच कैश invalidation ---
+
+    async def publish(self, payload: str) -> bool:
+        """दूसरे प्रोसेसों को संदेश भेजें; False = भेजा नहीं (या कोई साझा चैनल नहीं)"""
+        return False
+
+    def subscribe(self, on_message: Callable[[str], None], on_reset: Callable[[], None]) -> bool:
+        """दूसरे प्रोसेसों के संदेश सुनें (चल रहे event loop में)
+
+        on_reset तब बुलाया जाता है जब बीच में संदेश छूट गए हों (जैसे दोबारा
+        कनेक्ट होने पर)। False = इस बैकएंड में कोई साझा चैनल नहीं।
+        """
+        return False
+
+    async def unsubscribe(self):
+        """subscribe बंद करें"""
+
+    # --- groups ---
+
+    @abstractmethod
+    async def load_group(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """GROUP_COLUMNS की पूरी पंक्ति; ग्रुप न हो तो सभी मान None"""
+
+    @abstractmethod
+    async def save_group_setting(self, chat_id: int, setting: str, value) -> bool:
+        """एक कॉलम upsert करें (setting पहले से GROUP_COLUMNS में जाँचा हुआ)"""
+
+    # --- filters ---
+
+    @abstractmethod
+    async def load_filters(self, chat_id: int) -> Optional[Dict[str, str]]:
+        """trigger -> response"""
+
+    @abstractmethod
+    async def save_filter(self, chat_id: int, trigger: str, response: str, created_by: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_filter(self, chat_id: int, trigger: str) -> bool:
+        ...
+
+    # --- locks ---
+
+    @abstractmethod
+    async def load_locks(self, chat_id: int) -> Optional[List[str]]:
+        """चैट के सक्रिय लॉक प्रकार"""
+
+    @abstractmethod
+    async def save_lock(self, chat_id: int, lock_type: str, locked: bool) -> bool:
+        ...
+
+    # --- warnings ---
+
+    @abstractmethod
+    async def add_warning(self, chat_id: int, user_id: int, reason: str, warned_by: int) -> Optional[int]:
+        """चेतावनी जोड़ें और नई गिनती atomically लौटाएं"""
+
+    @abstractmethod
+    async def clear_warnings(self, chat_id: int, user_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_warn_count(self, chat_id: int, user_id: int) -> int:
+        ...
+
+    @abstractmethod
+    async def get_warnings(self, chat_id: int, user_id: int) -> Tuple[int, List[str]]:
+        """(गिनती, कारण id के क्रम में)"""
+
+    # --- group_restrictions ---
+
+    @abstractmethod
+    async def add_restriction(self, chat_id: int, user_id: int, restriction_type: str,
+                              expires_at: Optional[datetime], reason: str, admin_id: int,
+                              replaces: Sequence[str] = ()) -> bool:
+        """प्रतिबंध upsert करें और उसी बदलाव में `replaces` प्रकार हटाएं"""
+
+    @abstractmethod
+    async def remove_restrictions(self, chat_id: int, user_id: int, restriction_types: Sequence[str]) -> bool:
+        ...
+
+    @abstractmethod
+    async def load_expiring(self, after: Optional[datetime], upto: datetime,
+                            restriction_types: Sequence[str]) -> Optional[List[RestrictionRow]]:
+        """after < expires_at <= upto वाली पंक्तियाँ (after None हो तो निचली सीमा नहीं)"""
+
+    @abstractmethod
+    async def delete_expired(self, rows: Sequence[RestrictionRow]) -> bool:
+        """पंक्तियाँ हटाएं, पर सिर्फ तब जब बाद में उनकी अवधि न बढ़ाई गई हो"""
+
+    # --- federations ---
+
+    @abstractmethod
+    async def create_federation(self, fed_id: str, fed_name: str, owner_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def load_federation(self, fed_id: str) -> Optional[Dict[str, Any]]:
+        """fed_id, fed_name, owner_id; फ़ेडरेशन न हो तो {}"""
+
+    @abstractmethod
+    async def load_federation_chats(self, fed_id: str) -> Optional[List[int]]:
+        """वे चैट जिनका groups.federation_id यह है"""
+
+    @abstractmethod
+    async def count_fed_bans(self, fed_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    async def save_fed_ban(self, fed_id: str, user_id: int, reason: str, banned_by: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_fed_ban(self, fed_id: str, user_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def load_fed_bans(self) -> Optional[List[Tuple[str, int]]]:
+        """सभी फ़ेडरेशनों के (fed_id, user_id); स्टार्टअप पर join-जाँच इंडेक्स के लिए"""
+
+    @abstractmethod
+    async def load_user_fed_bans(self, user_id: int) -> Optional[List[str]]:
+        """वे fed_id जिनमें यह उपयोगकर्ता प्रतिबंधित है"""
+
+    # --- fed ban propagation ---
+
+    @abstractmethod
+    async def create_fed_job(self, fed_id: str, user_id: int, action: str, reason: Optional[str],
+                             created_by: Optional[int], origin_chat_id: Optional[int]) -> Optional[int]:
+        """नया काम दर्ज करें और उसका job_id लौटाएं"""
+
+    @abstractmethod
+    async def load_open_fed_jobs(self) -> Optional[List[FedJobRow]]:
+        """अधूरे काम, job_id के क्रम में"""
+
+    @abstractmethod
+    async def load_fed_job_chats(self, job_id: int) -> Optional[List[int]]:
+        """जिन चैटों का नतीजा दर्ज हो चुका है (checkpoint)"""
+
+    @abstractmethod
+    async def save_fed_job_results(self, job_id: int, results: Sequence[FedJobResult]) -> bool:
+        """नतीजों का बैच upsert करें"""
+
+    @abstractmethod
+    async def finish_fed_job(self, job_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def load_fed_job_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """fed_id, user_id, action, finished और results (status -> गिनती); काम न हो तो {}"""
+
+    # --- audit_log ---
+
+    @abstractmethod
+    async def append_audit(self, rows: Sequence[AuditRow]) -> bool:
+        """पूरा बैच एक ही round-trip में जोड़ें"""
+
+    @abstractmethod
+    async def load_audit(self, user_id: int, chat_id: Optional[int] = None,
+                         limit: int = 20) -> Optional[List[AuditRow]]:
+        """उपयोगकर्ता का इतिहास, नया पहले; chat_id None हो तो सभी चैटों में"""
+
+
+class MemoryStorage(Storage):
+    """प्रोसेस की मेमोरी में डेटा; बेंचमार्क और टेस्टिंग के लिए, रीस्टार्ट पर डेटा खो जाता है"""
+
+    backend = "memory"
+
+    def __init__(self):
+        self.groups: Dict[int, Dict[str, Any]] = {}
+        self.filters: Dict[int, Dict[str, str]] = {}
+        self.locks: Dict[int, set] = {}
+        self.warnings: Dict[Tuple[int, int], List[str]] = {}
+        self.restrictions: Dict[Tuple[int, int, str], Optional[datetime]] = {}
+        self.audit: List[AuditRow] = []
+        self.federations: Dict[str, Dict[str, Any]] = {}
+        self.fed_bans: Dict[Tuple[str, int], Tuple[str, int]] = {}  # (fed_id, user_id) -> (reason, banned_by)
+        self.fed_jobs: Dict[int, List[Any]] = {}  # job_id -> [FedJobRow, finished]
+        self.fed_results: Dict[int, Dict[int, Tuple[str, Optional[str]]]] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "groups": len(self.groups),
+            "warned_users": len(self.warnings),
+            "restrictions": len(self.restrictions),
+            "audit_rows": len(self.audit),
+        }
+
+    async def load_group(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        return dict(self.groups.get(chat_id) or dict.fromkeys(GROUP_COLUMNS))
+
+    async def save_group_setting(self, chat_id: int, setting: str, value) -> bool:
+        self.groups.setdefault(chat_id, dict.fromkeys(GROUP_COLUMNS))[setting] = value
+        return True
+
+    async def load_filters(self, chat_id: int) -> Optional[Dict[str, str]]:
+        return dict(self.filters.get(chat_id, {}))
+
+    async def save_filter(self, chat_id: int, trigger: str, response: str, created_by: int) -> bool:
+        self.filters.setdefault(chat_id, {})[trigger] = response
+        return True
+
+    async def delete_filter(self, chat_id: int, trigger: str) -> bool:
+        self.filters.get(chat_id, {}).pop(trigger, None)
+        return True
+
+    async def load_locks(self, chat_id: int) -> Optional[List[str]]:
+        return list(self.locks.get(chat_id, ()))
+
+    async def save_lock(self, chat_id: int, lock_type: str, locked: bool) -> bool:
+        if locked:
+            self.locks.setdefault(chat_id, set()).add(lock_type)
+        else:
+            self.locks.get(chat_id, set()).discard(lock_type)
+        return True
+
+    async def add_warning(self, chat_id: int, user_id: int, reason: str, warned_by: int) -> Optional[int]:
+        reasons = self.warnings.setdefault((chat_id, user_id), [])
+        reasons.append(reason)
+        return len(reasons)
+
+    async def clear_warnings(self, chat_id: int, user_id: int) -> bool:
+        self.warnings.pop((chat_id, user_id), None)
+        return True
+
+    async def get_warn_count(self, chat_id: int, user_id: int) -> int:
+        return len(self.warnings.get((chat_id, user_id), ()))
+
+    async def get_warnings(self, chat_id: int, user_id: int) -> Tuple[int, List[str]]:
+        reasons = self.warnings.get((chat_id, user_id), [])
+        return len(reasons), list(reasons)
+
+    async def add_restriction(self, chat_id: int, user_id: int, restriction_type: str,
+                              expires_at: Optional[datetime], reason: str, admin_id: int,
+                              replaces: Sequence[str] = ()) -> bool:
+        for replaced in replaces:
+            self.restrictions.pop((chat_id, user_id, replaced), None)
+        self.restrictions[(chat_id, user_id, restriction_type)] = to_utc(expires_at) if expires_at else None
+        return True
+
+    async def remove_restrictions(self, chat_id: int, user_id: int, restriction_types: Sequence[str]) -> bool:
+        for restriction_type in restriction_types:
+            self.restrictions.pop((chat_id, user_id, restriction_type), None)
+        return True
+
+    async def load_expiring(self, after: Optional[datetime], upto: datetime,
+                            restriction_types: Sequence[str]) -> Optional[List[RestrictionRow]]:
+        upto, after = to_utc(upto), to_utc(after) if after else None
+        return [
+            (chat_id, user_id, restriction_type, expires_at)
+            for (chat_id, user_id, restriction_type), expires_at in self.restrictions.items()
+            if expires_at is not None and restriction_type in restriction_types
+            and expires_at <= upto and (after is None or expires_at > after)
+        ]
+
+    async def delete_expired(self, rows: Sequence[RestrictionRow]) -> bool:
+        for chat_id, user_id, restriction_type, expires_at in rows:
+            key = (chat_id, user_id, restriction_type)
+            current = self.restrictions.get(key)
+            if current is not None and current <= to_utc(expires_at):
+                del self.restrictions[key]
+        return True
+
+    async def create_federation(self, fed_id: str, fed_name: str, owner_id: int) -> bool:
+        self.federations[fed_id] = {"fed_id": fed_id, "fed_name": fed_name, "owner_id": owner_id}
+        return True
+
+    async def load_federation(self, fed_id: str) -> Optional[Dict[str, Any]]:
+        return dict(self.federations.get(fed_id, {}))
+
+    async def load_federation_chats(self, fed_id: str) -> Optional[List[int]]:
+        return [chat_id for chat_id, group in self.groups.items() if group.get("federation_id") == fed_id]
+
+    async def count_fed_bans(self, fed_id: str) -> Optional[int]:
+        return sum(1 for ban_fed_id, _ in self.fed_bans if ban_fed_id == fed_id)
+
+    async def save_fed_ban(self, fed_id: str, user_id: int, reason: str, banned_by: int) -> bool:
+        self.fed_bans[(fed_id, user_id)] = (reason, banned_by)
+        return True
+
+    async def delete_fed_ban(self, fed_id: str, user_id: int) -> bool:
+        self.fed_bans.pop((fed_id, user_id), None)
+        return True
+
+    async def load_fed_bans(self) -> Optional[List[Tuple[str, int]]]:
+        return list(self.fed_bans)
+
+    async def load_user_fed_bans(self, user_id: int) -> Optional[List[str]]:
+        return [fed_id for fed_id, ban_user_id in self.fed_bans if ban_user_id == user_id]
+
+    async def create_fed_job(self, fed_id: str, user_id: int, action: str, reason: Optional[str],
+                             created_by: Optional[int], origin_chat_id: Optional[int]) -> Optional[int]:
+        job_id = len(self.fed_jobs) + 1
+        self.fed_jobs[job_id] = [(job_id, fed_id, user_id, action, reason, created_by, origin_chat_id), False]
+        self.fed_results[job_id] = {}
+        return job_id
+
+    async def load_open_fed_jobs(self) -> Optional[List[FedJobRow]]:
+        return [row for row, finished in self.fed_jobs.values() if not finished]
+
+    async def load_fed_job_chats(self, job_id: int) -> Optional[List[int]]:
+        return list(self.fed_results.get(job_id, {}))
+
+    async def save_fed_job_results(self, job_id: int, results: Sequence[FedJobResult]) -> bool:
+        job_results = self.fed_results.setdefault(job_id, {})
+        for chat_id, status, error in results:
+            job_results[chat_id] = (status, error)
+        return True
+
+    async def finish_fed_job(self, job_id: int) -> bool:
+        if job_id in self.fed_jobs:
+            self.fed_jobs[job_id][1] = True
+        return True
+
+    async def load_fed_job_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        job = self.fed_jobs.get(job_id)
+        if job is None:
+            return {}
+        (_, fed_id, user_id, action, _, _, _), finished = job
+        results: Dict[str, int] = {}
+        for status, _ in self.fed_results.get(job_id, {}).values():
+            results[status] = results.get(status, 0) + 1
+        return {"fed_id": fed_id, "user_id": user_id, "action": action, "finished": finished, "results": results}
+
+    async def append_audit(self, rows: Sequence[AuditRow]) -> bool:
+        self.audit.extend(rows)
+        return True
+
+    async def load_audit(self, user_id: int, chat_id: Optional[int] = None,
+                         limit: int = 20) -> Optional[List[AuditRow]]:
+        history = []
+        for row in reversed(self.audit):
+            if row[2] == user_id and (chat_id is None or row[1] == chat_id):
+                history.append(row)
+                if len(history) >= limit:
+                    break
+        return history
+
+
+def create_storage(url: Optional[str], **postgres_options) -> Storage:
+    """DATABASE_URL के scheme से बैकएंड बनाएं; postgres_options सिर्फ PostgreSQL पूल के लिए"""
+    if not url:
+        # import के लिए ही; main.py DATABASE_URL के बिना बॉट शुरू नहीं करता
+        logger.debug("DATABASE_URL सेट नहीं है; in-memory स्टोरेज")
+        return MemoryStorage()
+
+    scheme = url.split("://", 1)[0].lower() if "://" in url else ""
+    if scheme in ("postgres", "postgresql"):
+        from storage_postgres import PostgresStorage
+        return PostgresStorage(url, **postgres_options)
+    if scheme == "sqlite":
+        from storage_sqlite import SQLiteStorage
+        # sqlite:///relative.db, sqlite:////absolute.db, sqlite://:memory:
+        path = url.split("://", 1)[1]
+        return SQLiteStorage(path[1:] if path.startswith("/") else path)
+    if scheme == "memory":
+        return MemoryStorage()
+    raise ValueError(f"असमर्थित DATABASE_URL scheme: {scheme or url}")
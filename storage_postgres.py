@@ -0,0 +1,750 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL स्टोरेज बैकएंड (psycopg2 कनेक्शन पूल + थ्रेड पूल)
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from metrics import metrics
+from migrate import apply_migrations
+from querylog import fingerprint, query_log
+from storage import GROUP_COLUMNS, AuditRow, FedJobResult, FedJobRow, RestrictionRow, Storage
+
+logger = logging.getLogger(__name__)
+
+# कैश invalidation संदेशों का LISTEN/NOTIFY चैनल
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+
+class PoolTimeout(Exception):
+    """तय समय में पूल से कनेक्शन नहीं मिला"""
+
+
+class _PooledConnection:
+    """पूल में रखा कनेक्शन और उसका उपयोग-हिसाब"""
+    __slots__ = ("conn", "uses", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """psycopg2 कनेक्शनों का thread-safe पूल (health check और recycle के साथ)"""
+
+    def __init__(self, dsn: str, minconn: int = 1, maxconn: int = 10, timeout: float = 10.0,
+                 recycle_uses: int = 1000, healthcheck_idle: float = 30.0, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("अमान्य पूल आकार: minconn <= maxconn और maxconn >= 1 होना चाहिए।")
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.recycle_uses = recycle_uses
+        self.healthcheck_idle = healthcheck_idle
+        self.connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledConnection] = []
+        self._size = 0  # खुले कनेक्शन (idle + in use)
+        self._waiting = 0
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "recycled": 0,
+            "health_failures": 0,
+            "acquired": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+
+    def _bump(self, key: str):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+        self._bump("created")
+        return _PooledConnection(conn)
+
+    def _close(self, pooled: _PooledConnection):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        self._bump("closed")
+
+    def open(self):
+        """minconn तक कनेक्शन पहले से खोल लेता है"""
+        while True:
+            with self._cond:
+                if self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                pooled = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if pooled.conn.closed:
+            return False
+        if time.monotonic() - pooled.last_used < self.healthcheck_idle:
+            return True
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pooled.conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledConnection:
+        """पूल से कनेक्शन लेता है; timeout तक कोई न मिले तो PoolTimeout"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            pooled, create = None, False
+            with self._cond:
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._bump("timeouts")
+                        raise PoolTimeout(f"{timeout} सेकंड में डेटाबेस कनेक्शन नहीं मिला")
+                    self._bump("waits")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    pooled = self._idle.pop()  # LIFO: गर्म कनेक्शन पहले
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(pooled):
+                self._bump("health_failures")
+                self._close(pooled)
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                continue
+
+            pooled.uses += 1
+            self._bump("acquired")
+            return pooled
+
+    def release(self, pooled: _PooledConnection, discard: bool = False):
+        """कनेक्शन वापस पूल में रखता है, या ज़रूरत हो तो बंद कर देता है"""
+        conn = pooled.conn
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+
+        recycle = self.recycle_uses > 0 and pooled.uses >= self.recycle_uses
+        if discard or recycle or conn.closed:
+            if recycle and not discard:
+                self._bump("recycled")
+            self._close(pooled)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """with ब्लॉक के लिए कनेक्शन; त्रुटि पर rollback करके लौटाता है"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.conn
+        except psycopg2.OperationalError:
+            self.release(pooled, discard=True)
+            raise
+        except Exception:
+            self.release(pooled)
+            raise
+        else:
+            self.release(pooled)
+
+    def closeall(self):
+        """सभी idle कनेक्शन बंद करें"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """पूल का आकार और काउंटर (पूल साइज़िंग के लिए)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                waiting=self._waiting,
+                minconn=self.minconn,
+                maxconn=self.maxconn,
+            )
+        return stats
+
+
+class NotificationListener:
+    """पूल से बाहर एक autocommit कनेक्शन पर LISTEN; event loop का reader संदेश पढ़ता है
+
+    कनेक्शन टूटे तो दोबारा जुड़ता है और on_reset बुलाता है, क्योंकि बीच के
+    NOTIFY संदेश खो चुके होते हैं।
+    """
+
+    def __init__(self, dsn: str, channel: str, on_message: Callable[[str], None],
+                 on_reset: Callable[[], None], retry_delay: float = 5.0, **connect_kwargs):
+        self.dsn = dsn
+        self.channel = channel
+        self.on_message = on_message
+        self.on_reset = on_reset
+        self.retry_delay = retry_delay
+        self.connect_kwargs = connect_kwargs
+        self._conn = None
+        self._lost: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.received = 0
+        self.reconnects = 0
+
+    def start(self):
+        self._lost = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except Exception as e:
+            logger.warning(f"LISTEN कनेक्शन टूटा: {e}")
+            self._lost.set()
+            return
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            self.received += 1
+            try:
+                self.on_message(notify.payload)
+            except Exception as e:
+                logger.error(f"invalidation संदेश संभालने में त्रुटि: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        connected_before = False
+        while True:
+            try:
+                self._conn = await loop.run_in_executor(None, self._connect)
+            except Exception as e:
+                logger.warning(f"LISTEN कनेक्शन नहीं बना ({e}); {self.retry_delay} सेकंड बाद फिर")
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            if connected_before:
+                self.reconnects += 1
+                self.on_reset()
+            connected_before = True
+            self._lost.clear()
+            loop.add_reader(self._conn.fileno(), self._on_readable)
+            try:
+                await self._lost.wait()
+            finally:
+                loop.remove_reader(self._conn.fileno())
+                self._conn.close()
+                self._conn = None
+            await asyncio.sleep(self.retry_delay)
+
+
+class PostgresStorage(Storage):
+    """बॉट डेटा के लिए PostgreSQL बैकएंड"""
+
+    backend = "postgresql"
+
+    def __init__(self, db_url: str, minconn: int = 1, maxconn: int = 10, timeout: float = 10.0,
+                 recycle_uses: int = 1000, healthcheck_idle: float = 30.0,
+                 executor_workers: Optional[int] = None, **connect_kwargs):
+        # कनेक्शन पहली क्वेरी पर ही खुलते हैं
+        self.pool = ConnectionPool(
+            db_url,
+            minconn=minconn,
+            maxconn=maxconn,
+            timeout=timeout,
+            recycle_uses=recycle_uses,
+            healthcheck_idle=healthcheck_idle,
+            **connect_kwargs,
+        )
+        # async API के लिए सीमित थ्रेड पूल, ताकि event loop कभी ब्लॉक न हो
+        self.executor = ThreadPoolExecutor(
+            max_workers=executor_workers or maxconn, thread_name_prefix="db"
+        )
+        self.db_url = db_url
+        self.connect_kwargs = connect_kwargs
+        self.listener: Optional[NotificationListener] = None
+
+    def get_connection(self):
+        """पूल से कनेक्शन उधार देता है (context manager)"""
+        return self.pool.connection()
+
+    def open(self):
+        """कनेक्शन पूल खोलता है और बाकी स्कीमा माइग्रेशन लागू करता है"""
+        self.pool.open()
+        with self.get_connection() as conn:
+            applied = apply_migrations(conn)
+        if applied:
+            logger.info(f"{len(applied)} डेटाबेस माइग्रेशन लागू हुए (version {applied[-1].version})।")
+        else:
+            logger.info("डेटाबेस स्कीमा अप-टू-डेट है।")
+
+    def close(self):
+        """थ्रेड पूल और सभी कनेक्शन बंद करें"""
+        self.executor.shutdown(wait=True)
+        self.pool.closeall()
+
+    def stats(self) -> Dict[str, Any]:
+        """कनेक्शन पूल के आँकड़े (पूल साइज़िंग के लिए)"""
+        stats = {"backend": self.backend, **self.pool.stats()}
+        if self.listener is not None:
+            stats.update(notify_received=self.listener.received, notify_reconnects=self.listener.reconnects)
+        return stats
+
+    async def publish(self, payload: str) -> bool:
+        """NOTIFY; कमिट के बाद ही सुनने वालों तक पहुँचता है"""
+        result = await self.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, payload))
+        return result is not None
+
+    def subscribe(self, on_message: Callable[[str], None], on_reset: Callable[[], None]) -> bool:
+        self.listener = NotificationListener(
+            self.db_url, INVALIDATION_CHANNEL, on_message, on_reset, **self.connect_kwargs
+        )
+        self.listener.start()
+        return True
+
+    async def unsubscribe(self):
+        if self.listener is not None:
+            await self.listener.stop()
+            self.listener = None
+
+    def execute_query(self, query: str, params: tuple = (), fetch=None):
+        """क्वेरी निष्पादित करता है और डेटा लौटाता है (यदि fetch सेट हो)"""
+        rows = 0
+        start = time.perf_counter()
+        try:
+            with self.get_connection() as conn:
+                # समय सिर्फ क्वेरी का, पूल से कनेक्शन के इंतज़ार का नहीं
+                start = time.perf_counter()
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    if fetch == 'one':
+                        result = cursor.fetchone()
+                        rows = int(result is not None)
+                    elif fetch == 'all':
+                        result = cursor.fetchall()
+                        rows = len(result)
+                    else:
+                        result = cursor.rowcount
+                        rows = max(result, 0)
+                conn.commit()
+            query_log.record(query, params, time.perf_counter() - start, rows)
+            return result
+        except Exception as e:
+            query_log.record(query, params, time.perf_counter() - start, rows, error=True)
+            logger.error(f"क्वेरी त्रुटि: {e}")
+            return None
+
+    async def _run_query(self, query: str, params: tuple, fetch):
+        # गिनती यहीं, event loop पर: executor थ्रेड में अपडेट का contextvar नहीं होता
+        metrics.count_db_query(fingerprint(query))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.execute_query, query, params, fetch)
+
+    async def fetch_one(self, query: str, params: tuple = ()):
+        """एक पंक्ति लौटाता है, event loop को ब्लॉक किए बिना"""
+        return await self._run_query(query, params, 'one')
+
+    async def fetch_all(self, query: str, params: tuple = ()):
+        """सभी पंक्तियाँ लौटाता है, event loop को ब्लॉक किए बिना"""
+        return await self._run_query(query, params, 'all')
+
+    async def execute(self, query: str, params: tuple = ()):
+        """बिना परिणाम वाली क्वेरी (INSERT/UPDATE/DELETE) चलाता है; त्रुटि पर None"""
+        return await self._run_query(query, params, None)
+
+    # --- groups ---
+
+    async def load_group(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        rows = await self.fetch_all(
+            f"SELECT {', '.join(GROUP_COLUMNS)} FROM groups WHERE chat_id = %s",
+            (chat_id,)
+        )
+        if rows is None:
+            return None
+        return dict(zip(GROUP_COLUMNS, rows[0])) if rows else dict.fromkeys(GROUP_COLUMNS)
+
+    async def save_group_setting(self, chat_id: int, setting: str, value) -> bool:
+        query = f"""
+            INSERT INTO groups (chat_id, {setting}) VALUES (%s, %s)
+            ON CONFLICT (chat_id) DO UPDATE SET {setting} = EXCLUDED.{setting};
+        """
+        return await self.execute(query, (chat_id, value)) is not None
+
+    # --- filters ---
+
+    async def load_filters(self, chat_id: int) -> Optional[Dict[str, str]]:
+        rows = await self.fetch_all(
+            "SELECT trigger_word, response FROM filters WHERE chat_id = %s",
+            (chat_id,)
+        )
+        return None if rows is None else dict(rows)
+
+    async def save_filter(self, chat_id: int, trigger: str, response: str, created_by: int) -> bool:
+        result = await self.execute(
+            """
+            INSERT INTO filters (chat_id, trigger_word, response, created_by)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (chat_id, trigger_word)
+            DO UPDATE SET response = EXCLUDED.response
+            """,
+            (chat_id, trigger, response, created_by)
+        )
+        return result is not None
+
+    async def delete_filter(self, chat_id: int, trigger: str) -> bool:
+        result = await self.execute(
+            "DELETE FROM filters WHERE chat_id = %s AND trigger_word = %s",
+            (chat_id, trigger)
+        )
+        return result is not None
+
+    # --- locks ---
+
+    async def load_locks(self, chat_id: int) -> Optional[List[str]]:
+        rows = await self.fetch_all(
+            "SELECT lock_type FROM locks WHERE chat_id = %s AND is_locked = TRUE",
+            (chat_id,)
+        )
+        return None if rows is None else [lock_type for (lock_type,) in rows]
+
+    async def save_lock(self, chat_id: int, lock_type: str, locked: bool) -> bool:
+        if locked:
+            result = await self.execute(
+                """
+                INSERT INTO locks (chat_id, lock_type, is_locked)
+                VALUES (%s, %s, TRUE)
+                ON CONFLICT (chat_id, lock_type)
+                DO UPDATE SET is_locked = TRUE
+                """,
+                (chat_id, lock_type)
+            )
+        else:
+            result = await self.execute(
+                "DELETE FROM locks WHERE chat_id = %s AND lock_type = %s",
+                (chat_id, lock_type)
+            )
+        return result is not None
+
+    # --- warnings ---
+
+    async def add_warning(self, chat_id: int, user_id: int, reason: str, warned_by: int) -> Optional[int]:
+        """एक ही round-trip; warn_counts की पंक्ति पर लगा row lock एक साथ आई
+        चेतावनियों को क्रम में लगाता है, इसलिए हर चेतावनी को अलग गिनती मिलती है।
+        """
+        row = await self.fetch_one(
+            """
+            WITH warning AS (
+                INSERT INTO warnings (chat_id, user_id, reason, warned_by)
+                VALUES (%s, %s, %s, %s)
+            )
+            INSERT INTO warn_counts (chat_id, user_id, count)
+            VALUES (%s, %s, 1)
+            ON CONFLICT (chat_id, user_id)
+            DO UPDATE SET count = warn_counts.count + 1
+            RETURNING count
+            """,
+            (chat_id, user_id, reason, warned_by, chat_id, user_id)
+        )
+        return row[0] if row else None
+
+    async def clear_warnings(self, chat_id: int, user_id: int) -> bool:
+        result = await self.execute(
+            """
+            WITH cleared AS (
+                DELETE FROM warnings WHERE chat_id = %s AND user_id = %s
+            )
+            DELETE FROM warn_counts WHERE chat_id = %s AND user_id = %s
+            """,
+            (chat_id, user_id, chat_id, user_id)
+        )
+        return result is not None
+
+    async def get_warn_count(self, chat_id: int, user_id: int) -> int:
+        row = await self.fetch_one(
+            "SELECT count FROM warn_counts WHERE chat_id = %s AND user_id = %s",
+            (chat_id, user_id)
+        )
+        return row[0] if row else 0
+
+    async def get_warnings(self, chat_id: int, user_id: int) -> Tuple[int, List[str]]:
+        # गिनती शून्य हो तो warnings टेबल नहीं छुई जाती
+        rows = await self.fetch_all(
+            """
+            SELECT c.count, w.reason
+            FROM warn_counts c
+            LEFT JOIN warnings w ON w.chat_id = c.chat_id AND w.user_id = c.user_id
+            WHERE c.chat_id = %s AND c.user_id = %s AND c.count > 0
+            ORDER BY w.id
+            """,
+            (chat_id, user_id)
+        )
+        if not rows:
+            return 0, []
+        return rows[0][0], [reason for _, reason in rows if reason is not None]
+
+    # --- group_restrictions ---
+
+    async def add_restriction(self, chat_id: int, user_id: int, restriction_type: str,
+                              expires_at: Optional[datetime], reason: str, admin_id: int,
+                              replaces: Sequence[str] = ()) -> bool:
+        result = await self.execute(
+            """
+            WITH cleared AS (
+                DELETE FROM group_restrictions
+                WHERE chat_id = %s AND user_id = %s AND restriction_type = ANY(%s)
+            )
+            INSERT INTO group_restrictions (chat_id, user_id, restriction_type, expires_at, reason, admin_id)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (chat_id, user_id, restriction_type)
+            DO UPDATE SET expires_at = EXCLUDED.expires_at, reason = EXCLUDED.reason
+            """,
+            (chat_id, user_id, list(replaces),
+             chat_id, user_id, restriction_type, expires_at, reason, admin_id)
+        )
+        return result is not None
+
+    async def remove_restrictions(self, chat_id: int, user_id: int, restriction_types: Sequence[str]) -> bool:
+        result = await self.execute(
+            "DELETE FROM group_restrictions WHERE chat_id = %s AND user_id = %s AND restriction_type IN %s",
+            (chat_id, user_id, tuple(restriction_types))
+        )
+        return result is not None
+
+    async def load_expiring(self, after: Optional[datetime], upto: datetime,
+                            restriction_types: Sequence[str]) -> Optional[List[RestrictionRow]]:
+        if after is not None:
+            return await self.fetch_all(
+                "SELECT chat_id, user_id, restriction_type, expires_at FROM group_restrictions "
+                "WHERE expires_at > %s AND expires_at <= %s AND restriction_type IN %s",
+                (after, upto, tuple(restriction_types))
+            )
+        return await self.fetch_all(
+            "SELECT chat_id, user_id, restriction_type, expires_at FROM group_restrictions "
+            "WHERE expires_at <= %s AND restriction_type IN %s",
+            (upto, tuple(restriction_types))
+        )
+
+    async def delete_expired(self, rows: Sequence[RestrictionRow]) -> bool:
+        if not rows:
+            return True
+        # एक ही DELETE में पूरा बैच; बाद में बढ़ाई गई अवधि वाली पंक्तियाँ बची रहती हैं
+        values = ", ".join(["(%s::bigint, %s::bigint, %s, %s::timestamptz)"] * len(rows))
+        params = [value for row in rows for value in row]
+        result = await self.execute(
+            f"""
+            DELETE FROM group_restrictions AS g
+            USING (VALUES {values}) AS v(chat_id, user_id, restriction_type, expires_at)
+            WHERE g.chat_id = v.chat_id AND g.user_id = v.user_id
+              AND g.restriction_type = v.restriction_type AND g.expires_at <= v.expires_at
+            """,
+            tuple(params)
+        )
+        return result is not None
+
+    # --- federations ---
+
+    async def create_federation(self, fed_id: str, fed_name: str, owner_id: int) -> bool:
+        result = await self.execute(
+            "INSERT INTO federations (fed_id, fed_name, owner_id) VALUES (%s, %s, %s)",
+            (fed_id, fed_name, owner_id)
+        )
+        return result is not None
+
+    async def load_federation(self, fed_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self.fetch_all(
+            "SELECT fed_id, fed_name, owner_id FROM federations WHERE fed_id = %s", (fed_id,)
+        )
+        if rows is None:
+            return None
+        return dict(zip(("fed_id", "fed_name", "owner_id"), rows[0])) if rows else {}
+
+    async def load_federation_chats(self, fed_id: str) -> Optional[List[int]]:
+        rows = await self.fetch_all("SELECT chat_id FROM groups WHERE federation_id = %s", (fed_id,))
+        return [row[0] for row in rows] if rows is not None else None
+
+    async def count_fed_bans(self, fed_id: str) -> Optional[int]:
+        row = await self.fetch_one("SELECT COUNT(*) FROM fed_bans WHERE fed_id = %s", (fed_id,))
+        return row[0] if row else None
+
+    async def save_fed_ban(self, fed_id: str, user_id: int, reason: str, banned_by: int) -> bool:
+        result = await self.execute(
+            """
+            INSERT INTO fed_bans (fed_id, user_id, reason, banned_by)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (fed_id, user_id)
+            DO UPDATE SET reason = EXCLUDED.reason, banned_by = EXCLUDED.banned_by, created_at = NOW()
+            """,
+            (fed_id, user_id, reason, banned_by)
+        )
+        return result is not None
+
+    async def delete_fed_ban(self, fed_id: str, user_id: int) -> bool:
+        result = await self.execute(
+            "DELETE FROM fed_bans WHERE fed_id = %s AND user_id = %s", (fed_id, user_id)
+        )
+        return result is not None
+
+    async def load_fed_bans(self) -> Optional[List[Tuple[str, int]]]:
+        return await self.fetch_all("SELECT fed_id, user_id FROM fed_bans")
+
+    async def load_user_fed_bans(self, user_id: int) -> Optional[List[str]]:
+        rows = await self.fetch_all("SELECT fed_id FROM fed_bans WHERE user_id = %s", (user_id,))
+        return [row[0] for row in rows] if rows is not None else None
+
+    # --- fed ban propagation ---
+
+    async def create_fed_job(self, fed_id: str, user_id: int, action: str, reason: Optional[str],
+                             created_by: Optional[int], origin_chat_id: Optional[int]) -> Optional[int]:
+        row = await self.fetch_one(
+            "INSERT INTO fed_ban_jobs (fed_id, user_id, action, reason, created_by, origin_chat_id) "
+            "VALUES (%s, %s, %s, %s, %s, %s) RETURNING job_id",
+            (fed_id, user_id, action, reason, created_by, origin_chat_id)
+        )
+        return row[0] if row else None
+
+    async def load_open_fed_jobs(self) -> Optional[List[FedJobRow]]:
+        return await self.fetch_all(
+            "SELECT job_id, fed_id, user_id, action, reason, created_by, origin_chat_id "
+            "FROM fed_ban_jobs WHERE finished_at IS NULL ORDER BY job_id"
+        )
+
+    async def load_fed_job_chats(self, job_id: int) -> Optional[List[int]]:
+        rows = await self.fetch_all("SELECT chat_id FROM fed_ban_results WHERE job_id = %s", (job_id,))
+        return [row[0] for row in rows] if rows is not None else None
+
+    async def save_fed_job_results(self, job_id: int, results: Sequence[FedJobResult]) -> bool:
+        if not results:
+            return True
+        values = ", ".join(["(%s, %s, %s, %s)"] * len(results))
+        result = await self.execute(
+            f"""
+            INSERT INTO fed_ban_results (job_id, chat_id, status, error)
+            VALUES {values}
+            ON CONFLICT (job_id, chat_id)
+            DO UPDATE SET status = EXCLUDED.status, error = EXCLUDED.error
+            """,
+            tuple(value for chat_id, status, error in results for value in (job_id, chat_id, status, error))
+        )
+        return result is not None
+
+    async def finish_fed_job(self, job_id: int) -> bool:
+        result = await self.execute(
+            "UPDATE fed_ban_jobs SET finished_at = NOW() WHERE job_id = %s", (job_id,)
+        )
+        return result is not None
+
+    async def load_fed_job_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        job = await self.fetch_all(
+            "SELECT fed_id, user_id, action, finished_at IS NOT NULL FROM fed_ban_jobs WHERE job_id = %s",
+            (job_id,)
+        )
+        if not job:
+            return {} if job is not None else None
+        counts = await self.fetch_all(
+            "SELECT status, COUNT(*) FROM fed_ban_results WHERE job_id = %s GROUP BY status", (job_id,)
+        )
+        if counts is None:
+            return None
+        fed_id, user_id, action, finished = job[0]
+        return {"fed_id": fed_id, "user_id": user_id, "action": action, "finished": finished,
+                "results": dict(counts)}
+
+    # --- audit_log ---
+
+    async def append_audit(self, rows: Sequence[AuditRow]) -> bool:
+        if not rows:
+            return True
+        # एक ही multi-row INSERT; बिना cast के placeholder ताकि हर बैच आकार का fingerprint एक रहे
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+        result = await self.execute(
+            "INSERT INTO audit_log (created_at, chat_id, user_id, admin_id, action, reason, expires_at) "
+            f"VALUES {values}",
+            tuple(value for row in rows for value in row)
+        )
+        return result is not None
+
+    async def load_audit(self, user_id: int, chat_id: Optional[int] = None,
+                         limit: int = 20) -> Optional[List[AuditRow]]:
+        columns = "created_at, chat_id, user_id, admin_id, action, reason, expires_at"
+        if chat_id is not None:
+            return await self.fetch_all(
+                f"SELECT {columns} FROM audit_log WHERE chat_id = %s AND user_id = %s "
+                "ORDER BY created_at DESC LIMIT %s",
+                (chat_id, user_id, limit)
+            )
+        return await self.fetch_all(
+            f"SELECT {columns} FROM audit_log WHERE user_id = %s ORDER BY created_at DESC LIMIT %s",
+            (user_id, limit)
+        )
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+SQLite स्टोरेज बैकएंड: बिना DB सर्वर के छोटे single-node डिप्लॉयमेंट के लिए
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from metrics import metrics
+from querylog import query_log
+from storage import GROUP_COLUMNS, AuditRow, FedJobResult, FedJobRow, RestrictionRow, Storage, to_utc
+
+logger = logging.getLogger(__name__)
+
+# migrations/ वाला PostgreSQL स्कीमा, SQLite के प्रकारों में; expires_at epoch सेकंड है
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS groups (
+    chat_id INTEGER PRIMARY KEY,
+    welcome_message TEXT,
+    goodbye_message TEXT,
+    rules TEXT,
+    private_rules INTEGER DEFAULT 0,
+    clean_welcome INTEGER DEFAULT 0,
+    clean_service INTEGER DEFAULT 0,
+    silent_actions INTEGER DEFAULT 0,
+    log_channel INTEGER,
+    federation_id TEXT,
+    log_digest INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS group_restrictions (
+    chat_id INTEGER,
+    user_id INTEGER,
+    restriction_type TEXT,
+    expires_at REAL,
+    reason TEXT,
+    admin_id INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, user_id, restriction_type)
+);
+CREATE INDEX IF NOT EXISTS idx_group_restrictions_expires_at
+    ON group_restrictions (expires_at) WHERE expires_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS filters (
+    chat_id INTEGER,
+    trigger_word TEXT,
+    response TEXT,
+    is_private INTEGER DEFAULT 0,
+    created_by INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, trigger_word)
+);
+
+CREATE TABLE IF NOT EXISTS locks (
+    chat_id INTEGER,
+    lock_type TEXT,
+    is_locked INTEGER DEFAULT 1,
+    PRIMARY KEY (chat_id, lock_type)
+);
+
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER,
+    user_id INTEGER,
+    reason TEXT,
+    warned_by INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_warnings_chat_user ON warnings (chat_id, user_id, id);
+
+CREATE TABLE IF NOT EXISTS warn_counts (
+    chat_id INTEGER,
+    user_id INTEGER,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_groups_federation_id ON groups (federation_id) WHERE federation_id IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS federations (
+    fed_id TEXT PRIMARY KEY,
+    fed_name TEXT,
+    owner_id INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS fed_bans (
+    fed_id TEXT,
+    user_id INTEGER,
+    reason TEXT,
+    banned_by INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (fed_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_fed_bans_user ON fed_bans (user_id);
+
+CREATE TABLE IF NOT EXISTS fed_ban_jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fed_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    reason TEXT,
+    created_by INTEGER,
+    origin_chat_id INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    finished_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS fed_ban_results (
+    job_id INTEGER,
+    chat_id INTEGER,
+    status TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (job_id, chat_id)
+);
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    admin_id INTEGER,
+    action TEXT NOT NULL,
+    reason TEXT,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_log_user ON audit_log (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_audit_log_chat_user ON audit_log (chat_id, user_id, created_at);
+'''
+
+# स्कीमा बनने के बाद जोड़े गए कॉलम: पुरानी फ़ाइलों में ALTER TABLE से
+SQLITE_ADDED_COLUMNS = (
+    ("groups", "log_digest", "INTEGER DEFAULT 0"),
+)
+
+
+def _epoch(value: datetime) -> float:
+    return to_utc(value).timestamp()
+
+
+class _TimedConnection:
+    """work को मिलने वाला कनेक्शन: हर statement का समय query_log में"""
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def _timed(self, method, query: str, params):
+        start = time.perf_counter()
+        try:
+            cursor = method(query, params)
+        except Exception:
+            query_log.record(query, params, time.perf_counter() - start, error=True)
+            raise
+        # SELECT का rowcount -1 होता है; पंक्तियाँ सिर्फ DML की गिनी जाती हैं
+        query_log.record(query, params, time.perf_counter() - start, max(cursor.rowcount, 0))
+        return cursor
+
+    def execute(self, query: str, params=()):
+        return self._timed(self._conn.execute, query, params)
+
+    def executemany(self, query: str, seq_of_params):
+        return self._timed(self._conn.executemany, query, list(seq_of_params))
+
+
+class SQLiteStorage(Storage):
+    """एक ही कनेक्शन, एक ही थ्रेड पर; SQLite वैसे भी एक समय में एक writer रखता है"""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    def open(self):
+        def _open():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SQLITE_SCHEMA)
+            for table, column, definition in SQLITE_ADDED_COLUMNS:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            self._conn = conn
+        # कनेक्शन उसी थ्रेड में बने जिसमें क्वेरी चलेंगी
+        self.executor.submit(_open).result()
+        logger.info(f"SQLite स्टोरेज खुला: {self.path}")
+
+    def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self.executor.submit(_close).result()
+        self.executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "path": self.path}
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], Any], default=None):
+        """work को एक transaction में चलाएं; त्रुटि पर rollback करके default"""
+        try:
+            with self._conn:
+                return work(_TimedConnection(self._conn))
+        except Exception as e:
+            logger.error(f"SQLite क्वेरी त्रुटि: {e}")
+            return default
+
+    async def _run(self, work: Callable[[sqlite3.Connection], Any], default=None):
+        # एक round-trip में कई statement हो सकते हैं; बजट रिपोर्ट में मेथड का नाम
+        metrics.count_db_query(work.__qualname__.split(".<locals>")[0])
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._transaction, work, default)
+
+    # --- groups ---
+
+    async def load_group(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        def work(conn):
+            row = conn.execute(
+                f"SELECT {', '.join(GROUP_COLUMNS)} FROM groups WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+            return dict(zip(GROUP_COLUMNS, row)) if row else dict.fromkeys(GROUP_COLUMNS)
+        return await self._run(work)
+
+    async def save_group_setting(self, chat_id: int, setting: str, value) -> bool:
+        def work(conn):
+            conn.execute(
+                f"INSERT INTO groups (chat_id, {setting}) VALUES (?, ?) "
+                f"ON CONFLICT (chat_id) DO UPDATE SET {setting} = excluded.{setting}",
+                (chat_id, value)
+            )
+            return True
+        return await self._run(work, False)
+
+    # --- filters ---
+
+    async def load_filters(self, chat_id: int) -> Optional[Dict[str, str]]:
+        def work(conn):
+            return dict(conn.execute(
+                "SELECT trigger_word, response FROM filters WHERE chat_id = ?", (chat_id,)
+            ).fetchall())
+        return await self._run(work)
+
+    async def save_filter(self, chat_id: int, trigger: str, response: str, created_by: int) -> bool:
+        def work(conn):
+            conn.execute(
+                "INSERT INTO filters (chat_id, trigger_word, response, created_by) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (chat_id, trigger_word) DO UPDATE SET response = excluded.response",
+                (chat_id, trigger, response, created_by)
+            )
+            return True
+        return await self._run(work, False)
+
+    async def delete_filter(self, chat_id: int, trigger: str) -> bool:
+        def work(conn):
+            conn.execute("DELETE FROM filters WHERE chat_id = ? AND trigger_word = ?", (chat_id, trigger))
+            return True
+        return await self._run(work, False)
+
+    # --- locks ---
+
+    async def load_locks(self, chat_id: int) -> Optional[List[str]]:
+        def work(conn):
+            rows = conn.execute(
+                "SELECT lock_type FROM locks WHERE chat_id = ? AND is_locked = 1", (chat_id,)
+            ).fetchall()
+            return [lock_type for (lock_type,) in rows]
+        return await self._run(work)
+
+    async def save_lock(self, chat_id: int, lock_type: str, locked: bool) -> bool:
+        def work(conn):
+            if locked:
+                conn.execute(
+                    "INSERT INTO locks (chat_id, lock_type, is_locked) VALUES (?, ?, 1) "
+                    "ON CONFLICT (chat_id, lock_type) DO UPDATE SET is_locked = 1",
+                    (chat_id, lock_type)
+                )
+            else:
+                conn.execute("DELETE FROM locks WHERE chat_id = ? AND lock_type = ?", (chat_id, lock_type))
+            return True
+        return await self._run(work, False)
+
+    # --- warnings ---
+
+    async def add_warning(self, chat_id: int, user_id: int, reason: str, warned_by: int) -> Optional[int]:
+        def work(conn):
+            conn.execute(
+                "INSERT INTO warnings (chat_id, user_id, reason, warned_by) VALUES (?, ?, ?, ?)",
+                (chat_id, user_id, reason, warned_by)
+            )
+            return conn.execute(
+                "INSERT INTO warn_counts (chat_id, user_id, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (chat_id, user_id) DO UPDATE SET count = count + 1 "
+                "RETURNING count",
+                (chat_id, user_id)
+            ).fetchone()[0]
+        return await self._run(work)
+
+    async def clear_warnings(self, chat_id: int, user_id: int) -> bool:
+        def work(conn):
+            conn.execute("DELETE FROM warnings WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
+            conn.execute("DELETE FROM warn_counts WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
+            return True
+        return await self._run(work, False)
+
+    async def get_warn_count(self, chat_id: int, user_id: int) -> int:
+        def work(conn):
+            row = conn.execute(
+                "SELECT count FROM warn_counts WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+            ).fetchone()
+            return row[0] if row else 0
+        return await self._run(work, 0)
+
+    async def get_warnings(self, chat_id: int, user_id: int) -> Tuple[int, List[str]]:
+        def work(conn):
+            row = conn.execute(
+                "SELECT count FROM warn_counts WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+            ).fetchone()
+            if not row or not row[0]:
+                return 0, []
+            reasons = conn.execute(
+                "SELECT reason FROM warnings WHERE chat_id = ? AND user_id = ? ORDER BY id",
+                (chat_id, user_id)
+            ).fetchall()
+            return row[0], [reason for (reason,) in reasons]
+        return await self._run(work, (0, []))
+
+    # --- group_restrictions ---
+
+    async def add_restriction(self, chat_id: int, user_id: int, restriction_type: str,
+                              expires_at: Optional[datetime], reason: str, admin_id: int,
+                              replaces: Sequence[str] = ()) -> bool:
+        def work(conn):
+            conn.executemany(
+                "DELETE FROM group_restrictions WHERE chat_id = ? AND user_id = ? AND restriction_type = ?",
+                [(chat_id, user_id, replaced) for replaced in replaces]
+            )
+            conn.execute(
+                "INSERT INTO group_restrictions "
+                "(chat_id, user_id, restriction_type, expires_at, reason, admin_id) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (chat_id, user_id, restriction_type) "
+                "DO UPDATE SET expires_at = excluded.expires_at, reason = excluded.reason",
+                (chat_id, user_id, restriction_type,
+                 _epoch(expires_at) if expires_at else None, reason, admin_id)
+            )
+            return True
+        return await self._run(work, False)
+
+    async def remove_restrictions(self, chat_id: int, user_id: int, restriction_types: Sequence[str]) -> bool:
+        def work(conn):
+            conn.executemany(
+                "DELETE FROM group_restrictions WHERE chat_id = ? AND user_id = ? AND restriction_type = ?",
+                [(chat_id, user_id, restriction_type) for restriction_type in restriction_types]
+            )
+            return True
+        return await self._run(work, False)
+
+    async def load_expiring(self, after: Optional[datetime], upto: datetime,
+                            restriction_types: Sequence[str]) -> Optional[List[RestrictionRow]]:
+        def work(conn):
+            placeholders = ", ".join("?" * len(restriction_types))
+            rows = conn.execute(
+                "SELECT chat_id, user_id, restriction_type, expires_at FROM group_restrictions "
+                f"WHERE expires_at > ? AND expires_at <= ? AND restriction_type IN ({placeholders})",
+                (_epoch(after) if after else float("-inf"), _epoch(upto), *restriction_types)
+            ).fetchall()
+            return [
+                (chat_id, user_id, restriction_type, datetime.fromtimestamp(expires_at, timezone.utc))
+                for chat_id, user_id, restriction_type, expires_at in rows
+            ]
+        return await self._run(work)
+
+    async def delete_expired(self, rows: Sequence[RestrictionRow]) -> bool:
+        def work(conn):
+            conn.executemany(
+                "DELETE FROM group_restrictions "
+                "WHERE chat_id = ? AND user_id = ? AND restriction_type = ? AND expires_at <= ?",
+                [(chat_id, user_id, restriction_type, _epoch(expires_at))
+                 for chat_id, user_id, restriction_type, expires_at in rows]
+            )
+            return True
+        return await self._run(work, False)
+
+    # --- federations ---
+
+    async def create_federation(self, fed_id: str, fed_name: str, owner_id: int) -> bool:
+        def work(conn):
+            conn.execute(
+                "INSERT INTO federations (fed_id, fed_name, owner_id) VALUES (?, ?, ?)",
+                (fed_id, fed_name, owner_id)
+            )
+            return True
+        return await self._run(work, False)
+
+    async def load_federation(self, fed_id: str) -> Optional[Dict[str, Any]]:
+        def work(conn):
+            row = conn.execute(
+                "SELECT fed_id, fed_name, owner_id FROM federations WHERE fed_id = ?", (fed_id,)
+            ).fetchone()
+            return dict(zip(("fed_id", "fed_name", "owner_id"), row)) if row else {}
+        return await self._run(work)
+
+    async def load_federation_chats(self, fed_id: str) -> Optional[List[int]]:
+        def work(conn):
+            rows = conn.execute("SELECT chat_id FROM groups WHERE federation_id = ?", (fed_id,)).fetchall()
+            return [row[0] for row in rows]
+        return await self._run(work)
+
+    async def count_fed_bans(self, fed_id: str) -> Optional[int]:
+        def work(conn):
+            return conn.execute("SELECT COUNT(*) FROM fed_bans WHERE fed_id = ?", (fed_id,)).fetchone()[0]
+        return await self._run(work)
+
+    async def save_fed_ban(self, fed_id: str, user_id: int, reason: str, banned_by: int) -> bool:
+        def work(conn):
+            conn.execute(
+                "INSERT INTO fed_bans (fed_id, user_id, reason, banned_by) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (fed_id, user_id) DO UPDATE SET reason = excluded.reason, "
+                "banned_by = excluded.banned_by, created_at = CURRENT_TIMESTAMP",
+                (fed_id, user_id, reason, banned_by)
+            )
+            return True
+        return await self._run(work, False)
+
+    async def delete_fed_ban(self, fed_id: str, user_id: int) -> bool:
+        def work(conn):
+            conn.execute("DELETE FROM fed_bans WHERE fed_id = ? AND user_id = ?", (fed_id, user_id))
+            return True
+        return await self._run(work, False)
+
+    async def load_fed_bans(self) -> Optional[List[Tuple[str, int]]]:
+        def work(conn):
+            return conn.execute("SELECT fed_id, user_id FROM fed_bans").fetchall()
+        return await self._run(work)
+
+    async def load_user_fed_bans(self, user_id: int) -> Optional[List[str]]:
+        def work(conn):
+            rows = conn.execute("SELECT fed_id FROM fed_bans WHERE user_id = ?", (user_id,)).fetchall()
+            return [row[0] for row in rows]
+        return await self._run(work)
+
+    # --- fed ban propagation ---
+
+    async def create_fed_job(self, fed_id: str, user_id: int, action: str, reason: Optional[str],
+                             created_by: Optional[int], origin_chat_id: Optional[int]) -> Optional[int]:
+        def work(conn):
+            cursor = conn.execute(
+                "INSERT INTO fed_ban_jobs (fed_id, user_id, action, reason, created_by, origin_chat_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fed_id, user_id, action, reason, created_by, origin_chat_id)
+            )
+            return cursor.lastrowid
+        return await self._run(work)
+
+    async def load_open_fed_jobs(self) -> Optional[List[FedJobRow]]:
+        def work(conn):
+            return conn.execute(
+                "SELECT job_id, fed_id, user_id, action, reason, created_by, origin_chat_id "
+                "FROM fed_ban_jobs WHERE finished_at IS NULL ORDER BY job_id"
+            ).fetchall()
+        return await self._run(work)
+
+    async def load_fed_job_chats(self, job_id: int) -> Optional[List[int]]:
+        def work(conn):
+            rows = conn.execute("SELECT chat_id FROM fed_ban_results WHERE job_id = ?", (job_id,)).fetchall()
+            return [row[0] for row in rows]
+        return await self._run(work)
+
+    async def save_fed_job_results(self, job_id: int, results: Sequence[FedJobResult]) -> bool:
+        def work(conn):
+            conn.executemany(
+                "INSERT INTO fed_ban_results (job_id, chat_id, status, error) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (job_id, chat_id) DO UPDATE SET status = excluded.status, error = excluded.error",
+                [(job_id, chat_id, status, error) for chat_id, status, error in results]
+            )
+            return True
+        return await self._run(work, False)
+
+    async def finish_fed_job(self, job_id: int) -> bool:
+        def work(conn):
+            conn.execute(
+                "UPDATE fed_ban_jobs SET finished_at = CURRENT_TIMESTAMP WHERE job_id = ?", (job_id,)
+            )
+            return True
+        return await self._run(work, False)
+
+    async def load_fed_job_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        def work(conn):
+            job = conn.execute(
+                "SELECT fed_id, user_id, action, finished_at IS NOT NULL FROM fed_ban_jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+            if job is None:
+                return {}
+            counts = conn.execute(
+                "SELECT status, COUNT(*) FROM fed_ban_results WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall()
+            fed_id, user_id, action, finished = job
+            return {"fed_id": fed_id, "user_id": user_id, "action": action, "finished": bool(finished),
+                    "results": dict(counts)}
+        return await self._run(work)
+
+    # --- audit_log ---
+
+    async def append_audit(self, rows: Sequence[AuditRow]) -> bool:
+        def work(conn):
+            conn.executemany(
+                "INSERT INTO audit_log (created_at, chat_id, user_id, admin_id, action, reason, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(_epoch(created_at), chat_id, user_id, admin_id, action, reason,
+                  _epoch(expires_at) if expires_at else None)
+                 for created_at, chat_id, user_id, admin_id, action, reason, expires_at in rows]
+            )
+            return True
+        return await self._run(work, False)
+
+    async def load_audit(self, user_id: int, chat_id: Optional[int] = None,
+                         limit: int = 20) -> Optional[List[AuditRow]]:
+        def work(conn):
+            columns = "created_at, chat_id, user_id, admin_id, action, reason, expires_at"
+            if chat_id is not None:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM audit_log WHERE chat_id = ? AND user_id = ? "
+                    "ORDER BY created_at DESC LIMIT ?",
+                    (chat_id, user_id, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM audit_log WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                    (user_id, limit)
+                ).fetchall()
+            return [
+                (datetime.fromtimestamp(created_at, timezone.utc), row_chat_id, row_user_id, admin_id,
+                 action, reason, datetime.fromtimestamp(expires_at, timezone.utc) if expires_at else None)
+                for created_at, row_chat_id, row_user_id, admin_id, action, reason, expires_at in rows
+            ]
+        return await self._run(work)
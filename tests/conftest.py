@@ -0,0 +1,5 @@
+import os
+import sys
+
+# टेस्ट रिपॉज़िटरी की जड़ के मॉड्यूल (bot.py, storage.py, ...) सीधे import करते हैं
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+"""फ़िल्टर मैचिंग: Aho-Corasick automaton और प्रति-चैट ChatFilters/FilterCache"""
+import asyncio
+import os
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import bot  # noqa: E402
+from matcher import AhoCorasick  # noqa: E402
+
+CHAT = -1001
+
+
+def test_overlapping_triggers():
+    matcher = AhoCorasick(["he", "she", "hers", "his"])
+    # "she" पर "he" भी ख़त्म होता है: उसी स्थान पर सबसे लंबा
+    assert matcher.find_first("ushers") == "she"
+    assert matcher.find_first("ahis") == "his"
+    # सबसे पहले ख़त्म होने वाला, भले वह बाद में शुरू हुआ हो
+    assert AhoCorasick(["abcd", "bc"]).find_first("abcd") == "bc"
+    assert AhoCorasick(["abc", "b"]).find_first("xabc") == "b"
+    assert matcher.find_first("nothing") is None
+
+
+def test_failure_links_across_partial_matches():
+    matcher = AhoCorasick(["aab", "ab"])
+    assert matcher.find_first("aaab") == "aab"
+    assert AhoCorasick(["abcx", "bcd"]).find_first("abcd") == "bcd"
+
+
+def test_duplicate_and_empty_patterns():
+    matcher = AhoCorasick(["", "spam", "spam"])
+    assert len(matcher) == 1
+    assert matcher.find_first("") is None
+    assert matcher.find_first("no spam here") == "spam"
+
+
+def test_devanagari_substring_semantics():
+    # पुराने `trigger in text` की तरह कोई शब्द-सीमा नहीं: शब्द के अंदर भी मेल
+    matcher = AhoCorasick(["नम", "धन्यवाद"])
+    assert matcher.find_first("नमस्ते दोस्तों") == "नम"
+    assert matcher.find_first("आपका बहुत धन्यवाद!") == "धन्यवाद"
+    # मात्रा अलग code point है: "की" का "क" से शुरू होना काफ़ी नहीं
+    assert AhoCorasick(["की"]).find_first("कि") is None
+    assert AhoCorasick(["की"]).find_first("किताब की") == "की"
+    # अधूरा conjunct (्) भी एक अलग अक्षर है
+    assert AhoCorasick(["स्"]).find_first("नमस्ते") == "स्"
+    assert AhoCorasick(["स्"]).find_first("सब") is None
+
+
+def test_case_folding():
+    # /filter trigger को और handle_message संदेश को lowercase करते हैं
+    chat_filters = bot.ChatFilters({"hello": "hi!"})
+    assert chat_filters.match("Say HeLLo".lower()) == "hi!"
+    assert chat_filters.match("Say HeLLo") is None
+    # देवनागरी पर lower() कुछ नहीं बदलता
+    assert bot.ChatFilters({"नमस्ते": "🙏"}).match("NAMASTE नमस्ते".lower()) == "🙏"
+
+
+def test_chat_filters_rebuild_after_set_and_remove():
+    chat_filters = bot.ChatFilters({"spam": "no spam"})
+    assert chat_filters.match("buy spam") == "no spam"
+
+    chat_filters.set("buy", "no buying")
+    assert chat_filters.match("buy now") == "no buying"
+    # सिर्फ जवाब बदला: automaton वही, नया जवाब
+    chat_filters.set("buy", "मत खरीदो")
+    assert chat_filters.match("buy now") == "मत खरीदो"
+
+    chat_filters.remove("buy")
+    assert chat_filters.match("buy now") is None
+    chat_filters.remove("spam")
+    assert chat_filters.match("buy spam") is None
+
+
+def test_database_filter_writes_update_cached_matcher():
+    async def scenario():
+        db = bot.Database("memory://")
+        assert (await db.get_chat_filters(CHAT)).match("hello") is None
+
+        assert await db.add_filter(CHAT, "hello", "नमस्ते", 1)
+        cached = await db.get_chat_filters(CHAT)
+        assert cached.match("oh hello there") == "नमस्ते"
+
+        assert await db.add_filter(CHAT, "bye", "अलविदा", 1)
+        assert (await db.get_chat_filters(CHAT)) is cached
+        assert cached.match("ok bye") == "अलविदा"
+
+        assert await db.remove_filter(CHAT, "hello")
+        assert (await db.get_chat_filters(CHAT)).match("oh hello there") is None
+
+        # कैश खाली होने पर स्टोरेज से वही फ़िल्टर लौटते हैं
+        db.filter_cache.clear()
+        reloaded = await db.get_chat_filters(CHAT)
+        assert reloaded.responses == {"bye": "अलविदा"}
+        assert reloaded.match("bye bye") == "अलविदा"
+
+    asyncio.run(scenario())
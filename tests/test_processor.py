@@ -0,0 +1,113 @@
+"""ChatOrderedUpdateProcessor: चैट के भीतर क्रम, चैटों में समानांतर"""
+import asyncio
+import random
+
+from telegram import Update
+
+from bench import FIRST_CHAT, UpdateFactory
+from processor import ChatOrderedUpdateProcessor
+
+factory = UpdateFactory(random.Random(0), chats=2, users=2)
+
+
+def make_update(chat_id: int) -> Update:
+    return Update.de_json(factory.message(chat_id=chat_id, text="hi"), None)
+
+
+async def handler(log: list, name: str, delay: float = 0, fail: bool = False):
+    log.append(("start", name))
+    await asyncio.sleep(delay)
+    if fail:
+        raise RuntimeError(name)
+    log.append(("end", name))
+
+
+def submit(processor, update, coroutine):
+    # Application की तरह: हर अपडेट के लिए कतार के क्रम में एक task
+    return asyncio.create_task(processor.process_update(update, coroutine))
+
+
+def test_updates_for_one_chat_run_in_order():
+    async def scenario():
+        processor = ChatOrderedUpdateProcessor(max_running=8)
+        await processor.initialize()
+        log = []
+        # पहला सबसे धीमा: फिर भी बाद वाले उसके ख़त्म होने तक शुरू न हों
+        delays = [0.03, 0.01, 0]
+        tasks = [
+            submit(processor, make_update(FIRST_CHAT), handler(log, index, delay))
+            for index, delay in enumerate(delays)
+        ]
+        await asyncio.gather(*tasks)
+        assert log == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+        assert processor.stats()["ordered_chats"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_different_chats_run_concurrently():
+    async def scenario():
+        processor = ChatOrderedUpdateProcessor(max_running=8)
+        await processor.initialize()
+        log = []
+        first = submit(processor, make_update(FIRST_CHAT), handler(log, "a", 0.05))
+        second = submit(processor, make_update(FIRST_CHAT - 1), handler(log, "b", 0))
+        await asyncio.gather(first, second)
+        # दूसरी चैट पहली के धीमे हैंडलर का इंतज़ार नहीं करती
+        assert log == [("start", "a"), ("start", "b"), ("end", "b"), ("end", "a")]
+        assert processor.stats()["max_running"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_max_running_limits_concurrent_handlers():
+    async def scenario():
+        processor = ChatOrderedUpdateProcessor(max_running=1)
+        await processor.initialize()
+        log = []
+        first = submit(processor, make_update(FIRST_CHAT), handler(log, "a", 0.02))
+        second = submit(processor, make_update(FIRST_CHAT - 1), handler(log, "b", 0))
+        await asyncio.gather(first, second)
+        assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b")]
+
+    asyncio.run(scenario())
+
+
+def test_exception_does_not_break_chat_chain():
+    async def scenario():
+        processor = ChatOrderedUpdateProcessor(max_running=8)
+        await processor.initialize()
+        log = []
+        tasks = [
+            submit(processor, make_update(FIRST_CHAT), handler(log, "fails", 0.01, fail=True)),
+            submit(processor, make_update(FIRST_CHAT), handler(log, "next", 0)),
+            submit(processor, make_update(FIRST_CHAT), handler(log, "last", 0)),
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert isinstance(results[0], RuntimeError)
+        assert results[1:] == [None, None]
+        assert log == [("start", "fails"), ("start", "next"), ("end", "next"), ("start", "last"), ("end", "last")]
+
+        # चैट की कड़ी साफ़ हो चुकी है: नया अपडेट बिना इंतज़ार चलता है
+        assert processor.stats()["ordered_chats"] == 0
+        await processor.process_update(make_update(FIRST_CHAT), handler(log, "later"))
+        assert log[-1] == ("end", "later")
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_update_keeps_order_for_the_next():
+    async def scenario():
+        processor = ChatOrderedUpdateProcessor(max_running=8)
+        await processor.initialize()
+        log = []
+        first = submit(processor, make_update(FIRST_CHAT), handler(log, "slow", 0.03))
+        waiting = submit(processor, make_update(FIRST_CHAT), handler(log, "cancelled"))
+        third = submit(processor, make_update(FIRST_CHAT), handler(log, "third"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(first, third, return_exceptions=True)
+        # रद्द हुआ अपडेट तीसरे को पहले से आगे नहीं निकलने देता
+        assert log == [("start", "slow"), ("end", "slow"), ("start", "third"), ("end", "third")]
+
+    asyncio.run(scenario())
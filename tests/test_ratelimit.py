@@ -0,0 +1,36 @@
+from ratelimit import Limit, RateLimitEngine
+
+LIMITS = {
+    "default": {"user": Limit(3, 1), "chat": Limit(1, 20), "global": Limit(60, 1)},
+    "report_user": {"user": Limit(60, 2)},
+    "kickme": {"user": None},
+}
+
+
+def test_commands_share_global_budget():
+    engine = RateLimitEngine(LIMITS)
+    assert engine.check("show_rules", 1, -100) is None
+    # दूसरा कमांड, दूसरा यूज़र और चैट: global bucket वही है
+    assert engine.check("get_id", 2, -200) == "global"
+
+
+def test_commands_share_user_cooldown():
+    engine = RateLimitEngine({"default": {"user": Limit(3, 1)}})
+    assert engine.check("show_rules", 1, -100) is None
+    assert engine.check("get_id", 1, -100) == "user"
+    assert engine.check("get_id", 2, -100) is None
+
+
+def test_override_gets_its_own_bucket():
+    engine = RateLimitEngine({"default": {"user": Limit(3, 1)}, "report_user": {"user": Limit(60, 2)}})
+    assert engine.check("show_rules", 1, -100) is None
+    # report_user का user स्कोप अलग है, साझा cooldown से नहीं घटता
+    assert engine.check("report_user", 1, -100) is None
+    assert engine.check("report_user", 1, -100) is None
+    assert engine.check("report_user", 1, -100) == "user"
+
+
+def test_none_override_disables_scope():
+    engine = RateLimitEngine({"default": {"user": Limit(3, 1)}, "kickme": {"user": None}})
+    assert engine.check("kickme", 1, -100) is None
+    assert engine.check("kickme", 1, -100) is None
@@ -0,0 +1,194 @@
+"""MemoryStorage और SQLiteStorage एक ही अनुबंध (Storage) निभाते हैं"""
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from storage import GROUP_COLUMNS, MemoryStorage, to_utc
+from storage_sqlite import SQLITE_ADDED_COLUMNS, SQLITE_SCHEMA, SQLiteStorage
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+CHAT = -1001
+# 0001_initial की टेबलें जिनका Storage में कोई मेथड नहीं, इसलिए SQLite में नहीं
+POSTGRES_ONLY_TABLES = {"users", "disabled_commands"}
+OTHER_CHAT = -1002
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request):
+    backend = MemoryStorage() if request.param == "memory" else SQLiteStorage(":memory:")
+    backend.open()
+    yield backend
+    backend.close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def at(seconds: float) -> datetime:
+    return datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_group_settings(storage):
+    assert run(storage.load_group(CHAT)) == dict.fromkeys(GROUP_COLUMNS)
+    assert run(storage.save_group_setting(CHAT, "welcome_message", "नमस्ते"))
+    assert run(storage.save_group_setting(CHAT, "welcome_message", "स्वागत"))
+    assert run(storage.save_group_setting(CHAT, "federation_id", "fed"))
+    row = run(storage.load_group(CHAT))
+    assert set(row) == set(GROUP_COLUMNS)
+    assert row["welcome_message"] == "स्वागत"
+    assert row["federation_id"] == "fed"
+    assert run(storage.load_group(OTHER_CHAT))["welcome_message"] is None
+
+
+def test_filters_and_locks(storage):
+    run(storage.save_filter(CHAT, "hi", "hello", 1))
+    run(storage.save_filter(CHAT, "hi", "नमस्ते", 1))
+    run(storage.save_filter(CHAT, "bye", "अलविदा", 1))
+    run(storage.save_filter(OTHER_CHAT, "x", "y", 1))
+    assert run(storage.load_filters(CHAT)) == {"hi": "नमस्ते", "bye": "अलविदा"}
+    assert run(storage.delete_filter(CHAT, "bye"))
+    assert run(storage.load_filters(CHAT)) == {"hi": "नमस्ते"}
+
+    run(storage.save_lock(CHAT, "media", True))
+    run(storage.save_lock(CHAT, "url", True))
+    run(storage.save_lock(CHAT, "url", False))
+    assert run(storage.load_locks(CHAT)) == ["media"]
+    assert run(storage.load_locks(OTHER_CHAT)) == []
+
+
+def test_warnings_count(storage):
+    assert run(storage.get_warn_count(CHAT, 5)) == 0
+    assert [run(storage.add_warning(CHAT, 5, f"r{n}", 1)) for n in range(3)] == [1, 2, 3]
+    assert run(storage.add_warning(OTHER_CHAT, 5, "x", 1)) == 1
+    assert run(storage.get_warn_count(CHAT, 5)) == 3
+    assert run(storage.get_warnings(CHAT, 5)) == (3, ["r0", "r1", "r2"])
+
+    assert run(storage.clear_warnings(CHAT, 5))
+    assert run(storage.get_warn_count(CHAT, 5)) == 0
+    assert run(storage.get_warnings(CHAT, 5)) == (0, [])
+    assert run(storage.add_warning(CHAT, 5, "फिर", 1)) == 1
+    assert run(storage.get_warn_count(OTHER_CHAT, 5)) == 1
+
+
+def test_restrictions_expiry(storage):
+    run(storage.add_restriction(CHAT, 1, "tban", at(100), "r", 9))
+    run(storage.add_restriction(CHAT, 2, "tmute", at(200), "r", 9))
+    run(storage.add_restriction(CHAT, 3, "tban", at(300), "r", 9))
+
+    rows = run(storage.load_expiring(None, at(250), ("tban", "tmute")))
+    assert sorted((chat_id, user_id, kind, to_utc(expires)) for chat_id, user_id, kind, expires in rows) == [
+        (CHAT, 1, "tban", at(100)), (CHAT, 2, "tmute", at(200)),
+    ]
+    assert [row[1] for row in run(storage.load_expiring(at(100), at(250), ("tban",)))] == []
+    assert [row[1] for row in run(storage.load_expiring(at(100), at(400), ("tban",)))] == [3]
+
+    # स्थायी बैन पुराने tban की जगह लेता है
+    run(storage.add_restriction(CHAT, 1, "ban", None, "r", 9, replaces=("tban",)))
+    assert [row[1] for row in run(storage.load_expiring(None, at(1000), ("tban",)))] == [3]
+
+    # अवधि बढ़ी हो तो पुरानी समाप्ति वाली पंक्ति नहीं हटती
+    run(storage.add_restriction(CHAT, 3, "tban", at(900), "r", 9))
+    assert run(storage.delete_expired([(CHAT, 3, "tban", at(300)), (CHAT, 2, "tmute", at(200))]))
+    rows = run(storage.load_expiring(None, at(1000), ("tban", "tmute")))
+    assert [(row[1], to_utc(row[3])) for row in rows] == [(3, at(900))]
+
+    assert run(storage.remove_restrictions(CHAT, 3, ("tban",)))
+    assert run(storage.load_expiring(None, at(1000), ("tban", "tmute"))) == []
+
+
+def test_federations_and_fed_bans(storage):
+    assert run(storage.load_federation("fed")) == {}
+    assert run(storage.create_federation("fed", "Alpha", 7))
+    assert run(storage.load_federation("fed")) == {"fed_id": "fed", "fed_name": "Alpha", "owner_id": 7}
+
+    run(storage.save_group_setting(CHAT, "federation_id", "fed"))
+    run(storage.save_group_setting(OTHER_CHAT, "federation_id", "other"))
+    assert run(storage.load_federation_chats("fed")) == [CHAT]
+
+    run(storage.save_fed_ban("fed", 5, "spam", 7))
+    run(storage.save_fed_ban("fed", 5, "फिर spam", 7))
+    run(storage.save_fed_ban("fed", 6, "spam", 7))
+    run(storage.save_fed_ban("other", 5, "spam", 8))
+    assert run(storage.count_fed_bans("fed")) == 2
+    assert sorted(run(storage.load_fed_bans())) == [("fed", 5), ("fed", 6), ("other", 5)]
+    assert sorted(run(storage.load_user_fed_bans(5))) == ["fed", "other"]
+
+    assert run(storage.delete_fed_ban("fed", 5))
+    assert run(storage.load_user_fed_bans(5)) == ["other"]
+    assert run(storage.count_fed_bans("fed")) == 1
+
+
+def test_fed_ban_jobs(storage):
+    assert run(storage.load_fed_job_status(1)) == {}
+    first = run(storage.create_fed_job("fed", 5, "fban", "spam", 7, CHAT))
+    second = run(storage.create_fed_job("fed", 6, "unfban", None, 7, None))
+    assert second > first
+    assert run(storage.load_open_fed_jobs()) == [
+        (first, "fed", 5, "fban", "spam", 7, CHAT),
+        (second, "fed", 6, "unfban", None, 7, None),
+    ]
+
+    assert run(storage.save_fed_job_results(first, [(-1, "ok", None), (-2, "failed", "no rights")]))
+    # दोबारा चलने पर उसी चैट का नतीजा बदलता है, नई पंक्ति नहीं बनती
+    assert run(storage.save_fed_job_results(first, [(-2, "ok", None), (-3, "ok", None)]))
+    assert run(storage.save_fed_job_results(first, []))
+    assert sorted(run(storage.load_fed_job_chats(first))) == [-3, -2, -1]
+    assert run(storage.load_fed_job_status(first)) == {
+        "fed_id": "fed", "user_id": 5, "action": "fban", "finished": False, "results": {"ok": 3},
+    }
+
+    assert run(storage.finish_fed_job(first))
+    assert run(storage.load_fed_job_status(first))["finished"] is True
+    assert [row[0] for row in run(storage.load_open_fed_jobs())] == [second]
+
+
+def test_audit_log(storage):
+    rows = [
+        (at(n), CHAT if n % 2 else OTHER_CHAT, 5, 9, "ban" if n % 2 else "mute", f"r{n}",
+         at(n + 60) if n == 3 else None)
+        for n in range(6)
+    ]
+    assert run(storage.append_audit(rows))
+    assert run(storage.append_audit([(at(10), CHAT, 6, None, "warn", None, None)]))
+
+    history = run(storage.load_audit(5))
+    assert [row[5] for row in history] == ["r5", "r4", "r3", "r2", "r1", "r0"]
+    created_at, chat_id, user_id, admin_id, action, reason, expires_at = history[2]
+    assert (to_utc(created_at), chat_id, user_id, admin_id, action, reason, to_utc(expires_at)) == (
+        at(3), CHAT, 5, 9, "ban", "r3", at(63),
+    )
+    assert [row[5] for row in run(storage.load_audit(5, CHAT))] == ["r5", "r3", "r1"]
+    assert [row[5] for row in run(storage.load_audit(5, limit=2))] == ["r5", "r4"]
+    assert run(storage.load_audit(6))[0][3] is None
+
+
+def _tables(sql: str) -> set:
+    return set(re.findall(r"CREATE TABLE IF NOT EXISTS (\w+)", sql, re.IGNORECASE))
+
+
+def _columns(sql: str, table: str) -> set:
+    body = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \((.*?)\n\);", sql, re.S | re.I).group(1)
+    return {
+        line.split()[0] for line in body.strip().splitlines()
+        if line.strip() and not line.strip().upper().startswith(("PRIMARY KEY", "UNIQUE", "--"))
+    }
+
+
+def test_sqlite_schema_matches_migrations():
+    migrations = ""
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith(".sql"):
+            with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+                migrations += f.read() + "\n"
+    assert _tables(SQLITE_SCHEMA) == _tables(migrations) - POSTGRES_ONLY_TABLES
+
+    added = set(re.findall(r"ALTER TABLE groups ADD COLUMN (?:IF NOT EXISTS )?(\w+)", migrations, re.I))
+    sqlite_groups = _columns(SQLITE_SCHEMA, "groups") | {
+        column for table, column, _ in SQLITE_ADDED_COLUMNS if table == "groups"
+    }
+    assert _columns(migrations, "groups") | added == sqlite_groups
+    assert set(GROUP_COLUMNS) <= sqlite_groups
@@ -0,0 +1,170 @@
+"""SendScheduler: प्राथमिकता कतारें, बजट का बँटवारा और RetryAfter back-off"""
+import asyncio
+
+import pytest
+from telegram.error import RetryAfter
+
+from ratelimit import Limit
+from throttle import (
+    GLOBAL_SEND_LIMIT,
+    PRIORITY_LOW,
+    PRIORITY_MODERATION,
+    PRIORITY_NORMAL,
+    SendScheduler,
+    split_limit,
+)
+
+GROUP = -1001
+OTHER_GROUP = -1002
+
+
+async def started(scheduler: SendScheduler) -> SendScheduler:
+    await scheduler.initialize()
+    return scheduler
+
+
+def drain_global(scheduler: SendScheduler):
+    """global bucket खाली करें ताकि अगले अनुरोध कतार में रुकें"""
+    scheduler._global.peek("global", asyncio.get_running_loop().time())
+    scheduler._global.consume("global")
+
+
+def send(scheduler, log, name, chat_id=GROUP, priority=None, endpoint="sendMessage"):
+    async def callback():
+        log.append(name)
+        return name
+
+    rate_limit_args = None if priority is None else {"priority": priority}
+    return asyncio.create_task(
+        scheduler.process_request(callback, (), {}, endpoint, {"chat_id": chat_id}, rate_limit_args)
+    )
+
+
+def test_split_limit_divides_the_budget():
+    per_worker = split_limit(GLOBAL_SEND_LIMIT, 4)
+    assert per_worker == Limit(4 / 30, 7)
+    # सभी workers मिलकर भी ~30 संदेश/सेकंड से ऊपर नहीं जाते
+    assert 4 / per_worker.period == pytest.approx(30)
+    assert split_limit(GLOBAL_SEND_LIMIT, 1) == GLOBAL_SEND_LIMIT
+    # burst कभी शून्य नहीं होता
+    assert split_limit(Limit(1, 2), 5) == Limit(5, 1)
+
+
+def test_higher_priority_is_sent_first():
+    async def scenario():
+        scheduler = await started(SendScheduler(global_limit=Limit(0.01, 1)))
+        log = []
+        # global bucket खाली है: सभी अनुरोध कतार में इंतज़ार करते हैं
+        drain_global(scheduler)
+        tasks = [
+            send(scheduler, log, "low", priority=PRIORITY_LOW),
+            send(scheduler, log, "normal", chat_id=OTHER_GROUP, priority=PRIORITY_NORMAL),
+            send(scheduler, log, "ban", chat_id=-1003, priority=PRIORITY_MODERATION),
+        ]
+        await asyncio.gather(*tasks)
+        await scheduler.shutdown()
+        assert log == ["ban", "normal", "low"]
+        assert scheduler.stats()["sent"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_exhausted_chat_does_not_block_other_chats():
+    async def scenario():
+        scheduler = await started(SendScheduler(group_limit=Limit(10, 1)))
+        log = []
+        await send(scheduler, log, "first", chat_id=GROUP)
+        # GROUP का बजट ख़त्म: अगला उसी चैट का संदेश रुकता है, दूसरी चैट का नहीं
+        blocked = send(scheduler, log, "blocked", chat_id=GROUP, priority=PRIORITY_MODERATION)
+        await send(scheduler, log, "other", chat_id=OTHER_GROUP, priority=PRIORITY_LOW)
+        assert log == ["first", "other"]
+        assert not blocked.done()
+        await scheduler.shutdown()
+        # shutdown कतार में रुके अनुरोध रद्द करता है
+        results = await asyncio.gather(blocked, return_exceptions=True)
+        assert isinstance(results[0], asyncio.CancelledError)
+
+    asyncio.run(scenario())
+
+
+def test_unthrottled_endpoints_skip_the_queue():
+    async def scenario():
+        scheduler = await started(SendScheduler(global_limit=Limit(10, 1)))
+        log = []
+        drain_global(scheduler)
+        await send(scheduler, log, "ban", endpoint="banChatMember")
+        assert log == ["ban"]
+        assert scheduler.queued() == 0
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_pauses_and_requeues():
+    async def scenario():
+        scheduler = await started(SendScheduler())
+        loop = asyncio.get_running_loop()
+        attempts = []
+
+        async def flaky():
+            attempts.append(loop.time())
+            if len(attempts) == 1:
+                raise RetryAfter(0.05)
+            return "ok"
+
+        result = await scheduler.process_request(flaky, (), {}, "sendMessage", {"chat_id": GROUP}, None)
+        assert result == "ok"
+        assert len(attempts) == 2
+        # retry_after + 0.1 सेकंड की सुरक्षा के बाद ही दोबारा भेजा गया
+        assert attempts[1] - attempts[0] >= 0.15
+        assert scheduler.stats()["retry_after"] == 1
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_pauses_every_request():
+    async def scenario():
+        scheduler = await started(SendScheduler())
+        loop = asyncio.get_running_loop()
+
+        async def flood():
+            raise RetryAfter(0.05)
+
+        failing = asyncio.create_task(
+            scheduler.process_request(flood, (), {}, "sendMessage", {"chat_id": GROUP}, None)
+        )
+        await asyncio.sleep(0.01)
+        paused_at = loop.time()
+        sent_at = []
+
+        async def record():
+            sent_at.append(loop.time())
+
+        # दूसरी चैट और बिना बजट वाला endpoint भी pause खत्म होने तक रुकते हैं
+        await scheduler.process_request(record, (), {}, "sendMessage", {"chat_id": OTHER_GROUP}, None)
+        await scheduler.process_request(record, (), {}, "deleteMessage", {"chat_id": OTHER_GROUP}, None)
+        assert all(moment >= paused_at + 0.1 for moment in sent_at)
+        failing.cancel()
+        await asyncio.gather(failing, return_exceptions=True)
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_gives_up_after_max_retries():
+    async def scenario():
+        scheduler = await started(SendScheduler(max_retries=1))
+        calls = []
+
+        async def flood():
+            calls.append(1)
+            raise RetryAfter(0)
+
+        with pytest.raises(RetryAfter):
+            await scheduler.process_request(flood, (), {}, "sendMessage", {"chat_id": GROUP}, None)
+        assert len(calls) == 2
+        assert scheduler.stats()["retry_after"] == 2
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,176 @@
+"""HTTPServer: keep-alive, गलत अनुरोधों के जवाब और webhook secret"""
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import main  # noqa: E402
+from webserver import HTTPServer, Request, Response  # noqa: E402
+
+
+async def echo(request: Request) -> Response:
+    return Response(200, request.body or b"ok")
+
+
+def serve(scenario, **options):
+    """scenario(connect) को एक चालू सर्वर के साथ चलाएं"""
+    async def run():
+        server = HTTPServer(**options)
+        server.route("GET", "/", echo)
+        server.route("POST", "/hook", echo)
+        await server.start("127.0.0.1", 0)
+        port = server._server.sockets[0].getsockname()[1]
+        try:
+            await scenario(server, lambda: asyncio.open_connection("127.0.0.1", port))
+        finally:
+            await server.stop()
+    asyncio.run(run())
+
+
+async def read_response(reader: asyncio.StreamReader, head: bool = False):
+    status_line = await reader.readline()
+    if not status_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = b"" if head else await reader.readexactly(int(headers.get("content-length", "0")))
+    return int(status_line.split()[1]), headers, body
+
+
+async def exchange(connect, raw: bytes):
+    reader, writer = await connect()
+    writer.write(raw)
+    await writer.drain()
+    response = await read_response(reader)
+    closed = await reader.read() == b""
+    writer.close()
+    return response, closed
+
+
+def test_keep_alive_serves_several_requests():
+    async def scenario(server, connect):
+        reader, writer = await connect()
+        for body in (b"first", b"second"):
+            writer.write(b"POST /hook HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+            status, headers, received = await read_response(reader)
+            assert (status, received) == (200, body)
+            assert headers["connection"] == "keep-alive"
+        writer.write(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        status, headers, _ = await read_response(reader)
+        assert status == 200 and headers["connection"] == "close"
+        assert await reader.read() == b""
+        writer.close()
+
+    serve(scenario)
+
+
+def test_http10_closes_unless_keep_alive():
+    async def scenario(server, connect):
+        (status, headers, _), closed = await exchange(connect, b"GET / HTTP/1.0\r\n\r\n")
+        assert status == 200 and headers["connection"] == "close" and closed
+
+        reader, writer = await connect()
+        writer.write(b"HEAD / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n")
+        status, headers, body = await read_response(reader, head=True)
+        # HEAD: Content-Length असली body का, पर body नहीं भेजी जाती
+        assert (status, headers["connection"], body) == (200, "keep-alive", b"")
+        assert headers["content-length"] == "2"
+        writer.close()
+
+    serve(scenario)
+
+
+def test_body_over_limit_is_rejected():
+    async def scenario(server, connect):
+        (status, _, _), closed = await exchange(
+            connect, b"POST /hook HTTP/1.1\r\nContent-Length: 11\r\n\r\n01234567890"
+        )
+        assert status == 413 and closed
+
+    serve(scenario, max_body=10)
+
+
+def test_malformed_requests_get_400():
+    bad_requests = [
+        b"POST /hook HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n",
+        b"POST /hook HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+        b"POST /hook HTTP/1.1\r\nContent-Length: -1\r\n\r\n",
+        b"GARBAGE\r\n\r\n",
+        # StreamReader की 64 KiB limit से लंबी पंक्तियाँ
+        b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\n\r\n",
+        b"GET / HTTP/1.1\r\nX-Long: " + b"a" * 70000 + b"\r\n\r\n",
+    ]
+
+    async def scenario(server, connect):
+        for raw in bad_requests:
+            (status, headers, _), closed = await exchange(connect, raw)
+            assert status == 400, raw[:40]
+            assert headers["connection"] == "close" and closed
+
+    serve(scenario)
+
+
+def test_slow_request_times_out():
+    async def scenario(server, connect):
+        reader, writer = await connect()
+        # अनुरोध शुरू हुआ पर headers कभी पूरे नहीं हुए
+        writer.write(b"POST /hook HTTP/1.1\r\nContent-Length: 5\r\n")
+        status, _, _ = await asyncio.wait_for(read_response(reader), 1)
+        assert status == 408
+        assert await reader.read() == b""
+        writer.close()
+
+    serve(scenario, read_timeout=0.05)
+
+
+def test_idle_connection_is_closed_silently():
+    async def scenario(server, connect):
+        reader, writer = await connect()
+        assert await asyncio.wait_for(reader.read(), 1) == b""
+        writer.close()
+
+    serve(scenario, idle_timeout=0.05)
+
+
+def test_unknown_path_and_method():
+    async def scenario(server, connect):
+        (status, _, _), _ = await exchange(connect, b"GET /nope HTTP/1.1\r\nConnection: close\r\n\r\n")
+        assert status == 404
+        (status, _, _), _ = await exchange(connect, b"GET /hook HTTP/1.1\r\nConnection: close\r\n\r\n")
+        assert status == 405
+
+    serve(scenario)
+
+
+def test_webhook_checks_secret_token():
+    update = json.dumps({"update_id": 1}).encode()
+
+    async def scenario(server, connect):
+        application = SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+        server.route("POST", "/telegram", main.make_webhook_handler(application))
+
+        def post(secret: bytes) -> bytes:
+            return (
+                b"POST /telegram HTTP/1.1\r\nConnection: close\r\n" + secret
+                + b"Content-Length: %d\r\n\r\n%s" % (len(update), update)
+            )
+
+        for secret in (b"", b"X-Telegram-Bot-Api-Secret-Token: wrong\r\n"):
+            (status, _, _), _ = await exchange(connect, post(secret))
+            assert status == 403
+        assert application.update_queue.empty()
+
+        header = b"X-Telegram-Bot-Api-Secret-Token: " + main.WEBHOOK_SECRET.encode() + b"\r\n"
+        (status, _, _), _ = await exchange(connect, post(header))
+        assert status == 200
+        assert (await application.update_queue.get()).update_id == 1
+
+    serve(scenario)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Telegram flood limits के हिसाब से बाहर जाने वाले संदेशों का शेड्यूलर
+"""
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from metrics import metrics
+from ratelimit import Limit, TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
+# प्राथमिकता वर्ग: छोटी संख्या पहले भेजी जाती है
+PRIORITY_MODERATION = 0  # बैन/म्यूट/चेतावनी के जवाब और लॉग
+PRIORITY_NORMAL = 1      # बाकी कमांड के जवाब, रिपोर्ट DM
+PRIORITY_LOW = 2         # फ़िल्टर जवाब और स्वागत संदेश
+PRIORITIES = (PRIORITY_MODERATION, PRIORITY_NORMAL, PRIORITY_LOW)
+
+# Telegram की global सीमा प्रति bot token है, प्रति प्रोसेस नहीं
+GLOBAL_SEND_LIMIT = Limit(1 / 30, 30)  # ~30 संदेश/सेकंड
+
+
+def split_limit(limit: Limit, parts: int) -> Limit:
+    """एक सीमा को `parts` बराबर हिस्सों में बाँटें (हर worker का हिस्सा)"""
+    return Limit(limit.period * parts, max(1, limit.burst // parts))
+
+
+# मौजूदा हैंडलर के भेजे संदेशों की प्राथमिकता
+current_priority: contextvars.ContextVar = contextvars.ContextVar(
+    "send_priority", default=PRIORITY_NORMAL
+)
+
+# सिर्फ संदेश भेजने वाले endpoints पर बजट लागू होता है; बैन/डिलीट आदि सीधे जाते हैं
+THROTTLED_PREFIXES = ("send", "forward", "copy")
+
+
+def send_priority(priority: int):
+    """हैंडलर के अंदर भेजे गए सभी संदेशों को यह प्राथमिकता दें"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = current_priority.set(priority)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_priority.reset(token)
+        return wrapper
+    return decorator
+
+
+def _is_group(chat_id) -> bool:
+    if isinstance(chat_id, str):
+        return not chat_id.lstrip("-").isdigit() or chat_id.startswith("-")
+    return isinstance(chat_id, int) and chat_id < 0
+
+
+class SendScheduler(BaseRateLimiter[Dict[str, Any]]):
+    """ग्लोबल और प्रति-चैट बजट, प्राथमिकता कतारें और RetryAfter back-off
+
+    rate_limit_args में {"priority": ...} देकर किसी एक कॉल की प्राथमिकता
+    बदली जा सकती है; वरना current_priority इस्तेमाल होती है।
+    """
+
+    def __init__(
+        self,
+        global_limit: Limit = GLOBAL_SEND_LIMIT,
+        group_limit: Limit = Limit(3, 20),         # ~20 संदेश/मिनट प्रति ग्रुप
+        private_limit: Limit = Limit(1, 1),        # ~1 संदेश/सेकंड प्रति निजी चैट
+        max_retries: int = 3,
+    ):
+        self._global = TokenBucketLimiter(global_limit, max_keys=1)
+        self._groups = TokenBucketLimiter(group_limit)
+        self._private = TokenBucketLimiter(private_limit)
+        self.max_retries = max_retries
+
+        self._queues: Dict[int, deque] = {priority: deque() for priority in PRIORITIES}
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._stats = {"sent": 0, "retry_after": 0, "max_queue": 0}
+
+    async def initialize(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._pump_task = asyncio.create_task(self._pump())
+
+    async def shutdown(self) -> None:
+        if self._pump_task:
+            self._pump_task.cancel()
+            try:
+                await self._pump_task
+            except asyncio.CancelledError:
+                pass
+            self._pump_task = None
+        for queue in self._queues.values():
+            while queue:
+                _, future = queue.popleft()
+                future.cancel()
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["queued"] = self.queued()
+        return stats
+
+    def _chat_limiter(self, chat_id) -> Optional[TokenBucketLimiter]:
+        if chat_id is None:
+            return None
+        return self._groups if _is_group(chat_id) else self._private
+
+    async def _acquire(self, chat_id, priority: int):
+        """बजट मिलने तक इंतज़ार करें (ऊँची प्राथमिकता पहले)"""
+        future = asyncio.get_running_loop().create_future()
+        self._queues.get(priority, self._queues[PRIORITY_LOW]).append((chat_id, future))
+        self._stats["max_queue"] = max(self._stats["max_queue"], self.queued())
+        self._wakeup.set()
+        await future
+
+    def _grant_next(self, now: float) -> float:
+        """भेजने लायक अगला अनुरोध छोड़ें; कोई न हो तो अगले बजट तक का समय लौटाएं"""
+        next_delay = float("inf")
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            index = 0
+            while index < len(queue):
+                chat_id, future = queue[index]
+                if future.done():
+                    # इंतज़ार करने वाला रद्द हो गया
+                    del queue[index]
+                    continue
+                limiter = self._chat_limiter(chat_id)
+                if limiter is not None:
+                    tokens = limiter.peek(chat_id, now)[0]
+                    if tokens < 1.0:
+                        # यह चैट अपना बजट खा चुकी है; दूसरी चैटों को रोके नहीं
+                        next_delay = min(next_delay, (1.0 - tokens) / limiter.rate)
+                        index += 1
+                        continue
+                    limiter.consume(chat_id)
+                self._global.consume("global")
+                del queue[index]
+                future.set_result(None)
+                return 0.0
+        return next_delay
+
+    async def _pump(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.queued():
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = loop.time()
+            delay = self._paused_until - now
+            if delay <= 0:
+                tokens = self._global.peek("global", now)[0]
+                delay = (1.0 - tokens) / self._global.rate if tokens < 1.0 else 0.0
+            if delay <= 0:
+                delay = self._grant_next(now)
+            if delay <= 0:
+                continue
+
+            # नया अनुरोध (जैसे किसी और चैट का) आए तो पहले जाग जाएं
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, 60.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _wait_pause(self):
+        delay = self._paused_until - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        metrics.count_api_call(endpoint)
+        priority = (rate_limit_args or {}).get("priority", current_priority.get())
+        throttled = endpoint.startswith(THROTTLED_PREFIXES)
+        chat_id = data.get("chat_id")
+
+        for attempt in range(self.max_retries + 1):
+            if throttled:
+                await self._acquire(chat_id, priority)
+            else:
+                await self._wait_pause()
+
+            try:
+                result = await callback(*args, **kwargs)
+                if throttled:
+                    self._stats["sent"] += 1
+                return result
+            except RetryAfter as exc:
+                self._stats["retry_after"] += 1
+                if attempt >= self.max_retries:
+                    logger.error(f"{self.max_retries} प्रयासों के बाद भी flood limit: {endpoint}")
+                    raise
+                retry_after = exc.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                # पूरे बॉट के भेजने को रोकें, सिर्फ इस अनुरोध को नहीं
+                resume_at = asyncio.get_running_loop().time() + retry_after + 0.1
+                self._paused_until = max(self._paused_until, resume_at)
+                logger.warning(f"Flood limit ({endpoint}): {retry_after} सेकंड बाद फिर कोशिश")
+                if self._wakeup:
+                    self._wakeup.set()
+        return None
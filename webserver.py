@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+webhook और health/metrics routes के लिए छोटा asyncio HTTP/1.1 सर्वर
+
+सिर्फ उतना HTTP जितना Telegram और load balancer को चाहिए: Content-Length
+वाली body, keep-alive और HEAD। कोई अतिरिक्त dependency या थ्रेड नहीं।
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    headers: Dict[str, str]  # नाम lowercase में
+    body: bytes
+
+
+class Response(NamedTuple):
+    status: int = 200
+    body: Union[bytes, str] = b""
+    content_type: str = "text/plain; charset=utf-8"
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int):
+        self.status = status
+
+
+class HTTPServer:
+    """path + method के हिसाब से async handlers चलाने वाला सर्वर"""
+
+    def __init__(self, max_body: int = 1 << 20, idle_timeout: float = 75.0, read_timeout: float = 10.0):
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout  # keep-alive कनेक्शन पर अगले अनुरोध का इंतज़ार
+        self.read_timeout = read_timeout  # अनुरोध शुरू होने के बाद पूरा पढ़ने की सीमा
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: set = set()
+
+    def route(self, method: str, path: str, handler: Handler):
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self, host: str, port: int):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        logger.info(f"HTTP सर्वर {host}:{port} पर चालू")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._connections):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except ValueError:
+            # StreamReader की limit से लंबी पंक्ति
+            raise _BadRequest(400)
+        if not line:
+            return None
+
+        async def read_rest():
+            try:
+                method, target, version = line.decode("latin-1").split()
+            except ValueError:
+                raise _BadRequest(400)
+            headers = {"_version": version}
+            while True:
+                try:
+                    header = await reader.readline()
+                except ValueError:
+                    raise _BadRequest(400)
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                raise _BadRequest(400)
+            try:
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                raise _BadRequest(400)
+            if length < 0:
+                raise _BadRequest(400)
+            if length > self.max_body:
+                raise _BadRequest(413)
+            body = await reader.readexactly(length) if length else b""
+            return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+        try:
+            return await asyncio.wait_for(read_rest(), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise _BadRequest(408)
+        except asyncio.IncompleteReadError:
+            return None
+
+    async def _dispatch(self, request: Request) -> Response:
+        method = "GET" if request.method == "HEAD" else request.method
+        handler = self._routes.get((method, request.path))
+        if handler is None:
+            known = any(path == request.path for _, path in self._routes)
+            return Response(405 if known else 404, REASONS[405 if known else 404])
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"{request.method} {request.path} हैंडलर त्रुटि: {e}", exc_info=True)
+            return Response(500, REASONS[500])
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, response: Response, keep_alive: bool, head: bool):
+        body = response.body.encode() if isinstance(response.body, str) else response.body
+        writer.write(
+            (
+                f"HTTP/1.1 {response.status} {REASONS.get(response.status, 'Unknown')}\r\n"
+                f"Content-Type: {response.content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+            + (b"" if head else body)
+        )
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _BadRequest as e:
+                    self._write(writer, Response(e.status, REASONS[e.status]), False, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                response = await self._dispatch(request)
+                connection = request.headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (
+                    request.headers["_version"] != "HTTP/1.0" or connection == "keep-alive"
+                )
+                self._write(writer, response, keep_alive, request.method == "HEAD")
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()